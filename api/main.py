@@ -5,13 +5,14 @@ import aiohttp
 import aiofiles
 import datetime
 import asyncio
+import logging
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 
-from cache import Cache
+from storage import CHUNK_SIZE, Storage, TooLarge
 from hashlib import md5
 from contextlib import asynccontextmanager
 from urllib.parse import urlparse
@@ -21,24 +22,32 @@ from pillow_heif import register_heif_opener
 register_heif_opener()
 
 templates = Jinja2Templates(directory="templates")
+logger = logging.getLogger("uvicorn.error")
+
+MAX_SIZE = 52428800
+DIRECTORIES = ("/var/www/cdn", "/var/www/reskin", "/var/www/other")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-  app.cache = Cache()
+  app.storage = Storage(
+    "/var/www/index.db",
+    DIRECTORIES,
+    ttl={"/var/www/cdn": datetime.timedelta(days=7).total_seconds()}
+  )
   task = asyncio.create_task(clean())
   yield
   task.cancel()
+  app.storage.close()
 
 async def clean():
   while True:
-    now = datetime.datetime.now().timestamp()
-    for file in os.listdir("/var/www/cdn"):
-      path = os.path.join("/var/www/cdn", file)
-      if os.path.isfile(path):
-        modified = os.path.getmtime(path)
-        if now - modified > datetime.timedelta(days=7).total_seconds():
-          os.remove(path)
-          app.cache.remove(file)
+    try:
+      files, size = await app.storage.expire()
+      if files:
+        logger.info(f"Expired {files} files, reclaimed {size / 1048576:.2f} MB")
+    except Exception as e:
+      logger.warning(f"Failed to expire files: {e}")
+
     await asyncio.sleep(600)
 
 app = FastAPI(title="Coffin CDN", docs_url=None, redoc_url="/", lifespan=lifespan)
@@ -67,7 +76,6 @@ async def upload(url: str, request: Request):
 
   hashed = md5(url.encode()).hexdigest()
   ext = mimetypes.guess_type(url)[0].split('/')[1].lower()
-  path = os.path.join(f"/var/www/{type}", f"{hashed}.{ext}")
 
   if ext not in ['png', 'jpeg', 'jpg', 'gif', 'webp', 'heic', 'heif']:
     raise HTTPException(
@@ -80,21 +88,26 @@ async def upload(url: str, request: Request):
       if r.status != 200:
         raise HTTPException(status_code=404, detail="Cannot download this image")
 
-      if int(r.headers.get("Content-Length", 0)) > 52428800:
+      if int(r.headers.get("Content-Length", 0)) > MAX_SIZE:
         raise HTTPException(
           status_code=403,
           detail="Image file size too big"
         )
 
-      temp_path = path + ".tmp"
-      async with aiofiles.open(temp_path, "wb") as f:
-        await f.write(await r.read())
+      # the header can be missing or wrong, the limit is enforced while streaming
+      try:
+        await app.storage.store(
+          f"{hashed}.{ext}", f"/var/www/{type}", r.content.iter_chunked(CHUNK_SIZE), MAX_SIZE
+        )
+      except TooLarge:
+        raise HTTPException(
+          status_code=403,
+          detail="Image file size too big"
+        )
 
       """if not ext == "gif":
         await optimize(temp_path, format="WEBP", quality=85)"""
-  
-  os.rename(temp_path, path)
-  await app.cache.add(f"{hashed}.{ext}", path)
+
   return {"url": f"https://cdn.coffin.lol/{hashed}.{ext}"}
 
 @app.delete("/delete", include_in_schema=False)
@@ -105,7 +118,7 @@ async def delete(url: str):
 
   if os.path.exists(path):
     os.remove(path)
-    app.cache.remove(file)
+    await app.storage.remove(file)
     return JSONResponse(content={"detail": "Image deleted"}, status_code=200)
   
   raise HTTPException(
@@ -117,24 +130,51 @@ async def delete(url: str):
 async def cdn(id: str, format: str, request: Request):
   file = f"{id}.{format}"
 
-  if cache := app.cache.get(file):
-    if os.path.exists(cache):
-      return FileResponse(cache)
-  
-  for path in ['/var/www/cdn', '/var/www/reskin', '/var/www/other']:
-    fpath = os.path.join(path, file)
-    if os.path.exists(fpath):
-      await app.cache.add(f"{id}.{format}", fpath)
-      return FileResponse(fpath)
- 
+  if (entry := app.storage.get(file)) and entry.directory in DIRECTORIES:
+    try:
+      data = await app.storage.read(entry)
+    except FileNotFoundError:
+      await app.storage.remove(file)
+    else:
+      if data is None:
+        return FileResponse(entry.path)
+
+      return serve(request, data, entry.etag, mimetypes.guess_type(file)[0])
+
   return templates.TemplateResponse(
       "404.html",
       {"request": request, "code": 404, "message": "Image not found"}
     )
 
+def serve(request: Request, data: bytes, etag: str, media_type: str) -> Response:
+  headers = {"Accept-Ranges": "bytes", "Cache-Control": "public, max-age=604800"}
+  if etag:
+    headers["ETag"] = etag
+    if request.headers.get("if-none-match") == etag:
+      return Response(status_code=304, headers=headers)
+
+  if (range := request.headers.get("range", "")).startswith("bytes=") and "," not in range:
+    start, _, end = range[6:].partition("-")
+    try:
+      if start:
+        start, end = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+      else:
+        start, end = max(len(data) - int(end), 0), len(data) - 1
+    except ValueError:
+      start, end = 0, -1
+
+    if not 0 <= start <= end:
+      headers["Content-Range"] = f"bytes */{len(data)}"
+      return Response(status_code=416, headers=headers)
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(data[start:end + 1], status_code=206, headers=headers, media_type=media_type)
+
+  return Response(data, headers=headers, media_type=media_type)
+
 @app.get("/cf", include_in_schema=False)
 async def cf():
-  return app.cache.getall()
+  return {name: entry.path for name, entry in app.storage.files.items()}
 
 async def start():
   config = uvicorn.Config(
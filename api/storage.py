@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import aiofiles
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+CHUNK_SIZE = 65536
+INSERT = "INSERT OR REPLACE INTO files (name, directory, digest, size, created, expires) VALUES (?, ?, ?, ?, ?, ?)"
+
+class TooLarge(Exception):
+  pass
+
+class Entry:
+  __slots__ = ("name", "directory", "digest", "size", "created", "expires")
+
+  def __init__(
+    self,
+    name: str,
+    directory: str,
+    digest: Optional[str],
+    size: int,
+    created: float,
+    expires: Optional[float] = None
+  ):
+    self.name = name
+    self.directory = directory
+    self.digest = digest
+    self.size = size
+    self.created = created
+    self.expires = expires
+
+  @property
+  def path(self) -> str:
+    return os.path.join(self.directory, self.name)
+
+  @property
+  def etag(self) -> Optional[str]:
+    return f'"{self.digest}"' if self.digest else None
+
+  @property
+  def row(self) -> tuple:
+    return (self.name, self.directory, self.digest, self.size, self.created, self.expires)
+
+class HotFiles:
+  """
+  Bounded LRU of small file contents, limited by total bytes
+  """
+  def __init__(self, max_bytes: int = 67108864, max_file: int = 1048576):
+    self.max_bytes = max_bytes
+    self.max_file = max_file
+    self.size = 0
+    self.files: "OrderedDict[str, bytes]" = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, name: str) -> Optional[bytes]:
+    if (data := self.files.get(name)) is None:
+      self.misses += 1
+      return None
+
+    self.files.move_to_end(name)
+    self.hits += 1
+    return data
+
+  def add(self, name: str, data: bytes):
+    if len(data) > self.max_file:
+      return
+
+    self.remove(name)
+    self.files[name] = data
+    self.size += len(data)
+    while self.size > self.max_bytes:
+      _, old = self.files.popitem(last=False)
+      self.size -= len(old)
+
+  def remove(self, name: str):
+    if (data := self.files.pop(name, None)) is not None:
+      self.size -= len(data)
+
+class Storage:
+  """
+  Index of every stored file and the directory it lives in, kept in sqlite
+  so lookups don't have to probe each directory on disk.
+  Once the app is serving, sqlite is only used from worker threads
+  """
+  def __init__(
+    self,
+    path: str,
+    directories: Tuple[str, ...],
+    ttl: Optional[Dict[str, float]] = None,
+    workers: int = 4
+  ):
+    self.directories = directories
+    self.ttl = ttl or {}
+    self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage")
+    self.reclaimed_files = 0
+    self.reclaimed_bytes = 0
+    self.lock = threading.Lock()
+    self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    self.db.execute("PRAGMA journal_mode=WAL")
+    self.db.execute("PRAGMA synchronous=NORMAL")
+    self.db.execute(
+      """
+      CREATE TABLE IF NOT EXISTS files (
+        name TEXT PRIMARY KEY,
+        directory TEXT NOT NULL,
+        digest TEXT,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        expires REAL
+      )
+      """
+    )
+    columns = [row[1] for row in self.db.execute("PRAGMA table_info(files)")]
+    if "expires" not in columns:
+      self.db.execute("ALTER TABLE files ADD COLUMN expires REAL")
+      for directory, ttl in self.ttl.items():
+        self.db.execute(
+          "UPDATE files SET expires = created + ? WHERE directory = ?", (ttl, directory)
+        )
+
+    self.db.execute("CREATE INDEX IF NOT EXISTS files_digest ON files (digest)")
+    self.db.execute("CREATE INDEX IF NOT EXISTS files_expires ON files (expires) WHERE expires IS NOT NULL")
+    self.files: Dict[str, Entry] = {
+      row[0]: Entry(*row)
+      for row in self.db.execute("SELECT name, directory, digest, size, created, expires FROM files")
+    }
+    self.hot = HotFiles()
+    if not self.files:
+      self.scan()
+
+  def scan(self):
+    """
+    Index whatever is already on disk, used once when the index is created
+    """
+    for directory in self.directories:
+      if not os.path.isdir(directory):
+        continue
+
+      for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith(".tmp") and entry.name not in self.files:
+          stat = entry.stat()
+          file = self.files[entry.name] = self.entry(entry.name, directory, None, stat.st_size, stat.st_mtime)
+          self.execute(INSERT, file.row)
+
+  def execute(self, query: str, args: tuple = ()) -> List[tuple]:
+    with self.lock:
+      return self.db.execute(query, args).fetchall()
+
+  def executemany(self, query: str, args: List[tuple]):
+    with self.lock:
+      self.db.executemany(query, args)
+
+  async def query(self, query: str, args: tuple = ()) -> List[tuple]:
+    return await asyncio.to_thread(self.execute, query, args)
+
+  def entry(self, name: str, directory: str, digest: Optional[str], size: int, created: float) -> Entry:
+    ttl = self.ttl.get(directory)
+    return Entry(name, directory, digest, size, created, created + ttl if ttl else None)
+
+  def get(self, name: str) -> Optional[Entry]:
+    return self.files.get(name)
+
+  async def put(self, entry: Entry):
+    self.files[entry.name] = entry
+    self.hot.remove(entry.name)
+    await self.query(INSERT, entry.row)
+
+  def forget(self, name: str) -> Optional[Entry]:
+    self.hot.remove(name)
+    return self.files.pop(name, None)
+
+  async def remove(self, name: str) -> Optional[Entry]:
+    if entry := self.forget(name):
+      await self.query("DELETE FROM files WHERE name = ?", (name,))
+
+    return entry
+
+  async def find(self, digest: str, directory: str) -> Optional[Entry]:
+    """
+    An existing copy of the same content in the same directory
+    """
+    for (name,) in await self.query(
+      "SELECT name FROM files WHERE digest = ? AND directory = ?", (digest, directory)
+    ):
+      if (entry := self.files.get(name)) and os.path.exists(entry.path):
+        return entry
+
+  async def store(
+    self, name: str, directory: str, chunks: AsyncIterator[bytes], limit: int
+  ) -> Entry:
+    """
+    Write a download to disk chunk by chunk, hashing it on the way
+    and enforcing the size limit on the bytes actually received
+    """
+    path = os.path.join(directory, name)
+    temp_path = path + ".tmp"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+      async with aiofiles.open(temp_path, "wb") as f:
+        async for chunk in chunks:
+          size += len(chunk)
+          if size > limit:
+            raise TooLarge()
+
+          digest.update(chunk)
+          await f.write(chunk)
+    except BaseException:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+      raise
+
+    entry = self.entry(name, directory, digest.hexdigest(), size, time.time())
+    if (existing := await self.find(entry.digest, directory)) and existing.name != name:
+      # same content under another url, keep a single copy on disk
+      try:
+        if os.path.exists(path):
+          os.remove(path)
+        os.link(existing.path, path)
+        os.remove(temp_path)
+      except OSError:
+        os.replace(temp_path, path)
+    else:
+      os.replace(temp_path, path)
+
+    await self.put(entry)
+    return entry
+
+  async def read(self, entry: Entry) -> Optional[bytes]:
+    """
+    Contents of a small file, from memory when it's hot
+    """
+    if entry.size > self.hot.max_file:
+      return None
+
+    if (data := self.hot.get(entry.name)) is not None:
+      return data
+
+    async with aiofiles.open(entry.path, "rb") as f:
+      data = await f.read()
+
+    self.hot.add(entry.name, data)
+    return data
+
+  @staticmethod
+  def unlink(path: str) -> int:
+    """
+    Delete a file and return the bytes freed, nothing while another hard link still uses them
+    """
+    try:
+      stat = os.stat(path)
+      os.remove(path)
+    except FileNotFoundError:
+      return 0
+
+    return stat.st_size if stat.st_nlink == 1 else 0
+
+  async def expire(self, now: Optional[float] = None, batch: int = 1000) -> Tuple[int, int]:
+    """
+    Delete the files that are past their expiry, reading only those from the index.
+    Returns how many files and bytes were reclaimed
+    """
+    now = now or time.time()
+    loop = asyncio.get_running_loop()
+    files = size = 0
+    while True:
+      names: List[str] = [
+        row[0] for row in await self.query(
+          "SELECT name FROM files WHERE expires IS NOT NULL AND expires <= ? ORDER BY expires LIMIT ?",
+          (now, batch)
+        )
+      ]
+      if not names:
+        break
+
+      entries = [entry for name in names if (entry := self.forget(name))]
+      await asyncio.to_thread(self.executemany, "DELETE FROM files WHERE name = ?", [(name,) for name in names])
+      freed = await asyncio.gather(
+        *[loop.run_in_executor(self.executor, self.unlink, entry.path) for entry in entries]
+      )
+      files += len(entries)
+      size += sum(freed)
+      if len(names) < batch:
+        break
+
+    self.reclaimed_files += files
+    self.reclaimed_bytes += size
+    return files, size
+
+  def close(self):
+    self.executor.shutdown(wait=False)
+    with self.lock:
+      self.db.close()
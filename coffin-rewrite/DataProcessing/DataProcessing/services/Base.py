@@ -5,14 +5,18 @@ Discord: aiohttp
 """
 
 from xxhash import xxh3_64_hexdigest as hash_
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple, Type
 from redis.asyncio import Redis
-from asyncio import ensure_future
+from asyncio import ensure_future, Future, get_running_loop, shield
+from collections import OrderedDict
+from math import inf
+from time import time
 from typing import Callable, Any, get_type_hints
 import functools
 from loguru import logger
 import orjson
 from dataclasses import dataclass
+from .._impl.exceptions import InvalidUser
 
 
 @dataclass
@@ -23,64 +27,121 @@ class Statistics:
     failed: int
     succeeded: int
     last_query: str
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    coalesced: int = 0
+    negative: int = 0
+    hit_ratio: float = 0.0
+
+
+class CacheEntry:
+    """
+    A decoded result, or the "not found" error it raised, with the time it
+    stops being fresh and the time it can't even be served stale anymore.
+    """
+
+    __slots__ = ("data", "error", "fresh", "expires", "until")
+
+    def __init__(self, data: Any = None, error: Optional[Exception] = None, fresh: float = inf, expires: float = inf):
+        self.data = data
+        self.error = error
+        self.fresh = fresh
+        self.expires = expires
+        self.until = inf
+
+    def result(self, return_type: Optional[Type]) -> Any:
+        if self.error is not None:
+            raise self.error
+        if isinstance(self.data, dict):
+            data = {**self.data, "cached": True}
+            return return_type(**data) if return_type else data
+        return self.data
+
+
+class LocalCache:
+    """
+    A small LRU of decoded results in front of Redis, entries are only
+    trusted for ``ttl`` seconds before Redis is asked again.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        if (entry := self.entries.get(key)) is None:
+            return None
+        now = time()
+        if entry.until <= now or entry.expires <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        entry.until = time() + self.ttl
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def serialize(result: Any) -> Any:
+    if hasattr(result, "dict"):
+        return result.dict()
+    return result
 
 
 def cache():
     """
-        A decorator to cache coroutine results in Redis for class methods.
+        A decorator to cache coroutine results for class methods, in memory first and Redis second.
         It generates a cache key using the function name, class name, and kwargs.
-        If a value exists in Redis for the function's name and kwargs, it returns the cached value.
-        Otherwise, it executes the coroutine, caches the result, and returns it.
+        If a fresh value exists for the function's name and kwargs, it returns the cached value.
+        A stale value is returned right away while it gets refreshed in the background,
+        and identical calls that arrive while one is running wait for that one instead of running again.
+        Errors in the service's ``not_found`` are cached for ``negative_ttl`` seconds.
         If you supply cached=False to any cached coroutine it will not get the cached result 
         but instead return a fresh result and cache the fresh result
     """
 
     def decorator(func: Callable):
+        return_types = []
+
+        def return_type() -> Optional[Type]:
+            if not return_types:
+                return_types.append(get_type_hints(func).get("return", None))
+            return return_types[0]
+
         @functools.wraps(func)
         async def wrapper(self, *args, **kwargs) -> Any:
-            self.status = True
-            redis_client = self.redis
             val = f"{self.__class__.__name__}.{func.__name__}-{'-'.join(str(m) for m in args)}{orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)}"
             key = hash_(
                 val
             )
-            logger.info(f"{val}\n{key}")
-            if redis_client:
-                if kwargs.pop("cached", True) is not False:
-                    type_hints = get_type_hints(func)
-                    return_type = type_hints.get("return", None)
-                    if cached_value := await redis_client.get(key):
-                        if isinstance(cached_value, bytes):
-                            data = orjson.loads(cached_value)
-                        else:
-                            data = cached_value
-                        data["cached"] = True
-                        self.status = False
-                        if return_type:
-                            return return_type(**data)
-                        else:
-                            return data
-
-            self.last_query = kwargs.get("query")
-            self.queries += 1
-
-            try:
-                result = await func(self, *args, **kwargs)
-                if redis_client:
-                    if self.ttl:
-                        ensure_future(
-                            redis_client.set(key, orjson.dumps(result.dict()) if not isinstance(result, (bytes, dict, list)) else result, ex=self.ttl)
-                        )
-                    else:
-                        ensure_future(redis_client.set(key, orjson.dumps(result.dict()) if not isinstance(result, (bytes, dict, list)) else result))
-                self.succeeded += 1
-                self.status = False
-            except Exception as error:
-                self.failed += 1
-                self.status = False
-                raise error
+            logger.debug(f"{val}\n{key}")
+            if kwargs.pop("cached", True) is not False:
+                entry = self.local.get(key)
+                if entry is None and (entry := await self.load(key)) is not None:
+                    self.local.set(key, entry)
 
-            return result
+                if entry is not None:
+                    self.hits += 1
+                    if entry.error is not None:
+                        self.negative += 1
+                    elif entry.fresh <= time():
+                        self.stale += 1
+                        if key not in self.pending:
+                            ensure_future(self.revalidate(key, func, args, kwargs))
+                    return entry.result(return_type())
+
+            if key not in self.pending:
+                self.misses += 1
+            return await self.flight(key, func, args, kwargs)
 
         return wrapper
 
@@ -94,6 +155,14 @@ class BaseService:
     failed: Optional[int] = 0
     succeeded: Optional[int] = 0
     last_query: Optional[str] = "No Last Query"
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    coalesced: int = 0
+    negative: int = 0
+    # errors that mean the thing doesn't exist, remembered instead of asked again
+    not_found: Tuple[Type[Exception], ...] = (InvalidUser,)
+    negative_ttl: int = 300
 
     def __init__(
         self: "BaseService", name: str, redis: Redis, ttl: Optional[int] = None
@@ -101,6 +170,106 @@ class BaseService:
         self.name = name
         self.redis = redis
         self.ttl = ttl
+        self.local = LocalCache()
+        self.pending: Dict[str, Future] = {}
+
+    def entry(self: "BaseService", data: Any = None, error: Optional[Exception] = None) -> CacheEntry:
+        now = time()
+        if error is not None:
+            return CacheEntry(error=error, fresh=now + self.negative_ttl, expires=now + self.negative_ttl)
+        if not self.ttl:
+            return CacheEntry(data)
+        # a stale result can still be served for another ttl while it refreshes
+        return CacheEntry(data, fresh=now + self.ttl, expires=now + self.ttl * 2)
+
+    async def load(self: "BaseService", key: str) -> Optional[CacheEntry]:
+        if not self.redis or not (cached_value := await self.redis.get(key)):
+            return None
+
+        try:
+            data = orjson.loads(cached_value) if isinstance(cached_value, (bytes, str)) else cached_value
+        except orjson.JSONDecodeError:
+            return CacheEntry(cached_value)
+
+        if not isinstance(data, dict) or "__fresh__" not in data:
+            # written before entries carried their freshness
+            return CacheEntry(data)
+
+        fresh = data["__fresh__"] or inf
+        expires = data["__expires__"] or inf
+        if "__error__" in data:
+            errors = {error.__name__: error for error in self.not_found}
+            if not (error := errors.get(data["__error__"])):
+                return None
+            return CacheEntry(error=error(data["message"]), fresh=fresh, expires=expires)
+
+        return CacheEntry(data["data"], fresh=fresh, expires=expires)
+
+    def store(self: "BaseService", key: str, entry: CacheEntry):
+        self.local.set(key, entry)
+        if self.redis:
+            ensure_future(self.persist(key, entry))
+
+    async def persist(self: "BaseService", key: str, entry: CacheEntry):
+        if entry.error is not None:
+            payload = {"__error__": entry.error.__class__.__name__, "message": getattr(entry.error, "message", str(entry.error))}
+        elif isinstance(entry.data, bytes):
+            return await self.redis.set(key, entry.data, ex=self.ttl or None)
+        else:
+            payload = {"data": entry.data}
+
+        payload["__fresh__"] = None if entry.fresh == inf else entry.fresh
+        payload["__expires__"] = None if entry.expires == inf else entry.expires
+        ex = None if entry.expires == inf else max(int(entry.expires - time()), 1)
+        try:
+            await self.redis.set(key, orjson.dumps(payload), ex=ex)
+        except Exception as error:
+            logger.warning(f"Failed to cache {self.name} result: {error}")
+
+    async def flight(self: "BaseService", key: str, func: Callable, args: tuple, kwargs: dict) -> Any:
+        """
+        Run the query, or wait for the identical one that's already running.
+        """
+
+        if (future := self.pending.get(key)) is not None:
+            self.coalesced += 1
+            return await shield(future)
+
+        future = self.pending[key] = get_running_loop().create_future()
+        self.status = True
+        self.last_query = kwargs.get("query")
+        self.queries += 1
+        try:
+            result = await func(self, *args, **kwargs)
+        except self.not_found as error:
+            self.failed += 1
+            self.store(key, self.entry(error=error))
+            future.set_exception(error)
+            # nobody else may be waiting, the error is raised below either way
+            future.exception()
+            raise error
+        except BaseException as error:
+            self.failed += 1
+            if isinstance(error, Exception):
+                future.set_exception(error)
+                future.exception()
+            else:
+                future.cancel()
+            raise error
+        else:
+            self.succeeded += 1
+            self.store(key, self.entry(serialize(result)))
+            future.set_result(result)
+            return result
+        finally:
+            self.status = False
+            self.pending.pop(key, None)
+
+    async def revalidate(self: "BaseService", key: str, func: Callable, args: tuple, kwargs: dict):
+        try:
+            await self.flight(key, func, args, kwargs)
+        except Exception as error:
+            logger.debug(f"Refreshing {self.name} {func.__name__} failed: {error}")
 
     def __repr__(self: "BaseService") -> str:
         return f"<{self.name.title()} state={self.status} succeeded={self.succeeded} failed={self.failed} last_query={self.last_query}>"
@@ -114,4 +283,10 @@ class BaseService:
             failed=self.failed,
             succeeded=self.succeeded,
             last_query=self.last_query,
+            hits=self.hits,
+            misses=self.misses,
+            stale=self.stale,
+            coalesced=self.coalesced,
+            negative=self.negative,
+            hit_ratio=self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
         )
@@ -19,7 +19,7 @@ class TikTokService(BaseService):
         self.redis = redis
         self.ttl = ttl
         self.tt = TikTok()
-        super().__init__(self.redis, self.ttl)
+        super().__init__("TikTok", self.redis, self.ttl)
 
     @cache()
     async def fetch_user_old(self: "TikTokService", username: str):
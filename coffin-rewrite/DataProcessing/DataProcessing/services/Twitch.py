@@ -13,7 +13,7 @@ class TwitchService(BaseService):
         self.redis = redis
         self.ttl = ttl
         self.bearer = None
-        super().__init__(self.redis, self.ttl)
+        super().__init__("Twitch", self.redis, self.ttl)
 
     @property
     def client_id(self: "TwitchService") -> str:
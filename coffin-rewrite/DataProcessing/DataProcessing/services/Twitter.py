@@ -37,7 +37,7 @@ class TwitterService(BaseService):
     def __init__(self: "TwitterService", redis: Redis, ttl: Optional[int] = None):
         self.redis = redis
         self.ttl = ttl
-        super().__init__(self.redis, self.ttl)
+        super().__init__("Twitter", self.redis, self.ttl)
 
     @cache()
     async def get_guest_token(self: "TwitterService") -> str:
@@ -160,6 +160,8 @@ CREATE TABLE IF NOT EXISTS text_levels (
     PRIMARY KEY(guild_id, user_id)
 );
 
+CREATE INDEX IF NOT EXISTS text_levels_guild_xp ON text_levels (guild_id, xp DESC);
+
 CREATE TABLE IF NOT EXISTS message_logs (
     id TEXT NOT NULL UNIQUE,
     guild_id BIGINT NOT NULL,
@@ -381,6 +383,23 @@ CREATE TABLE IF NOT EXISTS blacklists (
     PRIMARY KEY(object_id, object_type)
 );
 
+-- bulk member operations still running, resumed from position after a restart
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    guild_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    target_id BIGINT,
+    reason TEXT,
+    author_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT,
+    members BIGINT[] NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY(guild_id)
+);
+
 -- Last.fm schema
 CREATE SCHEMA IF NOT EXISTS lastfm;
 
@@ -393,9 +412,13 @@ CREATE TABLE IF NOT EXISTS lastfm.config (
     color BIGINT,
     message TEXT,
     reactions JSONB[] NOT NULL DEFAULT ARRAY[]::JSONB[],
+    indexed_at BIGINT,
     PRIMARY KEY(user_id)
 );
 
+-- the newest scrobble in the user's indexed library, updates only fetch what came after it
+ALTER TABLE lastfm.config ADD COLUMN IF NOT EXISTS indexed_at BIGINT;
+
 -- Last.fm favorites table
 CREATE TABLE IF NOT EXISTS lastfm.favorites (
     user_id BIGINT NOT NULL,
@@ -477,6 +500,18 @@ CREATE TABLE IF NOT EXISTS lastfm.crowns (
     PRIMARY KEY(guild_id, artist)
 );
 
+-- the guilds each linked Last.fm user shares with the bot, who knows joins against it
+CREATE TABLE IF NOT EXISTS lastfm.members (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    PRIMARY KEY(guild_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS lastfm_members_user ON lastfm.members (user_id);
+CREATE INDEX IF NOT EXISTS lastfm_artists_listeners ON lastfm.artists (artist, plays DESC);
+CREATE INDEX IF NOT EXISTS lastfm_albums_listeners ON lastfm.albums (artist, album, plays DESC);
+CREATE INDEX IF NOT EXISTS lastfm_tracks_listeners ON lastfm.tracks (artist, track, plays DESC);
+
 -- Last.fm hidden artists table
 CREATE TABLE IF NOT EXISTS lastfm.hidden (
     guild_id BIGINT NOT NULL,
@@ -89,6 +89,11 @@ class Antinuke(Cog):
 
         return True
 
+    async def cog_after_invoke(self, ctx: Context) -> None:
+        # the events cog keeps every configuration in memory, have it reload this guild's
+        if ctx.guild:
+            self.bot.dispatch("antinuke_update", ctx.guild.id)
+
     @group(
         name="antinuke",
         usage="(subcommand) <args>",
@@ -9,9 +9,8 @@ from discord import (
     Guild
 )
 from loguru import logger
-from discord.ext.tasks import loop
 from aiohttp import ClientSession
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, FrozenSet
 
 from bot.system.classes.builtins import catch
 from .model import Module, Configuration
@@ -22,30 +21,42 @@ class AntiNukeEvents(Cog):
     def __init__(self: "AntiNukeEvents", bot: Client):
         self.bot = bot
         self.config: Dict[int, Configuration] = dict()
+        # whitelist + admins per guild, so checking an audit log entry is a set lookup
+        self.trusted: Dict[int, FrozenSet[int]] = dict()
 
     async def cog_load(self) -> None:
-        self.revalidate_config.start()
-
-    async def cog_unload(self) -> None:
-        self.revalidate_config.cancel()
-
+        self.bot.loop.create_task(self.load_config())
 
     def get_changes(self, entry: AuditLogEntry) -> dict:
         return {k:v for k, v in entry.changes.before.__iter__()}
 
-    @loop(seconds=30)
-    async def revalidate_config(self):
+    def set_config(self, guild_id: int, row: Optional[Any]):
+        if row is None:
+            self.config.pop(guild_id, None)
+            self.trusted.pop(guild_id, None)
+            return
+
+        configuration = Configuration(**row)
+        self.config[guild_id] = configuration
+        self.trusted[guild_id] = frozenset(configuration.whitelist + configuration.admins)
+
+    async def load_config(self):
+        """
+        Read every configuration once, afterwards guilds are reloaded one at a time through `antinuke_update`
+        """
+        await self.bot.wait_until_ready()
         with catch(raise_error=True):  # type: ignore # noqa: F821
             schedule_deletion: List[int] = list()
 
             for row in await self.bot.db.fetch(
                 """
                 SELECT * FROM antinuke
-                """
+                """,
+                cached=False,
             ):
                 guild_id: int = row.get("guild_id")
                 if self.bot.get_guild(guild_id):
-                    self.config[guild_id] = Configuration(**row)
+                    self.set_config(guild_id, row)
                 else:
                     schedule_deletion.append(guild_id)
 
@@ -57,6 +68,37 @@ class AntiNukeEvents(Cog):
                     """,
                     [(guild_id) for guild_id in schedule_deletion],
                 )
+            logger.info(f"Loaded {len(self.config)} antinuke configurations")
+
+    @Cog.listener()
+    async def on_antinuke_update(self, guild_id: int):
+        row = await self.bot.db.fetchrow(
+            """
+            SELECT * FROM antinuke
+            WHERE guild_id = $1
+            """,
+            guild_id,
+            cached=False,
+        )
+        self.set_config(guild_id, row)
+
+    @Cog.listener()
+    async def on_guild_remove(self, guild: Guild):
+        self.set_config(guild.id, None)
+        await self.bot.db.execute(
+            """
+            DELETE FROM antinuke
+            WHERE guild_id = $1
+            """,
+            guild.id,
+        )
+
+    def is_trusted(self, entry: AuditLogEntry) -> bool:
+        return (
+            entry.user.id in self.trusted.get(entry.guild.id, ())
+            or entry.user.id == entry.guild.owner_id
+            or entry.user.id == entry.guild.me.id
+        )
 
     async def do_antinuke(self, entry: AuditLogEntry, module: Module):
         data: Configuration = self.config.get(entry.guild.id)
@@ -66,9 +108,7 @@ class AntiNukeEvents(Cog):
         elif not module.status:
             return
 
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         
     async def strip(self, user: Member, reason: str):
@@ -127,9 +167,7 @@ class AntiNukeEvents(Cog):
         elif not data.ban.status:
             return
 
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         await entry.guild.unban(entry.target, reason = "AntiNuke Ban")
         return await self.do_punishment(entry, data.ban, data)
@@ -143,9 +181,7 @@ class AntiNukeEvents(Cog):
         elif not data.kick.status:
             return
 
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
 
         return await self.do_punishment(entry, data.kick, data)
@@ -155,9 +191,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.role.status:
             return
@@ -173,9 +207,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.role.status:
             return
@@ -190,9 +222,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.role.status:
             return
@@ -208,9 +238,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.role.status:
             return
@@ -225,9 +253,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.channel.status:
             return
@@ -244,9 +270,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.channel.status:
             return
@@ -265,9 +289,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.channel.status:
             return
@@ -286,9 +308,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.webhook.status:
             return
@@ -308,9 +328,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return #logger.info(f"no config found")
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             #logger.info(f"user {entry.user} is whitelisted")
             return
         elif not data.botadd.status:
@@ -324,9 +342,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.webhook.status:
             return
@@ -347,9 +363,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.role.status:
             return
@@ -360,9 +374,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.emoji.status:
             return
@@ -385,9 +397,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.emoji.status:
             return
@@ -406,9 +416,7 @@ class AntiNukeEvents(Cog):
         data: Configuration = self.config.get(entry.guild.id)
         if not data:
             return
-        elif entry.user.id in (
-            data.whitelist + data.admins + [entry.guild.owner_id, entry.guild.me.id]
-        ):
+        elif self.is_trusted(entry):
             return
         elif not data.emoji.status:
             return
@@ -76,6 +76,7 @@ class Configuration(Cog):
         if len(setting) > 3:
             raise CommandError("prefix can't be more than 3 characters")
         await self.bot.db.execute("""INSERT INTO config (guild_id, prefix) VALUES($1, $2) ON CONFLICT(guild_id) DO UPDATE SET prefix = excluded.prefix""", ctx.guild.id, setting)
+        self.bot.prefixes.set_guild(ctx.guild.id, setting)
         return await ctx.success(f"set the **prefix** to `{setting}`")
     
     @prefix.command(name = "self", description = "set your prefix for bot commands", example = ",prefix self ;")
@@ -85,10 +86,12 @@ class Configuration(Cog):
                 await self.bot.db.execute("""UPDATE user_config SET prefix = NULL WHERE user_id = $1""", ctx.author.id)
             except Exception:
                 raise CommandError("you haven't set your self prefix")
+            self.bot.prefixes.set_user(ctx.author.id, None)
             return await ctx.success("successfully **removed** your **self prefix**")
         if len(setting) > 3:
             raise CommandError("prefix can't be more than 3 characters")
         await self.bot.db.execute("""INSERT INTO user_config (user_id, prefix) VALUES($1, $2) ON CONFLICT(user_id) DO UPDATE SET prefix = excluded.prefix""", ctx.author.id, setting)
+        self.bot.prefixes.set_user(ctx.author.id, setting)
         return await ctx.success(f"set the **prefix** to `{setting}`")
 
     @group(name = "alias", description = "Add custom aliases to commands", example = ",alias add hi avatar", aliases = ["aliases"], invoke_without_command = True)
@@ -0,0 +1,287 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from asyncpg import Connection
+from loguru import logger
+
+from .lastfm import api_request, pages, recent
+
+# library -> (staging columns, how a row of the api response maps onto them)
+# staging is plain text so COPY doesn't need a binary codec for citext
+LIBRARIES: Dict[str, Tuple[str, Callable[[dict], Tuple[Any, ...]]]] = {
+    "artists": (
+        "artist TEXT, plays BIGINT",
+        lambda item: (item["name"], int(item.get("playcount") or 0)),
+    ),
+    "albums": (
+        "artist TEXT, album TEXT, plays BIGINT",
+        lambda item: (item["artist"]["name"], item["name"], int(item.get("playcount") or 0)),
+    ),
+    "tracks": (
+        "artist TEXT, track TEXT, plays BIGINT",
+        lambda item: (item["artist"]["name"], item["name"], int(item.get("playcount") or 1)),
+    ),
+}
+
+# the columns identifying a row of each library besides user_id
+KEYS = {
+    "artists": ("artist",),
+    "albums": ("artist", "album"),
+    "tracks": ("artist", "track"),
+}
+
+TABLES = ("lastfm.artists", "lastfm.albums", "lastfm.tracks", "lastfm.crowns", "lastfm.config")
+
+Progress = Callable[[str, int], Awaitable[Any]]
+
+
+@dataclass
+class IndexPhase:
+    name: str
+    rows: int
+    seconds: float
+
+
+@dataclass
+class IndexReport:
+    username: str
+    mode: str
+    phases: List[IndexPhase] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(phase.seconds for phase in self.phases)
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"`{phase.name}` {phase.rows:,} rows in {phase.seconds:.2f}s" for phase in self.phases
+        )
+
+
+class Phase:
+    """
+    Times a block of work and adds it to the report.
+    """
+
+    def __init__(self, report: IndexReport, name: str):
+        self.report = report
+        self.name = name
+        self.rows = 0
+
+    def __enter__(self) -> "Phase":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *_: Any):
+        self.report.phases.append(IndexPhase(self.name, self.rows, perf_counter() - self.start))
+
+
+def merge(library: str, staging: str, increment: bool) -> str:
+    """
+    A single statement folding the staging table into the library, either
+    replacing it outright or adding the staged plays on top.
+    """
+
+    keys = KEYS[library]
+    columns = ", ".join(keys)
+    # grouped the way the library compares them, so no row is hit twice by one statement
+    grouped = ", ".join(f"{key}::CITEXT" for key in keys)
+    selected = ", ".join(f"{key}::CITEXT AS {key}" for key in keys)
+    if increment:
+        return f"""
+            INSERT INTO lastfm.{library} AS l (user_id, username, {columns}, plays)
+            SELECT $1, $2, {selected}, SUM(plays) FROM {staging} GROUP BY {grouped}
+            ON CONFLICT (user_id, {columns}) DO UPDATE
+            SET plays = l.plays + EXCLUDED.plays, username = EXCLUDED.username
+        """
+
+    matches = " AND ".join(f"s.{key} = l.{key}" for key in keys)
+    return f"""
+        WITH staged AS (
+            SELECT {selected}, SUM(plays) AS plays FROM {staging} GROUP BY {grouped}
+        ), removed AS (
+            DELETE FROM lastfm.{library} l
+            WHERE l.user_id = $1
+            AND NOT EXISTS (SELECT 1 FROM staged s WHERE {matches})
+        )
+        INSERT INTO lastfm.{library} AS l (user_id, username, {columns}, plays)
+        SELECT $1, $2, {columns}, plays FROM staged
+        ON CONFLICT (user_id, {columns}) DO UPDATE
+        SET plays = EXCLUDED.plays, username = EXCLUDED.username
+    """
+
+
+class LibraryIndexer:
+    """
+    Keeps a user's Last.fm library in the database.
+
+    Once a library has been indexed, only the scrobbles since the last
+    indexed one are fetched and added on top. A full index streams every
+    page into temporary tables with ``COPY`` and merges each library with
+    a single statement, instead of upserting row by row.
+    """
+
+    def __init__(self, bot: Any, max_pages: int = 25):
+        self.bot = bot
+        self.max_pages = max_pages
+
+    async def update(self, user_id: int, username: str, full: bool = False, progress: Optional[Progress] = None) -> IndexReport:
+        since = await self.bot.db.fetchval(
+            """SELECT indexed_at FROM lastfm.config WHERE user_id = $1""",
+            user_id,
+            cached=False,
+        )
+        if since and not full:
+            report = IndexReport(username, "incremental")
+            with Phase(report, "fetch") as phase:
+                scrobbles = await recent(username, since, max_pages=self.max_pages)
+                phase.rows = len(scrobbles or ())
+
+            if scrobbles is not None:
+                await self.increment(user_id, username, since, scrobbles, report)
+                logger.info(f"Incrementally indexed {username} in {report.seconds:.2f}s")
+                return report
+
+            logger.info(f"{username} is over {self.max_pages} pages behind, indexing from scratch")
+
+        report = await self.full(user_id, username, progress)
+        logger.info(f"Indexed {username} in {report.seconds:.2f}s")
+        return report
+
+    async def latest(self, username: str) -> Optional[int]:
+        data = await api_request(
+            params={"method": "user.getrecenttracks", "username": username, "limit": 1},
+            ignore_errors=True,
+        )
+        tracks = (data or {}).get("recenttracks", {}).get("track") or []
+        for track in [tracks] if isinstance(tracks, dict) else tracks:
+            if "date" in track:
+                return int(track["date"]["uts"])
+        return None
+
+    async def increment(self, user_id: int, username: str, since: int, scrobbles: List[dict], report: IndexReport):
+        artists: Counter = Counter()
+        albums: Counter = Counter()
+        tracks: Counter = Counter()
+        for scrobble in scrobbles:
+            artist = scrobble["artist"]["#text"]
+            artists[artist] += 1
+            if album := scrobble.get("album", {}).get("#text"):
+                albums[(artist, album)] += 1
+            tracks[(artist, scrobble["name"])] += 1
+
+        deltas = {
+            "artists": [(artist, plays) for artist, plays in artists.items()],
+            "albums": [(*key, plays) for key, plays in albums.items()],
+            "tracks": [(*key, plays) for key, plays in tracks.items()],
+        }
+        indexed_at = max((int(s["date"]["uts"]) for s in scrobbles), default=since)
+
+        async with self.bot.db.acquire(*TABLES) as conn:
+            async with conn.transaction():
+                for library, rows in deltas.items():
+                    with Phase(report, f"merge {library}") as phase:
+                        staging = await self.stage(conn, library, on_commit_drop=True)
+                        if rows:
+                            await conn.copy_records_to_table(staging, records=rows)
+                            await conn.execute(merge(library, staging, increment=True), user_id, username)
+                        phase.rows = len(rows)
+
+                with Phase(report, "crowns") as phase:
+                    phase.rows = await self.crowns(conn, user_id, removed=False)
+
+                await conn.execute(
+                    """UPDATE lastfm.config SET indexed_at = $2 WHERE user_id = $1""",
+                    user_id,
+                    indexed_at,
+                )
+
+    async def full(self, user_id: int, username: str, progress: Optional[Progress] = None) -> IndexReport:
+        report = IndexReport(username, "full")
+
+        async with self.bot.db.acquire(*TABLES) as conn:
+            try:
+                # pages are copied as they arrive, the transaction only spans the merge
+                for library, (_, row) in LIBRARIES.items():
+                    staging = await self.stage(conn, library)
+                    with Phase(report, f"fetch {library}") as phase:
+                        async for items in pages(username, library):
+                            records = [row(item) for item in items if isinstance(item, dict)]
+                            await conn.copy_records_to_table(staging, records=records)
+                            phase.rows += len(records)
+
+                    if progress:
+                        await progress(library, phase.rows)
+
+                # read once the pages are in, a scrobble made while fetching isn't counted again by the next increment
+                indexed_at = await self.latest(username)
+                async with conn.transaction():
+                    for library in LIBRARIES:
+                        with Phase(report, f"merge {library}") as phase:
+                            status = await conn.execute(
+                                merge(library, f"lastfm_{library}_staging", increment=False),
+                                user_id,
+                                username,
+                            )
+                            phase.rows = int(status.split()[-1])
+
+                    with Phase(report, "crowns") as phase:
+                        phase.rows = await self.crowns(conn, user_id, removed=True)
+
+                    await conn.execute(
+                        """UPDATE lastfm.config SET indexed_at = $2 WHERE user_id = $1""",
+                        user_id,
+                        indexed_at,
+                    )
+            finally:
+                for library in LIBRARIES:
+                    await conn.execute(f"DROP TABLE IF EXISTS lastfm_{library}_staging")
+
+        return report
+
+    async def stage(self, conn: Connection, library: str, on_commit_drop: bool = False) -> str:
+        staging = f"lastfm_{library}_{'delta' if on_commit_drop else 'staging'}"
+        await conn.execute(
+            f"""
+            CREATE TEMPORARY TABLE IF NOT EXISTS {staging} ({LIBRARIES[library][0]})
+            {'ON COMMIT DROP' if on_commit_drop else ''}
+            """
+        )
+        await conn.execute(f"TRUNCATE {staging}")
+        return staging
+
+    async def crowns(self, conn: Connection, user_id: int, removed: bool) -> int:
+        """
+        Bring the plays on the user's crowns in line with their library,
+        dropping the crowns of artists they no longer have when ``removed``.
+        """
+
+        status = await conn.execute(
+            """
+            UPDATE lastfm.crowns c
+            SET plays = a.plays
+            FROM lastfm.artists a
+            WHERE c.user_id = $1
+            AND a.user_id = $1
+            AND a.artist = c.artist
+            AND a.plays != c.plays
+            """,
+            user_id,
+        )
+        updated = int(status.split()[-1])
+        if removed:
+            status = await conn.execute(
+                """
+                DELETE FROM lastfm.crowns c
+                WHERE c.user_id = $1
+                AND NOT EXISTS (
+                    SELECT 1 FROM lastfm.artists a
+                    WHERE a.user_id = $1 AND a.artist = c.artist
+                )
+                """,
+                user_id,
+            )
+            updated += int(status.split()[-1])
+        return updated
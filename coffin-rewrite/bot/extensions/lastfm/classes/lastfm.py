@@ -213,6 +213,49 @@ async def index(
         yield library, items
 
 
+async def pages(
+    username: str, library: str, limit: int = 1000, delay: float = 0.5
+) -> AsyncGenerator[List[dict], None]:
+    """
+    Yield a user's top artists, albums or tracks one page at a time,
+    so a large library never has to be held in memory as a whole.
+    """
+
+    page, total = 1, 1
+    while page <= total:
+        data = await api_request(params = {"method": f"user.gettop{library}", "username": username, "limit": limit, "page": page, "period": "overall"})
+        data = data[f"top{library}"]
+        total = int(data["@attr"]["totalPages"])
+        items = data.get(library[:-1]) or []
+        yield [items] if isinstance(items, dict) else items
+        page += 1
+        if page <= total:
+            await asyncio.sleep(delay)
+
+
+async def recent(
+    username: str, since: int, limit: int = 200, max_pages: int = 25
+) -> Optional[List[dict]]:
+    """
+    Every scrobble after ``since``, or None when there are more than
+    ``max_pages`` pages of them and indexing from scratch is cheaper.
+    """
+
+    scrobbles, page, total = [], 1, 1
+    while page <= total:
+        if page > max_pages:
+            return None
+        data = await api_request(params = {"method": "user.getrecenttracks", "username": username, "limit": limit, "page": page, "from": since + 1})
+        data = data["recenttracks"]
+        total = int(data["@attr"]["totalPages"])
+        tracks = data.get("track") or []
+        # the track being played right now has no date and isn't a scrobble yet
+        scrobbles.extend(track for track in ([tracks] if isinstance(tracks, dict) else tracks) if "date" in track)
+        page += 1
+
+    return scrobbles
+
+
 async def login(session: ClientSession, ctx: Context):
     key = CONFIG["Authorization"]["lastfm"]["login"]
     user_id = ctx.author.id
@@ -235,11 +278,13 @@ async def login(session: ClientSession, ctx: Context):
                     INSERT INTO lastfm.config (user_id, username) 
                     VALUES ($1, $2)
                     ON CONFLICT (user_id) DO UPDATE
-                    SET username = EXCLUDED.username
+                    SET username = EXCLUDED.username,
+                    indexed_at = CASE WHEN lastfm.config.username = EXCLUDED.username THEN lastfm.config.indexed_at END
                     """,
                     ctx.author.id,
                     data.name,
                 )
+                ctx.bot.dispatch("lastfm_link", ctx.author.id)
                 await message.edit(embed = Embed(color = 0xd31f27, description = f"your lastfm username has been set as **{data.name}**"))
                 return True
         except Exception as e:
@@ -0,0 +1,182 @@
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from discord import Guild, Member
+from loguru import logger
+
+TABLES = ("lastfm.members",)
+
+
+class MemberIndex:
+    """
+    Which guilds each linked Last.fm user is in, kept in ``lastfm.members``.
+
+    Who-knows and crowns join against this table instead of sending every
+    member id of the guild with each query, only linked users are ever
+    stored so a large guild costs as many rows as it has Last.fm users.
+
+    The table is rebuilt once the bot is ready and kept current from member
+    joins and leaves, guild joins and removals, and logins and logouts.
+    """
+
+    def __init__(self, bot: Any):
+        self.bot = bot
+        self.linked: Set[int] = set()
+        self.ready = False
+
+    def __repr__(self) -> str:
+        return f"<MemberIndex linked={len(self.linked)} ready={self.ready}>"
+
+    def pairs(self, guild: Guild) -> List[Tuple[int, int]]:
+        # whichever side is smaller is walked, the other is a set/dict lookup
+        if guild.member_count and guild.member_count < len(self.linked):
+            return [(guild.id, member.id) for member in guild.members if member.id in self.linked]
+        return [(guild.id, user_id) for user_id in self.linked if guild.get_member(user_id)]
+
+    async def sync(self):
+        """
+        Rebuild the index from the member cache, rows are copied into a
+        temporary table and merged so readers never see it empty.
+        """
+
+        start = perf_counter()
+        rows = await self.bot.db.fetch("""SELECT user_id FROM lastfm.config""", cached=False)
+        self.linked = {row.user_id for row in rows}
+        records = [pair for guild in self.bot.guilds for pair in self.pairs(guild)]
+
+        async with self.bot.db.acquire(*TABLES) as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    CREATE TEMPORARY TABLE lastfm_members_staging
+                    (guild_id BIGINT, user_id BIGINT) ON COMMIT DROP
+                    """
+                )
+                await conn.copy_records_to_table("lastfm_members_staging", records=records)
+                await conn.execute(
+                    """
+                    DELETE FROM lastfm.members m
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM lastfm_members_staging s
+                        WHERE s.guild_id = m.guild_id AND s.user_id = m.user_id
+                    )
+                    """
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO lastfm.members (guild_id, user_id)
+                    SELECT guild_id, user_id FROM lastfm_members_staging
+                    ON CONFLICT DO NOTHING
+                    """
+                )
+
+        self.ready = True
+        logger.info(
+            f"Indexed {len(records):,} Last.fm memberships of {len(self.linked):,} users "
+            f"in {perf_counter() - start:.2f}s"
+        )
+
+    async def insert(self, records: Iterable[Tuple[int, int]]):
+        if records := list(records):
+            await self.bot.db.executemany(
+                """INSERT INTO lastfm.members (guild_id, user_id) VALUES ($1, $2) ON CONFLICT DO NOTHING""",
+                records,
+            )
+
+    async def join(self, member: Member):
+        if member.id in self.linked:
+            await self.insert([(member.guild.id, member.id)])
+
+    async def leave(self, member: Member):
+        if member.id in self.linked:
+            await self.bot.db.execute(
+                """DELETE FROM lastfm.members WHERE guild_id = $1 AND user_id = $2""",
+                member.guild.id,
+                member.id,
+            )
+
+    async def add_guild(self, guild: Guild):
+        await self.insert(self.pairs(guild))
+
+    async def remove_guild(self, guild: Guild):
+        await self.bot.db.execute("""DELETE FROM lastfm.members WHERE guild_id = $1""", guild.id)
+
+    async def link(self, user_id: int):
+        self.linked.add(user_id)
+        await self.insert((guild.id, user_id) for guild in self.bot.guilds if guild.get_member(user_id))
+
+    async def unlink(self, user_id: int):
+        self.linked.discard(user_id)
+        await self.bot.db.execute("""DELETE FROM lastfm.members WHERE user_id = $1""", user_id)
+
+
+async def benchmark(db: Any, members: int = 200_000, linked: int = 500, artist: str = "Radiohead", repeat: int = 20) -> Dict[str, float]:
+    """
+    Time who-knows on a synthetic guild of ``members`` members, ``linked`` of
+    which have a library, sending every member id against joining the index.
+    Returns the best milliseconds per query, building the id list included.
+    Run it from jishaku, e.g. ``await benchmark(bot.db)``, everything it
+    writes lives in temporary tables.
+    """
+
+    random = Random(0)
+    guild_id = 1
+    ids = random.sample(range(10**17, 10**18), members)
+    users = random.sample(ids, linked)
+    # listeners outside the guild, so both plans have rows to skip
+    others = random.sample(range(10**17), linked * 10)
+
+    async with db.acquire() as conn:
+        await conn.execute(
+            """
+            CREATE TEMPORARY TABLE bench_artists (user_id BIGINT, username TEXT, artist CITEXT, plays BIGINT, PRIMARY KEY (user_id, artist));
+            CREATE TEMPORARY TABLE bench_members (guild_id BIGINT, user_id BIGINT, PRIMARY KEY (guild_id, user_id));
+            CREATE INDEX ON bench_artists (artist, plays DESC);
+            """
+        )
+        try:
+            await conn.copy_records_to_table(
+                "bench_artists",
+                records=[
+                    (user_id, str(user_id), name, random.randint(1, 5000))
+                    for user_id in users + others
+                    for name in {artist, *(f"artist {random.randrange(10_000)}" for _ in range(20))}
+                ],
+            )
+            await conn.copy_records_to_table(
+                "bench_members",
+                records=[(guild_id, user_id) for user_id in users]
+                + [(random.randrange(2, 1000), user_id) for user_id in others],
+            )
+            await conn.execute("""ANALYZE bench_artists; ANALYZE bench_members""")
+
+            async def best(query: str, args: Callable[[], Tuple[Any, ...]]) -> float:
+                timings = []
+                for _ in range(repeat):
+                    started = perf_counter()
+                    await conn.fetch(query, *args())
+                    timings.append(perf_counter() - started)
+                return min(timings) * 1000
+
+            return {
+                "array": await best(
+                    """
+                    SELECT user_id, username, plays FROM bench_artists
+                    WHERE user_id = ANY($2::BIGINT[]) AND artist = $1
+                    ORDER BY plays DESC
+                    """,
+                    lambda: (artist, [user_id for user_id in ids]),
+                ),
+                "index": await best(
+                    """
+                    SELECT a.user_id, a.username, a.plays FROM bench_members m
+                    JOIN bench_artists a ON a.user_id = m.user_id AND a.artist = $1
+                    WHERE m.guild_id = $2
+                    ORDER BY a.plays DESC
+                    """,
+                    lambda: (artist, guild_id),
+                ),
+            }
+        finally:
+            await conn.execute("""DROP TABLE IF EXISTS bench_artists, bench_members""")
@@ -19,6 +19,7 @@ from typing import Optional, List, Union, Dict, Tuple, Any
 from .classes.client import ClientSession
 from .classes import lastfm
 from .classes.lastfm import Client as LastFMClient
+from .classes.indexer import LibraryIndexer
 from time import perf_counter
 from yarl import URL
 from loguru import logger
@@ -141,6 +142,7 @@ class LastFM(Cog):
         self.bot = bot
         self.tasks: List[int] = []
         self.client = LastFMClient()
+        self.indexer = LibraryIndexer(bot)
         self.spotify_client: SpotifyClient = SpotifyClient(
             SpotifyClientCredentialsFlow(
                 client_id="d069c1918d4348668d01ff3c1beb585d",
@@ -251,7 +253,8 @@ class LastFM(Cog):
             INSERT INTO lastfm.config (user_id, username) 
             VALUES ($1, $2)
             ON CONFLICT (user_id) DO UPDATE
-            SET username = EXCLUDED.username
+            SET username = EXCLUDED.username,
+            indexed_at = CASE WHEN lastfm.config.username = EXCLUDED.username THEN lastfm.config.indexed_at END
             """,
             ctx.author.id,
             data.name,
@@ -568,6 +571,7 @@ class LastFM(Cog):
                         )
                     ]
                 )
+                self.bot.dispatch("lastfm_unlink", interaction.user.id)
                 embed = Embed(
                     description=f"<:check:1286583241905803356> {interaction.user.mention}: Your account has been **removed**. Unauthorize [coffin](https://last.fm/settings/applications) here",
                     color=0x90DA68,
@@ -603,12 +607,11 @@ class LastFM(Cog):
             await message.delete()
 
     @lastfm.command(name="update", aliases=["refresh", "index"])
-    async def lastfm_update(self, ctx: Context) -> Message:
+    async def lastfm_update(self, ctx: Context, full: Optional[Boolean] = False) -> Message:
         """
         Refresh your local Last.fm library.
         """
         await self.cog_check(ctx)
-        logger.info(dir(ctx))
         if ctx.author.id in self.tasks:
             return await ctx.fail(
                 "Your library is already being indexed, please try again later!"
@@ -617,119 +620,22 @@ class LastFM(Cog):
         message = await ctx.normal("Starting index of your Last.fm library...")
         username = await self.bot.db.fetchval("""SELECT username FROM lastfm.config WHERE user_id = $1""", ctx.author.id)
 
-        start = perf_counter()
-        await gather(
-            *[
-                self.bot.db.execute(query, ctx.author.id)
-                for query in (
-                    "DELETE FROM lastfm.artists WHERE user_id = $1",
-                    "DELETE FROM lastfm.albums WHERE user_id = $1",
-                    "DELETE FROM lastfm.tracks WHERE user_id = $1",
-                    "DELETE FROM lastfm.crowns WHERE user_id = $1",
-                )
-            ]
-        )
-
-        async for library, items in lastfm.index(ctx, user=username):
-            if library == "artists":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.artists
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (user_id, artist)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            username,
-                            artist if isinstance(artist, str) else artist["name"],
-                            int(artist["playcount"]) if artist.get("playcount") else 0,
-                        )
-                        for artist in items
-                    ],
-                )
-                await self.bot.db.executemany(
-                    """
-                    UPDATE lastfm.crowns
-                    SET plays = $3
-                    WHERE user_id = $1
-                    AND artist = $2
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            artist["name"] if isinstance(artist, dict) else artist,
-                            int(artist["playcount"])
-                            if not isinstance(artist, str)
-                            else 0,
-                        )
-                        for artist in items
-                    ],
-                )
-
-            elif library == "albums":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.albums
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, album)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            username,
-                            album["artist"]["name"],
-                            album["name"],
-                            int(album["playcount"]) if isinstance(album, dict) else 0,
-                        )
-                        for album in items
-                        if not isinstance(album, str)
-                    ],
-                )
-
-            elif library == "tracks":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.tracks
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, track)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            username,
-                            track["artist"]["name"],
-                            track["name"],
-                            int(track["playcount"]) if track.get("playcount") else 1,
-                        )
-                        for track in items
-                        if not isinstance(track, str)
-                    ],
-                )
+        async def progress(library: str, rows: int):
             embed = message.embeds[0]
             embed.description = (
-                f"Stored `{len(items):,}` {library} from your Last.fm library..."
+                f"Stored `{rows:,}` {library} from your Last.fm library..."
             )
             await message.edit(embed=embed)
 
-        elapsed = perf_counter() - start
         try:
-            log.info(
-                f"Succesfully indexed {ctx.lastfm.username}'s library in {elapsed:.2f}s."
-            )
-        except AttributeError:
-            log.info(f"{dir(ctx)}")
+            report = await self.indexer.update(ctx.author.id, username, full=bool(full), progress=progress)
+        finally:
+            self.tasks.remove(ctx.author.id)
 
-        await sleep(1)
-        self.tasks.remove(ctx.author.id)
         embed = message.embeds[0]
         embed.description = "Your Last.fm library has been refreshed."
+        embed.set_footer(text=f"{report.mode.title()} index took {report.seconds:.2f}s")
+        log.info(f"Indexed {username}'s library ({report.mode}):\n{report.summary()}")
         return await message.edit(embed=embed)
     
     @lastfm.command(name = "favorites", description = "View yours or a member's liked tracks", example = ",lastfm favorites @aiohttp")
@@ -1405,14 +1311,16 @@ class LastFM(Cog):
         await self.cog_check(ctx)
         records = await self.bot.db.fetch(
             """
-            SELECT user_id, username, plays
-            FROM lastfm.artists
-            WHERE user_id = ANY($2::BIGINT[])
-            AND artist = $1
-            ORDER BY plays DESC
+            SELECT a.user_id, a.username, a.plays
+            FROM lastfm.members m
+            JOIN lastfm.artists a ON a.user_id = m.user_id
+            WHERE m.guild_id = $2
+            AND a.artist = $1
+            ORDER BY a.plays DESC
+            LIMIT 100
             """,
             artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.fail(f"Nobody in this server has listened to `{artist}`!")
@@ -1464,6 +1372,7 @@ class LastFM(Cog):
             FROM lastfm.artists
             WHERE artist = $1
             ORDER BY plays DESC
+            LIMIT 100
             """,
             artist,
         )
@@ -1510,6 +1419,7 @@ class LastFM(Cog):
             WHERE album = $1
             AND artist = $2
             ORDER BY plays DESC
+            LIMIT 100
             """,
             album.name,
             album.artist,
@@ -1561,6 +1471,7 @@ class LastFM(Cog):
             WHERE track = $1
             AND artist = $2
             ORDER BY plays DESC
+            LIMIT 100
             """,
             track.name,
             track.artist,
@@ -1596,33 +1507,34 @@ class LastFM(Cog):
 
     @lastfm.command(name="crowns", description="view your crowns")
     async def crowns(self, ctx: Context, *, member: Optional[Member] = commands.Author):
-        config = await self.bot.db.fetchrow(
-            """SELECT * FROM lastfm.config WHERE user_id = $1""", ctx.author.id
-        )
-        plays = await self.bot.db.fetch("""
-            WITH max_plays AS (
-                SELECT user_id
-                FROM lastfm.artists
-                GROUP BY user_id
-                ORDER BY SUM(plays) DESC
-                LIMIT 1
-            )
-            SELECT artist, user_id, plays
-            FROM lastfm.artists
-            WHERE user_id = (SELECT user_id FROM max_plays);
-        """)
-        crowns = [u for u in plays if u.user_id == member.id]
-        for c in crowns:
-            ensure_future(
-                self.bot.db.execute(
-                    """INSERT INTO lastfm.crowns (guild_id, user_id, username, artist, plays) VALUES($1, $2, $3, $4, $5) ON CONFLICT(guild_id, artist) DO UPDATE SET user_id = excluded.user_id, username = excluded.username, plays = excluded.plays)""",
-                    ctx.guild.id,
-                    config.user_id,
-                    config.username,
-                    c.artist,
-                    c.plays,
+        # the artists the member has the most plays on among this server's listeners, saved as they're found
+        crowns = await self.bot.db.fetch(
+            """
+            WITH won AS (
+                SELECT a.user_id, a.username, a.artist, a.plays
+                FROM lastfm.members me
+                JOIN lastfm.artists a ON a.user_id = me.user_id
+                WHERE me.guild_id = $2
+                AND me.user_id = $1
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM lastfm.members m
+                    JOIN lastfm.artists o ON o.user_id = m.user_id AND o.artist = a.artist
+                    WHERE m.guild_id = $2
+                    AND o.user_id != a.user_id
+                    AND o.plays > a.plays
                 )
+            ), saved AS (
+                INSERT INTO lastfm.crowns (guild_id, user_id, username, artist, plays)
+                SELECT $2, user_id, username, artist, plays FROM won
+                ON CONFLICT (guild_id, artist) DO UPDATE
+                SET user_id = EXCLUDED.user_id, username = EXCLUDED.username, plays = EXCLUDED.plays
             )
+            SELECT artist, plays FROM won ORDER BY plays DESC
+            """,
+            member.id,
+            ctx.guild.id,
+        )
         if len(crowns) == 0:
             raise CommandError(
                 f"{'you' if member == ctx.author else member.mention} {'has' if member != ctx.author else 'have'} not obtained any crowns"
@@ -1654,16 +1566,18 @@ class LastFM(Cog):
         await self.cog_check(ctx)
         records = await self.bot.db.fetch(
             """
-            SELECT user_id, username, plays
-            FROM lastfm.albums
-            WHERE user_id = ANY($3::BIGINT[])
-            AND album = $1
-            AND artist = $2
-            ORDER BY plays DESC
+            SELECT a.user_id, a.username, a.plays
+            FROM lastfm.members m
+            JOIN lastfm.albums a ON a.user_id = m.user_id
+            WHERE m.guild_id = $3
+            AND a.album = $1
+            AND a.artist = $2
+            ORDER BY a.plays DESC
+            LIMIT 100
             """,
             album.name,
             album.artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.fail(
@@ -1908,16 +1822,18 @@ class LastFM(Cog):
         await self.cog_check(ctx)
         records = await self.bot.db.fetch(
             """
-            SELECT user_id, username, plays
-            FROM lastfm.tracks
-            WHERE user_id = ANY($3::BIGINT[])
-            AND track = $1
-            AND artist = $2
-            ORDER BY plays DESC
+            SELECT a.user_id, a.username, a.plays
+            FROM lastfm.members m
+            JOIN lastfm.tracks a ON a.user_id = m.user_id
+            WHERE m.guild_id = $3
+            AND a.track = $1
+            AND a.artist = $2
+            ORDER BY a.plays DESC
+            LIMIT 100
             """,
             track.name,
             track.artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.fail(
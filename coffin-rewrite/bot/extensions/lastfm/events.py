@@ -18,10 +18,49 @@ from discord import (
     Thread
 )
 from system.patch.context import Context
+from asyncio import ensure_future
+from loguru import logger
+
+from .classes.members import MemberIndex
 
 class LastFMEvents(Cog):
     def __init__(self, bot: Client):
         self.bot = bot
+        self.members = MemberIndex(bot)
+
+    async def cog_load(self):
+        ensure_future(self.sync_members())
+
+    async def sync_members(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.members.sync()
+        except Exception as e:
+            logger.warning(f"Failed to index Last.fm members: {e}")
+
+    @Cog.listener("on_member_join")
+    async def on_lastfm_member_join(self, member: Member):
+        await self.members.join(member)
+
+    @Cog.listener("on_member_remove")
+    async def on_lastfm_member_remove(self, member: Member):
+        await self.members.leave(member)
+
+    @Cog.listener("on_guild_join")
+    async def on_lastfm_guild_join(self, guild: Guild):
+        await self.members.add_guild(guild)
+
+    @Cog.listener("on_guild_remove")
+    async def on_lastfm_guild_remove(self, guild: Guild):
+        await self.members.remove_guild(guild)
+
+    @Cog.listener("on_lastfm_link")
+    async def on_lastfm_link(self, user_id: int):
+        await self.members.link(user_id)
+
+    @Cog.listener("on_lastfm_unlink")
+    async def on_lastfm_unlink(self, user_id: int):
+        await self.members.unlink(user_id)
 
     async def check_blacklist(self, message: Message):
         if await self.bot.db.fetchrow("""SELECT * FROM lastfm.command_blacklist WHERE guild_id = $1 AND user_id = $2""", message.guild.id, message.author.id):
@@ -137,6 +137,7 @@ class Levels(Cog, name="Levels"):
             await self.bot.db.execute("""UPDATE text_levels SET messages_enabled = $1 WHERE guild_id = $2 AND user_id = $3""", setting, ctx.guild.id, ctx.author.id)
         except Exception:
             await self.bot.db.execute("""INSERT INTO text_levels (guild_id, user_id, messages_enabled, xp) VALUES($1, $2, $3, $4)""", ctx.guild.id, ctx.author.id, setting, 0)
+            self.bot.levels.ranking.update(ctx.guild.id, ctx.author.id, 0)
         return await ctx.success(f"successfully {'**ENABLED**' if setting else '**DISABLED**'} your level up messages")
 
 
@@ -186,6 +187,7 @@ class Levels(Cog, name="Levels"):
         ]
         await ctx.confirm("are you sure you want to reset **all** level data?")
         await asyncio.gather(*tasks)
+        self.bot.levels.ranking.invalidate(ctx.guild.id)
 
 
     @levels.command(name = "sync", description = "sync your level roles for your members")
@@ -214,6 +216,7 @@ class Levels(Cog, name="Levels"):
     @has_permissions(manage_guild = True)
     async def setxp(self, ctx: Context, member: Member, xp: int):
         await self.bot.db.execute("""INSERT INTO text_levels (guild_id, user_id, xp) VALUES($1, $2, $3) ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = excluded.xp""", ctx.guild.id, member.id, xp)
+        self.bot.levels.ranking.update(ctx.guild.id, member.id, xp)
         return await ctx.success(f"successfully set {member.mention}'s **XP** to `{xp}`")
     
     @command(name = "removexp", description = "Remove experience from a user", example = ",removexp @aiohttp 13")
@@ -221,7 +224,9 @@ class Levels(Cog, name="Levels"):
     async def removexp(self, ctx: Context, member: Member, xp: int):
         old_xp = await self.bot.db.fetchval("""SELECT xp FROM text_levels WHERE guild_id = $1 AND user_id = $2""", ctx.guild.id, member.id) or xp
         new_xp = old_xp - xp
-        await self.bot.db.execute("""UPDATE text_levels SET xp = $1 WHERE guild_id = $2 AND user_id = $3""", new_xp, ctx.guild.id, member.id)
+        # None when the member has no row, so nobody new shows up in the ranking
+        updated = await self.bot.db.fetchval("""UPDATE text_levels SET xp = $1 WHERE guild_id = $2 AND user_id = $3 RETURNING xp""", new_xp, ctx.guild.id, member.id)
+        self.bot.levels.ranking.update(ctx.guild.id, member.id, updated)
         return await ctx.success(f"{member.mention}'s XP is now `{new_xp}`")
     
     @command(name = "setlevel", description = "Set a user's level", example = ",setlevel @aiohttp 3")
@@ -230,13 +235,15 @@ class Levels(Cog, name="Levels"):
         settings = await self.bot.levels.get_settings(ctx.guild)
         needed_xp = self.bot.levels.get_xp(level, settings)
         await self.bot.db.execute("""INSERT INTO text_levels (guild_id, user_id, xp) VALUES($1, $2, $3) ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = excluded.xp""", ctx.guild.id, member.id, needed_xp)
+        self.bot.levels.ranking.update(ctx.guild.id, member.id, needed_xp)
         return await ctx.success(f"successfully set {member.mention}'s level to {level}")
 
     @levels.command(name = "leaderboard", aliases = ["lb"], description = "View the highest ranking members")
     async def levels_leaderboard(self, ctx: Context):
         settings = await self.bot.levels.get_settings(ctx.guild)
-        users = await self.bot.levels.get_rank(ctx.guild, ctx.author)
-        rows_ = [f"**{ctx.guild.get_member(k).name}** is **Level {self.bot.levels.get_level(v[0], settings)}** (`{int(v[0])} XP`)" for k, v in users.items() if ctx.guild.get_member(k) and int(v[0]) > 0]
+        users = {k: v for k, v in (await self.bot.levels.get_rank(ctx.guild, ctx.author)).items() if ctx.guild.get_member(k) and int(v[0]) > 0}
+        levels = self.bot.levels.get_levels([v[0] for v in users.values()], settings)
+        rows_ = [f"**{ctx.guild.get_member(k).name}** is **Level {level}** (`{int(v[0])} XP`)" for (k, v), level in zip(users.items(), levels)]
         rows = [f"`{i}` {r}" for i, r in enumerate(rows_, start = 1)]
         if not rows:
             raise CommandError("There are no level entries for this server")
@@ -303,6 +310,7 @@ class Levels(Cog, name="Levels"):
             if not ctx.guild.get_member(user.user_id):
                 tasks.append(self.bot.db.execute("""DELETE FROM text_levels WHERE user_id = $1 AND guild_id = $2""", user.user_id, ctx.guild.id))
         await asyncio.gather(*tasks)
+        self.bot.levels.ranking.invalidate(ctx.guild.id)
         return await ctx.success(f"successfully cleaned up **{len(tasks)}** non guild member level entries")
     
     @levels.command(name = "list", description = "View all ignored channels and roles")
@@ -73,6 +73,7 @@ class Logs(Cog):
                 ctx.guild.id,
                 "members",
             )
+            self.bot.logs.set_channel(ctx.guild.id, "members", None)
 
             if r == "DELETE 0":
                 raise CommandError("Member logs weren't enabled")
@@ -89,6 +90,7 @@ class Logs(Cog):
             "members",
             channel.id,
         )
+        self.bot.logs.set_channel(ctx.guild.id, "members", channel.id)
 
         return await ctx.success(f"Sending member related logs to {channel.mention}")
 
@@ -111,6 +113,7 @@ class Logs(Cog):
                 ctx.guild.id,
                 "channels",
             )
+            self.bot.logs.set_channel(ctx.guild.id, "channels", None)
 
             if r == "DELETE 0":
                 raise CommandError("Channel logs weren't enabled")
@@ -127,6 +130,7 @@ class Logs(Cog):
             "channels",
             channel.id,
         )
+        self.bot.logs.set_channel(ctx.guild.id, "channels", channel.id)
 
         return await ctx.success(f"Sending channel related logs to {channel.mention}")
 
@@ -149,6 +153,7 @@ class Logs(Cog):
                 ctx.guild.id,
                 "roles",
             )
+            self.bot.logs.set_channel(ctx.guild.id, "roles", None)
 
             if r == "DELETE 0":
                 raise CommandError("Role logs weren't enabled")
@@ -165,6 +170,7 @@ class Logs(Cog):
             "roles",
             channel.id,
         )
+        self.bot.logs.set_channel(ctx.guild.id, "roles", channel.id)
 
         return await ctx.success(f"Sending role related logs to {channel.mention}")
 
@@ -187,6 +193,7 @@ class Logs(Cog):
                 ctx.guild.id,
                 "automod",
             )
+            self.bot.logs.set_channel(ctx.guild.id, "automod", None)
 
             if r == "DELETE 0":
                 raise CommandError("Automod logs weren't enabled")
@@ -203,6 +210,7 @@ class Logs(Cog):
             "automod",
             channel.id,
         )
+        self.bot.logs.set_channel(ctx.guild.id, "automod", channel.id)
 
         return await ctx.success(f"Sending automod related logs to {channel.mention}")
 
@@ -225,6 +233,7 @@ class Logs(Cog):
                 ctx.guild.id,
                 "messages",
             )
+            self.bot.logs.set_channel(ctx.guild.id, "messages", None)
 
             if r == "DELETE 0":
                 raise CommandError("Message logs weren't enabled")
@@ -241,6 +250,7 @@ class Logs(Cog):
             "messages",
             channel.id,
         )
+        self.bot.logs.set_channel(ctx.guild.id, "messages", channel.id)
 
         return await ctx.success(f"Sending message related logs to {channel.mention}")
 
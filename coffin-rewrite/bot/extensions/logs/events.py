@@ -44,15 +44,7 @@ class LogsEvents(Cog):
     @Cog.listener("on_audit_log_entry_create")
     async def automod_events(self, entry: AuditLogEntry):
         if entry.action.name in ["automod_rule_create", "automod_rule_delete"]:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "automod",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "automod"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -66,17 +58,9 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"Rule id: {entry.target.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
         elif entry.action.name == "automod_rule_update":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "automod",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "automod"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -102,9 +86,7 @@ class LogsEvents(Cog):
                                 value=entry.changes.after.name,
                                 inline=False,
                             )
-                            return await channel.send(
-                                silent=True, embed=embed, view=LogsView()
-                            )
+                            return self.bot.logs.send(channel, embed, view=LogsView())
                     elif getattr(entry.changes.before, "enabled", None):
                         if entry.changes.before.enabled != entry.changes.after.enabled:
                             embed.title = (
@@ -112,22 +94,12 @@ class LogsEvents(Cog):
                                 if entry.changes.before.enabled
                                 else "Automod Rule enabled"
                             )
-                            return await channel.send(
-                                silent=True, embed=embed, view=LogsView()
-                            )
+                            return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener("on_audit_log_entry_create")
     async def role_events(self, entry: AuditLogEntry):
         if entry.action.name in ["role_create", "role_delete"]:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "roles",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "roles"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -141,17 +113,9 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"Role id: {entry.target.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
         elif entry.action.name == "role_update":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "roles",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "roles"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(color=self.bot.color, timestamp=entry.created_at)
@@ -192,15 +156,7 @@ class LogsEvents(Cog):
     @Cog.listener("on_audit_log_entry_create")
     async def thread_events(self, entry: AuditLogEntry):
         if entry.action.name in ["thread_create", "thread_delete"]:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "channels",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "channels"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -214,17 +170,9 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"Thread id: {entry.target.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
             elif entry.action.name == "thread_update":
-                if channel_id := await self.bot.db.fetchval(
-                    """
-                    SELECT channel_id FROM logs
-                    WHERE guild_id = $1 
-                    AND log_type = $2
-                    """,
-                    entry.guild.id,
-                    "channels",
-                ):
+                if channel_id := self.bot.logs.channel_id(entry.guild.id, "channels"):
                     if channel := entry.guild.get_channel(channel_id):
                         embed = (
                             Embed(
@@ -250,9 +198,7 @@ class LogsEvents(Cog):
                                     inline=False,
                                 )
 
-                                return await channel.send(
-                                    silent=True, embed=embed, view=LogsView()
-                                )
+                                return self.bot.logs.send(channel, embed, view=LogsView())
                         elif hasattr(entry.changes.before, "locked"):
                             if (
                                 entry.changes.before.locked
@@ -269,22 +215,12 @@ class LogsEvents(Cog):
                                     inline=False,
                                 )
 
-                                return await channel.send(
-                                    silent=True, embed=embed, view=LogsView()
-                                )
+                                return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener("on_audit_log_entry_create")
     async def channel_events(self, entry: AuditLogEntry):
         if entry.action.name in ["channel_create", "channel_delete"]:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "channels",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "channels"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -298,17 +234,9 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"Channel id: {entry.target.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
         elif entry.action.name == "channel_update":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "channels",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "channels"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(color=self.bot.color, timestamp=entry.created_at)
@@ -331,22 +259,12 @@ class LogsEvents(Cog):
                                 inline=False,
                             )
 
-                            return await channel.send(
-                                silent=True, embed=embed, view=LogsView()
-                            )
+                            return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener("on_audit_log_entry_create")
     async def member_events(self, entry: AuditLogEntry):
         if entry.action.name == "member_update":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "members",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "members"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -374,9 +292,7 @@ class LogsEvents(Cog):
                                 ),
                             )
 
-                        return await channel.send(
-                            silent=True, embed=embed, view=LogsView()
-                        )
+                        return self.bot.logs.send(channel, embed, view=LogsView())
 
                     elif getattr(entry.changes.before, "nick", None) != getattr(
                         entry.changes.after, "nick", None
@@ -407,20 +323,10 @@ class LogsEvents(Cog):
                                 inline=False,
                             )
 
-                        return await channel.send(
-                            silent=True, embed=embed, view=LogsView()
-                        )
+                        return self.bot.logs.send(channel, embed, view=LogsView())
 
         elif entry.action.name == "member_role_update":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "members",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "members"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -476,20 +382,12 @@ class LogsEvents(Cog):
                             inline=False,
                         )
 
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener("on_audit_log_entry_create")
     async def ban_kick(self, entry: AuditLogEntry):
         if entry.action.name in ["ban", "kick", "unban"]:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "members",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "members"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -519,17 +417,9 @@ class LogsEvents(Cog):
                         .set_footer(text=f"User id: {entry.target.id}")
                     )
 
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
         elif entry.action.name == "bot_add":
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                entry.guild.id,
-                "members",
-            ):
+            if channel_id := self.bot.logs.channel_id(entry.guild.id, "members"):
                 if channel := entry.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -542,19 +432,11 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"Bot id: {entry.target.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener()
     async def on_member_remove(self, member: Member):
-        if channel_id := await self.bot.db.fetchval(
-            """
-            SELECT channel_id FROM logs
-            WHERE guild_id = $1 
-            AND log_type = $2
-            """,
-            member.guild.id,
-            "members",
-        ):
+        if channel_id := self.bot.logs.channel_id(member.guild.id, "members"):
             if channel := member.guild.get_channel(channel_id):
                 embed = (
                     Embed(
@@ -577,19 +459,11 @@ class LogsEvents(Cog):
                     )
                 )
 
-                return await channel.send(silent=True, embed=embed, view=LogsView())
+                return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener()
     async def on_member_join(self, member: Member):
-        if channel_id := await self.bot.db.fetchval(
-            """
-            SELECT channel_id FROM logs
-            WHERE guild_id = $1 
-            AND log_type = $2
-            """,
-            member.guild.id,
-            "members",
-        ):
+        if channel_id := self.bot.logs.channel_id(member.guild.id, "members"):
             if channel := member.guild.get_channel(channel_id):
                 embed = (
                     Embed(
@@ -606,22 +480,14 @@ class LogsEvents(Cog):
                     )
                 )
 
-                return await channel.send(silent=True, embed=embed, view=LogsView())
+                return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener()
     async def on_message_edit(self, before: Message, after: Message):
         if after.guild:
             if before != after:
                 if before.content != "" and after.content != "":
-                    if channel_id := await self.bot.db.fetchval(
-                        """
-                        SELECT channel_id FROM logs
-                        WHERE guild_id = $1 
-                        AND log_type = $2
-                        """,
-                        after.guild.id,
-                        "messages",
-                    ):
+                    if channel_id := self.bot.logs.channel_id(after.guild.id, "messages"):
                         if channel := after.guild.get_channel(channel_id):
                             embed = (
                                 Embed(
@@ -642,22 +508,12 @@ class LogsEvents(Cog):
                                 )
                             )
 
-                            return await channel.send(
-                                silent=True, embed=embed, view=LogsView()
-                            )
+                            return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener()
     async def on_message_delete(self, message: Message):
         if message.guild:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                message.guild.id,
-                "messages",
-            ):
+            if channel_id := self.bot.logs.channel_id(message.guild.id, "messages"):
                 if channel := message.guild.get_channel(channel_id):
                     embed = (
                         Embed(
@@ -676,21 +532,13 @@ class LogsEvents(Cog):
                         )
                         .set_footer(text=f"User id: {message.author.id}")
                     )
-                    return await channel.send(silent=True, embed=embed, view=LogsView())
+                    return self.bot.logs.send(channel, embed, view=LogsView())
 
     @Cog.listener()
     async def on_bulk_message_delete(self, messages: List[Message]):
         message = messages[0]
         if message.guild:
-            if channel_id := await self.bot.db.fetchval(
-                """
-                SELECT channel_id FROM logs
-                WHERE guild_id = $1 
-                AND log_type = $2
-                """,
-                message.guild.id,
-                "messages",
-            ):
+            if channel_id := self.bot.logs.channel_id(message.guild.id, "messages"):
                 if channel := message.guild.get_channel(channel_id):
                     embed = Embed(
                         color=self.bot.color,
@@ -706,9 +554,9 @@ class LogsEvents(Cog):
                             "utf-8",
                         )
                     )
-                    return await channel.send(
-                        silent=True,
-                        embed=embed,
+                    return self.bot.logs.send(
+                        channel,
+                        embed,
                         file=File(buffer, filename=f"{message.channel}.txt"),
                     )
 
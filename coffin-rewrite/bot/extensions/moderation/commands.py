@@ -39,14 +39,15 @@ from discord import (
 )
 from system.classes.builtins import human_join
 from loguru import logger
-from asyncio import Lock, ensure_future, Event
+from asyncio import Lock, ensure_future
 from discord.utils import utcnow
 from collections import defaultdict
 from system.patch.context import Context
-from typing import Optional, Callable, List, Annotated, Union, Literal, Any, Dict
+from typing import Optional, Callable, List, Annotated, Union, Literal, Any
 from datetime import datetime, timedelta
 from system.managers.flags import ModerationFlags
 from .views import Confirm
+from system.services.bot.bulk import BulkJob
 
 import humanize
 import asyncio
@@ -65,7 +66,6 @@ class Moderation(Cog):
         self.bot = bot
         self.lock: Lock = Lock()
         self.locks = defaultdict(Lock)
-        self.events: Dict[str, Event] = {}
         self.action_map = {
             "ban": "banned",
             "kick": "kicked",
@@ -1110,130 +1110,87 @@ class Moderation(Cog):
     async def role_all(self, ctx: Context):
         return await ctx.send_help()
     
+    async def role_all_start(self, ctx: Context, action: str, role: Role, members: List[Member], kind: str) -> Message:
+        job = BulkJob(
+            guild_id=ctx.guild.id,
+            action=action,
+            author_id=ctx.author.id,
+            channel_id=ctx.channel.id,
+            members=[m.id for m in members],
+            target_id=role.id,
+            reason=f"{ctx.command.qualified_name} by {ctx.author}",
+        )
+        # claimed before anything is awaited, so a second command can't slip in
+        if not self.bot.bulk.claim(job):
+            raise MaxConcurrencyReached(1, BucketType.guild)
+
+        verb = "Giving" if action == "role_add" else "Removing"
+        try:
+            message = await ctx.normal(f"{verb} {role.mention} {'to' if action == 'role_add' else 'from'} `{len(members):,}` {kind}")
+            job.message_id = message.id
+            await self.bot.bulk.start(job)
+        except BaseException:
+            self.bot.bulk.release(job)
+            raise
+        return message
+
     @role_all.command(name = "humans", aliases = ["users"], description = "gives a role to all non bots", example = ",role all humans members")
     @has_permissions(manage_roles=True)
     async def role_all_humans(self, ctx: Context, *, role: Annotated[Role, SafeRoleConverter]):
         """
         Add a role to all members
         """
-        lock = self.locks[f"role_all:{ctx.guild.id}"]
-        cancelled = False
-        if not (event := self.events.get(str(ctx.guild.id))):
-            self.events[str(ctx.guild.id)] = Event()
-        event = self.events[str(ctx.guild.id)]
-        if lock.locked():
-            raise MaxConcurrencyReached(1, BucketType.guild)
-        async with lock:
-            users = [
-                m
-                for m in ctx.guild.members
-                if m.is_bannable and not m.bot and role not in m.roles
-            ]
-
-            if not users:
-                raise CommandError("All members have this role")
-
-            message = await ctx.normal(f"Giving {role.mention} to `{len(users)}` users")
-            # Define a batch size and delay
-            batch_size = 3
-            delay = 1  # seconds
-            total = len(users)
-            # Process users in batches
-            for i in range(0, len(users), batch_size):
-                batch = users[i:i + batch_size]
-                tasks = []
-                if event.is_set():
-                    cancelled = True
-                    break
-                for m in batch:
-                    tasks.append(m.add_roles(role))
-
-                # Wait for all tasks in the current batch to complete
-                await asyncio.gather(*tasks)
-                total -= len(batch)
-                embed = message.embeds[0]
-                embed.description = f"Giving {role.mention} to `{min(i + batch_size, len(users))}/{total + min(i + batch_size, len(users))}` users..."
-                # Optionally update the message with progress
-                await message.edit(embed = embed)
-                # Wait before processing the next batch
-                await asyncio.sleep(delay)
-        if cancelled:
-            self.events.pop(str(ctx.guild.id), None)
-            return
-        reskin = await ctx.get_reskin()
-        return await message.edit(
-            embed=Embed(
-                color=reskin.color if reskin else self.bot.color,
-                description=f"> {ctx.author.mention}: Finished this task in **{humanize.precisedelta(utcnow() - message.created_at, format='%0.0f')}**",
-            )
-        )
+        users = [
+            m
+            for m in ctx.guild.members
+            if m.is_bannable and not m.bot and role not in m.roles
+        ]
+        if not users:
+            raise CommandError("All members have this role")
+
+        return await self.role_all_start(ctx, "role_add", role, users, "users")
     
     @role_all.command(name = "bots", aliases = ["bot", "robot", "robots"], description = "gives a role to all bots", example = ",role all bots members")
     @has_permissions(manage_roles=True)
     async def role_all_bots(self, ctx: Context, *, role: Annotated[Role, SafeRoleConverter]):
         """
-        Add a role to all members
+        Add a role to all bots
         """
-        lock = self.locks[f"role_all:{ctx.guild.id}"]
-        if not (event := self.events.get(str(ctx.guild.id))):
-            self.events[str(ctx.guild.id)] = Event()
-        event = self.events[str(ctx.guild.id)]
-        cancelled = False
-        if lock.locked():
-            raise MaxConcurrencyReached(1, BucketType.guild)
-        async with lock:
-            users = [
-                m
-                for m in ctx.guild.members
-                if m.is_bannable and m.bot and role not in m.roles
-            ]
-
-            if not users:
-                raise CommandError("All bots have this role")
-
-            message = await ctx.normal(f"Giving {role.mention} to `{len(users)}` bots")
-            # Define a batch size and delay
-            batch_size = 3
-            delay = 1  # seconds
-            total = len(users)
-            # Process users in batches
-            for i in range(0, len(users), batch_size):
-                batch = users[i:i + batch_size]
-                tasks = []
-                if event.is_set():
-                    cancelled = True
-                    break
-                for m in batch:
-                    tasks.append(m.add_roles(role))
-
-                # Wait for all tasks in the current batch to complete
-                await asyncio.gather(*tasks)
-                total -= len(batch)
-                embed = message.embeds[0]
-                embed.description = f"Giving {role.mention} to `{min(i + batch_size, len(users))}/{total + min(i + batch_size, len(users))}` bots..."
-                # Optionally update the message with progress
-                await message.edit(embed = embed)
-
-                # Wait before processing the next batch
-                await asyncio.sleep(delay)
-
-            reskin = await ctx.get_reskin()
-        if cancelled:
-            self.event.pop(str(ctx.guild.id), None)
-            return
-        return await message.edit(
-            embed=Embed(
-                color=reskin.color if reskin else self.bot.color,
-                description=f"> {ctx.author.mention}: Finished this task in **{humanize.precisedelta(utcnow() - message.created_at, format='%0.0f')}**",
-            )
-        )
-    
+        users = [
+            m
+            for m in ctx.guild.members
+            if m.is_bannable and m.bot and role not in m.roles
+        ]
+        if not users:
+            raise CommandError("All bots have this role")
+
+        return await self.role_all_start(ctx, "role_add", role, users, "bots")
+
+    @role_all.command(name = "remove", aliases = ["take"], description = "removes a role from everyone who has it", example = ",role all remove members")
+    @has_permissions(manage_roles=True)
+    async def role_all_remove(self, ctx: Context, *, role: Annotated[Role, SafeRoleConverter]):
+        """
+        Remove a role from all members
+        """
+        users = [m for m in role.members if m.is_bannable]
+        if not users:
+            raise CommandError("Nobody has this role")
+
+        return await self.role_all_start(ctx, "role_remove", role, users, "members")
+
+    @role_all.command(name = "status", aliases = ["progress"], description = "view the progress of a role all task")
+    @has_permissions(manage_roles = True)
+    async def role_all_status(self, ctx: Context):
+        if not (job := self.bot.bulk.status(ctx.guild.id)):
+            raise CommandError("there is no current `role all` task running")
+        failed = f", `{job.failed:,}` failed" if job.failed else ""
+        return await ctx.normal(f"{self.bot.bulk.describe(job)}{failed}")
+
     @role_all.command(name = "cancel", description = "cancel a role all task")
     @has_permissions(manage_roles = True)
     async def role_all_cancel(self, ctx: Context):
-        if not (event := self.events.get(str(ctx.guild.id))):
+        if not await self.bot.bulk.cancel(ctx.guild.id):
             raise CommandError("there is no current `role all` task running")
-        event.set()
         return await ctx.normal("cancelled the `role all` task")
 
     @role.command(name="create", aliases=["make"])
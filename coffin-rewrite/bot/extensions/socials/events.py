@@ -28,11 +28,12 @@ from data.variables import INSTAGRAM_POST
 from system.patch.context import Context
 from asyncio import ensure_future
 from .util import post_to_message
-from typing import List
+from typing import List, Optional
 from unidecode_rs import decode as unidecode_rs
 from DataProcessing.services.TT.models.post import TikTokPostResponse # type: ignore
 from loguru import logger
-from .feeds import FEEDS, Feed
+from .feeds import FEEDS, Feed, FeedScheduler
+from .feeds.media import fanout
 
 import re
 
@@ -75,14 +76,18 @@ class SocialEvents(Cog):
             )
         ]
         self.feeds: List[Feed] = []
+        self.scheduler: Optional[FeedScheduler] = None
 
     async def cog_load(self):
         for feed in FEEDS:
             self.feeds.append(feed(self.bot))
+        self.scheduler = FeedScheduler(self.bot, self.feeds)
+        self.scheduler.start()
 
     async def cog_unload(self):
-        for feed in self.feeds:
-            await feed.stop()
+        if self.scheduler:
+            await self.scheduler.stop()
+        await fanout.close()
 
 
     @Cog.listener("on_media_repost")
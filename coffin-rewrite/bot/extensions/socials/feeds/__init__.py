@@ -5,6 +5,7 @@ from .youtube import YouTube
 from .instagram import Instagram
 from .twitch import Twitch
 from .kick import Kick
+from .scheduler import FeedScheduler, FeedMetrics
 
 FEEDS = [
     TikTok, 
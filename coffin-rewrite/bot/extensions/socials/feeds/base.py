@@ -1,8 +1,10 @@
 import asyncio
-from typing import List, Optional, TypedDict, Any, Union
+from time import time
+from datetime import datetime, timezone
+from typing import Deque, List, TypedDict, Any, Union
 from discord import TextChannel, Thread
 from xxhash import xxh32_hexdigest
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing_extensions import Self
 from system.managers.logger import make_dask_sink, configure_logger
 
@@ -14,13 +16,24 @@ class BaseRecord(TypedDict):
 class Feed:
     """
     Base class for all Social Feeds.
+
+    Feeds don't run their own loop, the FeedScheduler polls each account
+    through ``poll`` and learns how often it should do so between
+    ``min_interval`` and ``max_interval``.
     """
 
     bot: Any
     name: str
+    table: str = ""
     posted: int = 0
-    scheduled_deletion: List[int] = []
-    task: Optional[asyncio.Task] = None
+    # the interval every account starts at, and how far the scheduler may move it
+    interval: float = 60 * 9
+    min_interval: float = 60 * 3
+    max_interval: float = 60 * 60
+    # how many accounts of this feed may be fetched at once
+    concurrency: int = 4
+    # how much the interval grows after a poll that found nothing
+    backoff: float = 1.5
 
     def __init__(
         self,
@@ -31,11 +44,13 @@ class Feed:
         self.bot = bot
         self.name = name
         self.locks = defaultdict(asyncio.Lock)
-        self.task = asyncio.create_task(self.start())
+        self.scheduled_deletion: List[int] = []
+        # seconds between a post going up and it being delivered
+        self.lags: Deque[float] = deque(maxlen=512)
+        self.log = self.logger
 
     def __repr__(self: Self) -> str:
-        state = "running" if self.task and not self.task.done() else "finished"
-        return f"<{self.name}Feed state={state} posted={self.posted} task={self.task}>"
+        return f"<{self.name}Feed posted={self.posted} delivered={len(self.lags)}>"
 
     def __str__(self: Self) -> str:
         return self.name
@@ -52,24 +67,70 @@ class Feed:
     def key(self: Self) -> str:
         return xxh32_hexdigest(f"feed:{self.name}")
 
+    @property
+    def dedup(self: Self):
+        """
+        The ids this feed already delivered, forgotten after a week.
+        """
+
+        return self.redis.dedup(f"{self.key}:seen")
+
+    async def prepare(self: Self) -> None:
+        """
+        Move ids from the old never-expiring set into the dedup store.
+        """
+
+        if moved := await self.dedup.migrate(self.key):
+            self.log.info(f"Migrated {moved} delivered ids")
+
     def make_key(self: Self, string: str):
         return xxh32_hexdigest(string)
 
-    async def start(self: Self) -> None:
+    async def poll(self: Self, key: Union[str, int], records: List[BaseRecord], since: float) -> List[float]:
         """
-        The feed task.
+        Fetch one account and dispatch anything it posted after ``since``.
+
+        Returns the timestamps of the posts that were dispatched,
+        which is what the scheduler learns the account's rhythm from.
         """
 
         raise NotImplementedError
 
-    async def stop(self: Self) -> None:
+    async def cleanup(self: Self) -> None:
         """
-        Stop the feed task.
+        Remove subscriptions whose channel is gone or can't be posted in.
         """
 
-        if self.task:
-            self.task.cancel("Feed stopped.")
-            self.task = None
+        if not self.scheduled_deletion or not self.table:
+            return
+
+        scheduled, self.scheduled_deletion = self.scheduled_deletion, []
+        await self.bot.db.execute(
+            f"""
+            DELETE FROM feeds.{self.table}
+            WHERE channel_id = ANY($1::BIGINT[])
+            """,
+            scheduled,
+        )
+
+    def delivered(self: Self, posted_at: Union[datetime, str, int, float, None]) -> None:
+        """
+        Record how long a post took to reach its channels.
+        """
+
+        if isinstance(posted_at, str):
+            try:
+                posted_at = datetime.fromisoformat(posted_at.replace("Z", "+00:00"))
+            except ValueError:
+                return
+
+        if isinstance(posted_at, datetime):
+            if posted_at.tzinfo is None:
+                posted_at = posted_at.replace(tzinfo=timezone.utc)
+            posted_at = posted_at.timestamp()
+
+        if posted_at:
+            self.lags.append(max(time() - posted_at, 0.0))
 
     async def get_records(self: Self) -> dict[Union[str, int], List[BaseRecord]]:
         """
@@ -82,6 +143,23 @@ class Feed:
 
         raise NotImplementedError
 
+    def destinations(self: Self, records: List[BaseRecord]) -> List[Union[TextChannel, Thread]]:
+        """
+        The channels of ``records`` that can currently receive a post.
+        """
+
+        channels = []
+        for record in records:
+            if not (guild := self.bot.get_guild(record["guild_id"])):
+                continue
+            if not (channel := guild.get_channel_or_thread(record["channel_id"])):
+                continue
+            if not self.can_post(channel):
+                continue
+            channels.append(channel)
+
+        return channels
+
     def can_post(self: Self, channel: Union[TextChannel, Thread]) -> bool:
         """
         Check if the channel can receive the feed.
@@ -1,13 +1,10 @@
 from .base import Feed, BaseRecord
-from random import uniform
 from typing import Optional, Union, Dict, List, Any, cast
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from DataProcessing.models.Instagram.instagram import UserPostItem, EdgeFelixVideoTimelineClass as Timeline, InstagramProfileModelResponse # type: ignore
-from ..util import download_data
-from aiohttp import ClientSession
-from discord import File, Embed, Color, Client
-from io import BytesIO
+from discord import Embed, Color, Client
+from .media import fanout
 from unidecode_rs import decode as unidecode_rs
 from loguru import logger
 #
@@ -18,33 +15,39 @@ class Record(BaseRecord):
     username: str
 
 class Instagram(Feed):
+    table = "instagram"
+    interval = 60 * 60
+    min_interval = 60 * 10
+    max_interval = 60 * 60 * 3
+    concurrency = 2
+
     def __init__(self, bot: Client):
         super().__init__(
             bot,
             name="Instagram",
         )
-        self.log = None
 
-        async def get_records(self) -> Dict[int, List[Record]]:
-            records = cast(
-                List[Record],
-                await self.bot.db.fetch(
-                    """
-                    SELECT *
-                    FROM feeds.instagram
-                    """,
-                ),
-            )
+    async def get_records(self) -> Dict[int, List[Record]]:
+        records = cast(
+            List[Record],
+            await self.bot.db.fetch(
+                """
+                SELECT *
+                FROM feeds.instagram
+                """,
+            ),
+        )
 
-            result: Dict[int, List[Record]] = defaultdict(list)
-            for record in records:
-                result[record["username"]].append(record)
+        result: Dict[int, List[Record]] = defaultdict(list)
+        for record in records:
+            result[record["username"]].append(record)
 
-            return result
+        return result
     
-    async def get_posts(self, username: str, records: List[Record]):
+    async def poll(self, username: str, records: List[Record], since: float) -> List[float]:
         shifted = datetime.now(tz=timezone.utc) - timedelta(minutes = 62)
-        shifted_ts  = shifted.timestamp()
+        shifted_ts  = min(shifted.timestamp(), since)
+        dispatched = []
         for i in range(10):
             try:
                 user = await self.bot.services.instagram.get_user(username, cached = False)
@@ -56,69 +59,35 @@ class Instagram(Feed):
                 else:
                     await asyncio.sleep(10)
 
-        for post in posts:
-            if post.taken_at_timestamp >= int(shifted_ts):
-                if await self.redis.sismember(self.key, str(post.id)):
-                    logger.info(f"{post.id} has already been posted, skipping it...")
-                    continue
-                self.bot.loop.create_task(self.dispatch(post, records))
-                self.posted += 1
+        recent = [post for post in posts if post.taken_at_timestamp >= int(shifted_ts)]
+        seen = await self.dedup.seen_many(post.id for post in recent)
+        for post, already in zip(recent, seen):
+            if already:
+                logger.info(f"{post.id} has already been posted, skipping it...")
+                continue
+            self.bot.loop.create_task(self.dispatch(user, post, records))
+            dispatched.append(post.taken_at_timestamp)
+            self.posted += 1
 
-        self.log.info(f"Successfully dispatched {self.posted} tiktok posts")
+        self.log.info(f"Successfully dispatched {len(dispatched)} instagram posts for {username}")
+        return dispatched
 
     
     async def dispatch(self, user: InstagramProfileModelResponse, post: UserPostItem, records: List[Record]):
-        
-        async def send(embeds: List[Embed], record: Record, *, file: bytes = None):
-            if not (guild := self.bot.get_guild(record.guild_id)):
-                return
-            if not (channel := guild.get_channel(record.channel_id)):
-                return
-            if not self.can_post(channel):
-                return
-            kwargs = {}
-            if file:
-                kwargs["file"] = File(fp = BytesIO(file), filename = "tiktok.mp4")
-            return await channel.send(embeds = embeds, **kwargs)
-        
-        args = {}
+        channels = self.destinations(records)
+        if not channels:
+            return await self.dedup.mark(post.id)
+
         embed = Embed(title = "New Post", description = unidecode_rs(post.title or "No Description Provided"), color = Color.from_str("#DD829B"))
         footer_text = f"""❤️ {post.like_count.humanize()} 👀 {post.view_count.humanize()} 💬 {post.comment_count.humanize()} ∙ Instagram"""
         embed.set_footer(text = footer_text, icon_url = "https://www.instagram.com/static/images/ico/favicon-192.png/68d99ba29cc8.png")
         embed.set_author(name = f"{user.full_name} (@{user.username})", icon_url = user.avatar_url)
         embed.url = post.url
         if post.video_url:
-            args["file"] = await download_data(post.video_url)
+            async with fanout.download(post.video_url, "instagram.mp4") as media:
+                await fanout.fanout(channels, [embed], media)
         else:
             embed.set_image(url = post.display_url)
-        for record in records:
-            await send(embed, record, **args)
-        await self.redis.sadd(self.key, str(post.id))
-            
-    async def start(self) -> None:
-        self.log = self.logger
-        self.log.info("Started Feed!")
-        while True:
-            self.posted = 0
-            records = await self.get_records()
-            for username, records in records.items():
-                needed = False
-                for record in records:
-                    if self.bot.get_guild(record.guild_id):
-                        needed = True
-                        break
-                if needed:
-                    self.bot.loop.create_task(self.get_posts(username, records))
-                    await asyncio.sleep(uniform(4, 9))
-
-            if self.scheduled_deletion:
-                await self.bot.db.execute(
-                    """
-                    DELETE FROM feeds.instagram
-                    WHERE channel_id = ANY($1::BIGINT[])
-                    """, 
-                    self.scheduled_deletion
-                )
-                self.scheduled_deletion.clear()
-            await asyncio.sleep(3600)
-
+            await fanout.fanout(channels, [embed])
+        await self.dedup.mark(post.id)
+        self.delivered(post.taken_at_timestamp)
@@ -3,20 +3,21 @@ from .base import Feed, BaseRecord
 from discord import Client, Embed, Color
 from typing import List, Dict, cast, Optional
 from collections import defaultdict
+from time import time
 from system.classes.builtins import shorten
-from random import uniform
-from asyncio import sleep
 
 class Record(BaseRecord):
     username: str
 
 class Kick(Feed):
+    table = "kick"
+    max_interval = 60 * 30
+
     def __init__(self, bot: Client):
         super().__init__(
             bot,
             name="Kick",
         )
-        self.log = None
 
     async def get_records(self) -> Dict[int, List[Record]]:
         records = cast(
@@ -35,13 +36,17 @@ class Kick(Feed):
 
         return result
     
-    async def get_streams(self, username: str, records: List[Record]):
+    async def poll(self, username: str, records: List[Record], since: float) -> List[float]:
         user = await self.bot.services.kick.get_channel(username, cached = False)
         if user.livestream:
-            if await self.redis.sismember(self.key, str(user.livestream.id)):
-                return
+            if await self.dedup.seen(user.livestream.id):
+                return []
             self.bot.loop.create_task(self.dispatch(user.livestream, user.user, user, records))
             self.posted += 1
+            # the stream's start time isn't always set, the poll itself is close enough
+            return [time()]
+
+        return []
 
 
     async def dispatch(self, stream: Livestream, user: User, raw: KickChannel, records: List[Record]):
@@ -65,26 +70,5 @@ class Kick(Feed):
 
         for record in records:
             await send(embed, record)
-        await self.redis.sadd(self.key, str(stream.id))
-
-
-    async def start(self) -> None:
-        self.log = self.logger
-        self.log.info("Started Feed!")
-        while True:
-            records = await self.get_records()
-            for username, records in records.items():
-                self.bot.loop.create_task(self.get_streams(username, records))
-                await sleep(uniform(0.5, 1.5))
-
-            if self.scheduled_deletion:
-                await self.bot.db.execute(
-                    """
-                    DELETE FROM feeds.kick
-                    WHERE channel_id = ANY($1::BIGINT[])
-                    """,
-                    self.scheduled_deletion,
-                )
-                self.scheduled_deletion.clear()
-
-            await sleep(60 * 9)
+        await self.dedup.mark(stream.id)
+        self.delivered(stream.start_time or stream.created_at)
@@ -0,0 +1,185 @@
+import asyncio
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import Any, AsyncGenerator, List, Optional, Sequence, Union
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from discord import Embed, File, HTTPException, Message, TextChannel, Thread
+from loguru import logger
+
+from ..util import borrow_temp_file
+
+Destination = Union[TextChannel, Thread]
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+class Media:
+    """
+    A downloaded asset, small ones stay in memory and anything past the
+    spool size lives in a temporary file for as long as it's borrowed.
+    """
+
+    __slots__ = ("filename", "size", "data", "path")
+
+    def __init__(self, filename: str, size: int, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.filename = filename
+        self.size = size
+        self.data = data
+        self.path = path
+
+    def __repr__(self) -> str:
+        where = "disk" if self.path else "memory"
+        return f"<Media filename={self.filename} size={self.size} in={where}>"
+
+    def to_file(self) -> File:
+        # every send gets its own reader, concurrent uploads can't share a file position
+        if self.path:
+            return File(self.path, filename=self.filename)
+        return File(BytesIO(self.data), filename=self.filename)
+
+
+class MediaFanout:
+    """
+    Downloads a post's media once and sends the post to every subscribed
+    channel, ``concurrency`` sends at a time across all feeds.
+
+    The file is only uploaded once, every other channel gets the first
+    upload's attachment url instead, which Discord embeds the same way.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        limit: int = 100 * 1024 * 1024,
+        spool: int = 8 * 1024 * 1024,
+        timeout: float = 120.0,
+    ):
+        self.limit = limit
+        self.spool = spool
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session: Optional[ClientSession] = None
+        self.downloads = 0
+        self.uploads = 0
+        self.reused = 0
+
+    def get_session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(
+                connector=TCPConnector(limit=16, ttl_dns_cache=300),
+                timeout=ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    @asynccontextmanager
+    async def download(self, url: str, filename: str, **kwargs: Any) -> AsyncGenerator[Optional[Media], None]:
+        """
+        Stream ``url`` into memory, moving to a temporary file once it passes
+        the spool size. Yields None when the download failed or went over the limit.
+        """
+
+        async with borrow_temp_file(extension=f".{filename.rsplit('.', 1)[-1]}") as path:
+            media = None
+            try:
+                media = await self.fetch(url, filename, str(path), **kwargs)
+            except MediaTooLarge:
+                logger.info(f"Skipping media over {self.limit} bytes: {url}")
+            except Exception as e:
+                logger.warning(f"Failed to download {url}: {e}")
+            yield media
+
+    async def fetch(self, url: str, filename: str, path: str, **kwargs: Any) -> Media:
+        self.downloads += 1
+        async with self.get_session().get(url, **kwargs) as response:
+            response.raise_for_status()
+            if (response.content_length or 0) > self.limit:
+                raise MediaTooLarge(url)
+
+            size = 0
+            buffer = bytearray()
+            file = None
+            try:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > self.limit:
+                        raise MediaTooLarge(url)
+
+                    if file is None:
+                        buffer.extend(chunk)
+                        if len(buffer) > self.spool:
+                            file = open(path, "wb")
+                            file.write(buffer)
+                            buffer = bytearray()
+                    else:
+                        file.write(chunk)
+            finally:
+                if file is not None:
+                    file.close()
+
+        if file is not None:
+            return Media(filename, size, path=path)
+        return Media(filename, size, data=bytes(buffer))
+
+    async def send(self, channel: Destination, **kwargs: Any) -> Optional[Message]:
+        async with self.semaphore:
+            try:
+                return await channel.send(**kwargs)
+            except HTTPException as e:
+                logger.debug(f"Failed to send feed post to {channel.id}: {e}")
+                return None
+
+    async def fanout(
+        self,
+        channels: Sequence[Destination],
+        embeds: List[Embed],
+        media: Optional[Media] = None,
+        **kwargs: Any,
+    ) -> List[Message]:
+        """
+        Send ``embeds`` to every channel, uploading ``media`` to the first
+        channel that accepts it and linking that attachment everywhere else.
+        """
+
+        channels = list(channels)
+        messages: List[Message] = []
+        url = None
+
+        if media:
+            for channel in [c for c in channels if media.size <= c.guild.filesize_limit][:3]:
+                message = await self.send(channel, embeds=embeds, file=media.to_file(), **kwargs)
+                if message:
+                    self.uploads += 1
+                    channels.remove(channel)
+                    messages.append(message)
+                    if message.attachments:
+                        url = message.attachments[0].url
+                    break
+
+        if url:
+            self.reused += len(channels)
+            kwargs["content"] = url
+        elif media and channels:
+            # nothing to link to, every channel that can take the file gets its own upload
+            results = await asyncio.gather(
+                *(
+                    self.send(channel, embeds=embeds, file=media.to_file(), **kwargs)
+                    if media.size <= channel.guild.filesize_limit
+                    else self.send(channel, embeds=embeds, **kwargs)
+                    for channel in channels
+                )
+            )
+            return messages + [message for message in results if message]
+
+        results = await asyncio.gather(*(self.send(channel, embeds=embeds, **kwargs) for channel in channels))
+        return messages + [message for message in results if message]
+
+
+fanout = MediaFanout()
@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from itertools import count
+from math import inf
+from random import uniform
+from statistics import median
+from time import monotonic, time
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from .base import BaseRecord, Feed
+
+
+def percentile(samples: Iterable[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class FeedMetrics:
+    feed: str
+    accounts: int
+    polls: int
+    failures: int
+    posted: int
+    interval: float
+    lag_p50: float
+    lag_p95: float
+    lag_max: float
+
+
+class Account:
+    """
+    A polled account, and what has been learned about how often it posts.
+    """
+
+    __slots__ = ("feed", "key", "records", "interval", "due", "last_poll", "posts", "active")
+
+    def __init__(self, feed: Feed, key: Union[str, int], records: List[BaseRecord]):
+        self.feed = feed
+        self.key = key
+        self.records = records
+        self.interval = feed.interval
+        self.due = 0.0
+        self.last_poll: Optional[float] = None
+        self.posts: Deque[float] = deque(maxlen=8)
+        self.active = True
+
+    def __repr__(self) -> str:
+        return f"<Account feed={self.feed.name} key={self.key} interval={self.interval:.0f}>"
+
+    @property
+    def gap(self) -> Optional[float]:
+        """
+        The average time between this account's recent posts.
+        """
+
+        if len(self.posts) < 2:
+            return None
+        ordered = sorted(self.posts)
+        return (ordered[-1] - ordered[0]) / (len(ordered) - 1)
+
+    def adapt(self, posted: Iterable[float]):
+        """
+        Move the interval toward a quarter of the account's posting gap, so a
+        post is usually picked up well within the gap. Accounts that go quiet
+        past their usual rhythm back off toward ``max_interval``.
+        """
+
+        new = [timestamp for timestamp in posted if timestamp]
+        self.posts.extend(new)
+        gap = self.gap
+        quiet = time() - max(self.posts) if self.posts else inf
+
+        if new:
+            target = gap / 4 if gap else self.interval / 2
+        elif gap and quiet < gap * 2:
+            target = gap / 4
+        else:
+            target = self.interval * self.feed.backoff
+
+        self.interval = min(max(target, self.feed.min_interval), self.feed.max_interval)
+
+
+class FeedScheduler:
+    """
+    Polls every feed account from a single queue ordered by when each account
+    is next due, instead of one loop per feed walking its whole table on a
+    fixed timer.
+
+    Each feed has its own concurrency limit so a slow source can't hold up
+    the others, subscriptions are reloaded every ``refresh`` seconds, and the
+    time between a post going up and it being delivered is kept per feed.
+    """
+
+    def __init__(self, bot: Any, feeds: List[Feed], refresh: float = 300.0):
+        self.bot = bot
+        self.feeds = feeds
+        self.refresh = refresh
+        self.accounts: Dict[Tuple[str, Union[str, int]], Account] = {}
+        self.queue: List[Tuple[float, int, Account]] = []
+        self.sequence = count()
+        self.semaphores = {feed.name: asyncio.Semaphore(feed.concurrency) for feed in feeds}
+        self.polls: Dict[str, int] = {feed.name: 0 for feed in feeds}
+        self.failures: Dict[str, int] = {feed.name: 0 for feed in feeds}
+        self.wakeup = asyncio.Event()
+        self.tasks: Set[asyncio.Task] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    def __repr__(self) -> str:
+        state = "running" if self.task and not self.task.done() else "stopped"
+        return f"<FeedScheduler state={state} accounts={len(self.accounts)} queued={len(self.queue)}>"
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel("Feeds stopped.")
+            self.task = None
+
+        for task in list(self.tasks):
+            task.cancel()
+        self.tasks.clear()
+
+    def push(self, account: Account, due: float):
+        account.due = due
+        heapq.heappush(self.queue, (due, next(self.sequence), account))
+        self.wakeup.set()
+
+    async def sync(self):
+        """
+        Reload every feed's subscriptions, new accounts have their first poll
+        spread over the refresh window instead of all firing at once.
+        """
+
+        now = monotonic()
+        for feed in self.feeds:
+            try:
+                grouped = await feed.get_records()
+                await feed.cleanup()
+            except Exception as e:
+                logger.warning(f"Failed to load {feed.name} subscriptions: {e}")
+                continue
+
+            seen = set()
+            for key, records in grouped.items():
+                if not any(self.bot.get_guild(record["guild_id"]) for record in records):
+                    continue
+
+                seen.add((feed.name, key))
+                if account := self.accounts.get((feed.name, key)):
+                    account.records = records
+                else:
+                    account = self.accounts[(feed.name, key)] = Account(feed, key, records)
+                    self.push(account, now + uniform(0, min(feed.interval, self.refresh)))
+
+            for identifier in [i for i in self.accounts if i[0] == feed.name and i not in seen]:
+                self.accounts.pop(identifier).active = False
+
+    async def poll(self, account: Account):
+        feed = account.feed
+        started = time()
+        # the first poll looks back as far as one fixed interval used to
+        since = account.last_poll or started - feed.interval
+        try:
+            async with self.semaphores[feed.name]:
+                posted = await feed.poll(account.key, account.records, since - 120)
+        except Exception as e:
+            self.failures[feed.name] += 1
+            feed.log.warning(f"Failed to poll {account.key}: {e}")
+            account.interval = min(account.interval * feed.backoff, feed.max_interval)
+        else:
+            account.last_poll = started
+            account.adapt(posted or ())
+        finally:
+            self.polls[feed.name] += 1
+            if account.active:
+                self.push(account, monotonic() + account.interval * uniform(0.9, 1.1))
+
+    def spawn(self, account: Account):
+        task = asyncio.create_task(self.poll(account))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        logger.info(f"Started feeds: {', '.join(feed.name for feed in self.feeds)}")
+        for feed in self.feeds:
+            try:
+                await feed.prepare()
+            except Exception as e:
+                logger.warning(f"Failed to prepare {feed.name}: {e}")
+
+        next_sync = 0.0
+        while True:
+            now = monotonic()
+            if now >= next_sync:
+                await self.sync()
+                self.report()
+                next_sync = now + self.refresh
+
+            while self.queue and self.queue[0][0] <= now:
+                _, _, account = heapq.heappop(self.queue)
+                # removed accounts leave their entry behind, it's dropped here
+                if account.active:
+                    self.spawn(account)
+
+            wake = min(next_sync, self.queue[0][0]) if self.queue else next_sync
+            self.wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), max(wake - monotonic(), 0))
+
+    def metrics(self) -> List[FeedMetrics]:
+        result = []
+        for feed in self.feeds:
+            intervals = [a.interval for a in self.accounts.values() if a.feed is feed]
+            result.append(
+                FeedMetrics(
+                    feed=feed.name,
+                    accounts=len(intervals),
+                    polls=self.polls[feed.name],
+                    failures=self.failures[feed.name],
+                    posted=feed.posted,
+                    interval=median(intervals) if intervals else feed.interval,
+                    lag_p50=percentile(feed.lags, 50),
+                    lag_p95=percentile(feed.lags, 95),
+                    lag_max=max(feed.lags, default=0.0),
+                )
+            )
+        return result
+
+    def report(self):
+        for metrics in self.metrics():
+            if not metrics.accounts:
+                continue
+            logger.info(
+                f"{metrics.feed}: {metrics.accounts} accounts every ~{metrics.interval:.0f}s, "
+                f"{metrics.polls} polls ({metrics.failures} failed), {metrics.posted} posted, "
+                f"lag p50 {metrics.lag_p50:.0f}s p95 {metrics.lag_p95:.0f}s max {metrics.lag_max:.0f}s"
+            )
@@ -4,20 +4,23 @@ from discord import Client, Embed, Color
 from typing import List, Dict, cast, Optional
 from collections import defaultdict
 from system.classes.builtins import shorten
-from random import uniform
-from asyncio import sleep
 
 
 class Record(BaseRecord):
     username: str
 
 class Twitch(Feed):
+    table = "twitch"
+    interval = 60 * 5
+    min_interval = 60 * 2
+    max_interval = 60 * 15
+    concurrency = 2
+
     def __init__(self, bot: Client):
         super().__init__(
             bot,
             name="Twitch",
         )
-        self.log = None
 
     async def get_records(self) -> Dict[int, List[Record]]:
         records = cast(
@@ -36,13 +39,18 @@ class Twitch(Feed):
 
         return result
 
-    async def get_streams(self, username: str, records: List[Record]):
+    async def poll(self, username: str, records: List[Record], since: float) -> List[float]:
         streams = await self.bot.services.twitch.get_streams(username = username)
-        for stream in streams.data:
-            if await self.redis.sismember(self.key, str(stream.id)):
+        dispatched = []
+        seen = await self.dedup.seen_many(stream.id for stream in streams.data)
+        for stream, already in zip(streams.data, seen):
+            if already:
                 continue
             self.posted += 1
             self.bot.loop.create_task(self.dispatch(stream, records))
+            dispatched.append(stream.started_at.timestamp())
+
+        return dispatched
 
     
     async def dispatch(self, stream: Stream, records: List[Record]):
@@ -64,25 +72,5 @@ class Twitch(Feed):
         embed.timestamp = stream.started_at
         for record in records:
             await send(embed, record)
-        await self.redis.sadd(self.key, str(stream.id))
-
-    async def start(self) -> None:
-        self.log = self.logger
-        self.log.info("Started Feed!")
-        while True:
-            self.posted = 0
-            records = await self.get_records()
-            for username, records in records.items():
-                needed = False
-                for record in records:
-                    if self.bot.get_guild(record.guild_id):
-                        needed = True
-                        break
-                if needed:
-                    self.bot.loop.create_task(self.get_streams(username, records))
-                    await sleep(uniform(4, 9))
-            if self.scheduled_deletion:
-                await self.bot.db.execute("""DELETE FROM feeds.twitch WHERE channel_id = ANY($1::BIGINT[])""", self.scheduled_deletion)
-            await sleep(300)
-
-    
\ No newline at end of file
+        await self.dedup.mark(stream.id)
+        self.delivered(stream.started_at)
@@ -1,11 +1,9 @@
-import asyncio
 import orjson
 import traceback
 
 from collections import defaultdict
 from contextlib import suppress
-from datetime import timedelta
-from random import uniform
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, cast
 from discord import AllowedMentions, Color, Embed, HTTPException, TextChannel, Thread, Client
 from discord.utils import get, utcnow
@@ -23,6 +21,8 @@ class Twitter(Feed):
     Listener for new tweets.
     """
 
+    table = "twitter"
+
     def __init__(self, bot: Client):
         super().__init__(
             bot,
@@ -42,27 +42,6 @@ class Twitter(Feed):
         }
         return REPLACEMENTS
 
-    async def start(self: Self) -> None:
-        self.log = self.logger
-        self.log.info("Started Feed!")
-        while True:
-            records = await self.get_records()
-            for twitter_id, records in records.items():
-                self.bot.loop.create_task(self.get_tweets(twitter_id, records))
-                await asyncio.sleep(uniform(0.5, 1.5))
-
-            if self.scheduled_deletion:
-                await self.bot.db.execute(
-                    """
-                    DELETE FROM feeds.twitter
-                    WHERE channel_id = ANY($1::BIGINT[])
-                    """,
-                    self.scheduled_deletion,
-                )
-                self.scheduled_deletion.clear()
-
-            await asyncio.sleep(60 * 9)
-
     async def get_records(self: Self) -> Dict[int, List[Record]]:
         records = cast(
             List[Record],
@@ -80,12 +59,12 @@ class Twitter(Feed):
 
         return result
 
-    async def get_tweets(self: Self, user_id: int, records: List[Record]) -> None:
+    async def poll(self: Self, user_id: int, records: List[Record], since: float) -> List[float]:
         async with self.locks[f"get_tweets:{user_id}"]:
             self.log.info(f"getting tweets for user {user_id}")
-            await self.fetch_tweets(user_id, records)
+            return await self.fetch_tweets(user_id, records, since)
 
-    async def fetch_tweets(self: Self, user_id: int, records: List[Record]) -> None:
+    async def fetch_tweets(self: Self, user_id: int, records: List[Record], since: float) -> List[float]:
         """
         Fetch and dispatch new tweets.
         """
@@ -105,24 +84,34 @@ class Twitter(Feed):
                     records[0]["username"],
                     user_id,
                 )
-                return
+                return []
 
+        cutoff = min(utcnow() - timedelta(hours=2), datetime.fromtimestamp(since, timezone.utc))
+        dispatched = []
+        candidates = []
         for tweet in reversed(data.tweets[:6]):
-            if utcnow() - tweet.posted_at > timedelta(hours=2):
+            if tweet.posted_at < cutoff:
                 self.log.info(f"Tweet: {tweet.id} is to old")
                 continue
 
             elif tweet.source == "Advertisement":
                 continue
 
-            if await self.bot.redis.sismember(self.key, str(tweet.id)):
+            candidates.append(tweet)
+
+        # claiming marks them right away, a slow dispatch can't be picked up twice
+        fresh = set(await self.dedup.claim(*(tweet.id for tweet in candidates)))
+        for tweet in candidates:
+            if str(tweet.id) not in fresh:
                 self.log.info(f"skipping {str(tweet.id)} due to it already have been sent")
                 continue
 
-            await self.bot.redis.sadd(self.key, str(tweet.id))
             self.bot.loop.create_task(self.dispatch(data.user, tweet, records))
+            dispatched.append(tweet.posted_at.timestamp())
             self.posted += 1
 
+        return dispatched
+
     async def dispatch(
         self: Self,
         user: BasicUser,
@@ -193,3 +182,5 @@ class Twitter(Feed):
                     embed=embed,
                     allowed_mentions=AllowedMentions.all(),
                 )
+
+        self.delivered(tweet.posted_at)
@@ -1,11 +1,9 @@
 from .base import BaseRecord, Feed
-import asyncio
 from collections import defaultdict
 from contextlib import suppress
-from random import uniform
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, cast
-from typing_extensions import NoReturn, Self
+from typing_extensions import Self
 from ..models.youtube import YouTubeChannel, YouTubeFeed, FeedEntry
 from discord import AllowedMentions, Color, Embed, HTTPException, TextChannel, Thread, Client
 from discord.utils import utcnow
@@ -21,12 +19,13 @@ class YouTube(Feed):
     Listener for new posts.
     """
 
+    table = "youtube"
+
     def __init__(self, bot: Client):
         super().__init__(
             bot,
             name="YouTube",
         )
-        self.log = None
 
     def replacements(self: Self, user: YouTubeChannel, post: FeedEntry) -> dict:
         REPLACEMENTS = {
@@ -46,32 +45,6 @@ class YouTube(Feed):
         }
         return REPLACEMENTS
 
-    async def start(self: Self) -> NoReturn:
-        self.log = self.logger
-        self.log.info("Started Feed!")
-        while True:
-            records = await self.get_records()
-            for youtube_id, records in records.items():
-                needed = False
-                for record in records:
-                    if self.bot.get_guild(record["guild_id"]):
-                        needed = True
-                if needed:
-                    self.bot.loop.create_task(self.get_posts(youtube_id, records))
-                    await asyncio.sleep(uniform(0.5, 1.5))
-
-            if self.scheduled_deletion:
-                await self.bot.db.execute(
-                    """
-                    DELETE FROM feeds.youtube
-                    WHERE channel_id = ANY($1::BIGINT[])
-                    """,
-                    self.scheduled_deletion,
-                )
-                self.scheduled_deletion.clear()
-
-            await asyncio.sleep(60 * 9)
-
     async def get_records(self: Self) -> dict[int, List[Record]]:
         records = cast(
             List[Record],
@@ -89,22 +62,32 @@ class YouTube(Feed):
 
         return result
     
-    async def get_posts(self: Self, youtube_id: str, records: List[Record]) -> NoReturn:
+    async def poll(self: Self, youtube_id: str, records: List[Record], since: float) -> List[float]:
         feed = await YouTubeFeed.from_id(youtube_id)
         youtube_channel = await YouTubeChannel.from_id(youtube_id)
         if not feed:
             self.log.info(f"Couldnt fetch feed for YouTube Channel ID {youtube_id}")
-            return
+            return []
+        cutoff = min(datetime.now(timezone.utc) - timedelta(hours=1), datetime.fromtimestamp(since, timezone.utc))
+        dispatched = []
+        candidates = []
         for item in feed.entries[:3]:
-            if await self.bot.redis.sismember(self.key, str(item.yt_videoid)):
-                self.log.info(f"skipping {str(item.yt_videoid)} due to it already have been sent")
-                continue
-            if datetime.now(timezone.utc) - datetime.fromisoformat(item.published) > timedelta(hours=1):
+            if datetime.fromisoformat(item.published) < cutoff:
                 self.log.info(f"skipping {item} due to it being to old")
                 self.bot.ytvideo = item
                 continue
-            await self.bot.redis.sadd(self.key, str(item.yt_videoid))
+            candidates.append(item)
+
+        fresh = set(await self.dedup.claim(*(item.yt_videoid for item in candidates)))
+        for item in candidates:
+            if str(item.yt_videoid) not in fresh:
+                self.log.info(f"skipping {str(item.yt_videoid)} due to it already have been sent")
+                continue
             self.bot.loop.create_task(self.dispatch(youtube_channel, item, records))
+            dispatched.append(datetime.fromisoformat(item.published).timestamp())
+            self.posted += 1
+
+        return dispatched
 
     async def dispatch(
         self: Self,
@@ -153,4 +136,4 @@ class YouTube(Feed):
                     allowed_mentions=AllowedMentions.all(),
                 )
 
-    
+        self.delivered(youtube_video.published)
@@ -3,16 +3,17 @@ from typing import Any, Callable, Dict, Optional, Union
 from discord.ext.commands import CommandError, Context, Converter
 from discord import Embed, Guild, ActionRow, User, Member, Message, ButtonStyle  # noqa: F401
 from discord.abc import GuildChannel
-from aiohttp import ClientSession
 from typing_extensions import Type, NoReturn, Self
 from discord.ui import View, Button
 from data.variables import EMOJI_REGEX, DEFAULT_EMOJIS
-from discord.utils import format_dt
 import discord
 import regex
 import re
 import datetime
+import asyncio
 from .exceptions import EmbedError
+from .images import images
+from .template import Variables, compile_template, ordinal  # noqa: F401
 from loguru import logger
 
 def escape_md(s):
@@ -115,10 +116,6 @@ def format_plays(amount):
     return "plays"
 
 
-def ordinal(n):
-    n = int(n)
-    return "%d%s" % (n, "tsnrhtdd"[(n // 10 % 10 != 1) * (n % 10 < 4) * n % 10 :: 4])
-
 ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 
 # URL pattern to verify the format
@@ -135,14 +132,8 @@ async def is_valid_icon_url(url: str) -> bool:
         return False
     
     # Check the Content-Type to ensure it's an allowed image format
-    async with ClientSession() as session:
-        try:
-            async with session.head(url) as response:
-                content_type = response.headers.get("Content-Type", "")
-                return content_type in ALLOWED_MIME_TYPES
-        except Exception as e:
-            print(f"Failed to fetch URL: {e}")
-            return False
+    check = await images.check(url)
+    return check.trusted or (check.content_type or "") in ALLOWED_MIME_TYPES
 
 
 
@@ -159,56 +150,12 @@ class EmbedConverter(Converter):
 
 class Script:
     def __init__(self, template: str, user: Union[Member, User], lastfm_data: dict = {}, *, channel: Optional[GuildChannel] = None):
-        self.pattern = compile(r"\{([\s\S]*?)\}")  # compile(r"{(.*?)}")
         self.data: Dict[str, Union[Dict, str]] = {
             "embed": {},
         }
-        self.replacements = {
-            "{user}": str(user),
-            "{user.mention}": user.mention,
-            "{user.name}": user.name,
-            "{user.avatar}": user.display_avatar.url,
-            "{user.joined_at}": format_dt(user.joined_at, style="R"),
-            "{user.created_at}": format_dt(user.created_at, style="R"),
-            "{guild.name}": user.guild.name,
-            "{guild.count}": str(user.guild.member_count),
-            "{guild.count.format}": ordinal(len(user.guild.members)),
-            "{guild.id}": user.guild.id,
-            "{guild.created_at}": format_dt(user.guild.created_at, style="R"),
-            "{guild.boost_count}": str(user.guild.premium_subscription_count),
-            "{guild.booster_count}": str(len(user.guild.premium_subscribers)),
-            "{guild.boost_count.format}": ordinal(
-                str(user.guild.premium_subscription_count)
-            ),
-            "{guild.booster_count.format}": ordinal(
-                str(user.guild.premium_subscription_count)
-            ),
-            "{guild.boost_tier}": str(user.guild.premium_tier),
-            "{guild.icon}": user.guild.icon.url if user.guild.icon else "",
-            "{track}": lastfm_data.get("track", ""),
-            "{track.duration}": lastfm_data.get("duration", ""),
-            "{artist}": lastfm_data.get("artist", ""),
-            "{user}": lastfm_data.get("user", ""),  # noqa: F601
-            "{avatar}": lastfm_data.get("avatar", ""),
-            "{track.url}": lastfm_data.get("track.url", ""),
-            "{artist.url}": lastfm_data.get("artist.url", ""),
-            "{scrobbles}": lastfm_data.get("scrobbles", ""),
-            "{track.image}": lastfm_data.get("track.image", ""),
-            "{username}": lastfm_data.get("username", ""),
-            "{artist.plays}": lastfm_data.get("artist.plays", ""),
-            "{track.plays}": lastfm_data.get("track.plays", ""),
-            "{track.lower}": lastfm_data.get("track.lower", ""),
-            "{artist.lower}": lastfm_data.get("artist.lower", ""),
-            "{track.hyperlink}": lastfm_data.get("track.hyperlink", ""),
-            "{track.hyperlink_bold}": lastfm_data.get("track.hyperlink_bold", ""),
-            "{artist.hyperlink}": lastfm_data.get("artist.hyperlink", ""),
-            "{artist.hyperlink_bold}": lastfm_data.get("artist.hyperlink_bold", ""),
-            "{track.color}": lastfm_data.get("track.color", ""),
-            "{artist.color}": lastfm_data.get("artist.color", ""),
-            "{date}": lastfm_data.get("date", ""),
-            "{whitespace}": "\u200e",
-        }
-        self.template = self._replace_placeholders(template.replace("`\u200b`\u200b`", "```"))
+        self.compiled = compile_template(template)
+        self.variables = Variables(user, lastfm_data)
+        self.template = self.compiled.render(self.variables)
 
     def get_color(self, color: str):
         try:
@@ -278,29 +225,34 @@ class Script:
     async def validate_image(self: Self, url: str) -> Optional[bool]:
         if not image_link.match(url):
             raise EmbedError(f" 1 `{url}` is not a valid Image URL Format")
-        async with ClientSession() as session:
-            async with session.request("HEAD", url) as response:
-                if int(response.headers.get("Content-Length", 15000)) > 240000000:
-                    raise EmbedError(f"`{url}` is to large of a URL")
-                if content_type := response.headers.get("Content-Type"):
-                    if "image" not in content_type.lower():
-                        raise EmbedError(
-                            f"`{url}` is not a valid Image URL due to the content type being `{content_type}`"
-                        )
-                else:
-                    raise EmbedError(f"`{url}` is not a valid Image URL")
+        check = await images.check(url)
+        if not check.ok:
+            raise EmbedError(f"`{url}` is not a valid Image URL")
+        if check.content_length > 240000000:
+            raise EmbedError(f"`{url}` is to large of a URL")
+        if not check.is_image:
+            if check.content_type:
+                raise EmbedError(
+                    f"`{url}` is not a valid Image URL due to the content type being `{check.content_type}`"
+                )
+            raise EmbedError(f"`{url}` is not a valid Image URL")
         return True
 
     async def validate(self: Self) -> NoReturn:
         DICT = {}
-        if thumbnail := self.data.get("embed").get("thumbnail", DICT).get("url"):
-            await self.validate_image(thumbnail)
-        if image := self.data.get("embed").get("image", DICT).get("url"):
-            await self.validate_image(image)
-        if author_icon := self.data.get("embed").get("author", DICT).get("icon_url"):
-            await self.validate_image(author_icon)
-        if footer_icon := self.data.get("embed").get("footer", DICT).get("icon_url"):
-            await self.validate_image(footer_icon)
+        urls = [
+            self.data.get("embed").get("thumbnail", DICT).get("url"),
+            self.data.get("embed").get("image", DICT).get("url"),
+            self.data.get("embed").get("author", DICT).get("icon_url"),
+            self.data.get("embed").get("footer", DICT).get("icon_url"),
+        ]
+        # every image is checked at once, the first invalid one is still the one reported
+        results = await asyncio.gather(
+            *(self.validate_image(url) for url in urls if url), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
         if author_url := self.data.get("embed").get("author", DICT).get("url"):
             self.validate_url(author_url)
         if embed_url := self.data.get("embed").get("url"):
@@ -339,20 +291,8 @@ class Script:
         if len(keys) == 1 and "color" in keys:
             raise EmbedError("A field or description is required if you provide a color")
 
-    def _replace_placeholders(self: Self, template: str) -> str:
-        template = (
-            template.replace("{embed}", "").replace("$v", "").replace("} {", "}{")
-        )
-        for placeholder, value in self.replacements.items():
-            template = template.replace(placeholder, str(value))
-        return template
-
     async def compile(self: Self) -> None:
-        self.template = self.template.replace(r"\n", "\n").replace("\\n", "\n")
-        matches = self.pattern.findall(self.template)
-
-        for match in matches:
-            parts = match.split(":", 1)
+        for parts in self.compiled.render_blocks(self.variables):
             if len(parts) == 2:
                 if parts[0] == "footer" and "&&" in parts[1]:
                     values = parts[1].split("&&")
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from loguru import logger
+
+# hosts that only ever serve the media they're asked for, checking them is a wasted request
+TRUSTED_HOSTS = frozenset(
+    {
+        "cdn.discordapp.com",
+        "media.discordapp.net",
+        "cdn.coffin.lol",
+    }
+)
+
+
+@dataclass
+class ImageCheck:
+    """
+    The result of a ``HEAD`` request, ``ok`` is False when the request itself failed.
+    """
+
+    ok: bool
+    content_type: Optional[str] = None
+    content_length: int = 0
+    trusted: bool = False
+
+    @property
+    def is_image(self) -> bool:
+        return self.trusted or bool(self.content_type and "image" in self.content_type.lower())
+
+
+@dataclass
+class ImageStatistics:
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    trusted: int
+    requests: int
+    failures: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ImageValidator:
+    """
+    Checks image urls with one shared connection pool and remembers the
+    answers, so a welcome message sent a thousand times only checks its
+    thumbnail once per ``ttl``.
+
+    Failed checks are remembered for ``negative_ttl`` so a dead link can't
+    be used to make the bot send the same request over and over, and hosts in
+    ``trusted_hosts`` are never checked at all.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        concurrency: int = 16,
+        timeout: float = 10.0,
+        trusted_hosts: Iterable[str] = TRUSTED_HOSTS,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.trusted_hosts = frozenset(trusted_hosts)
+        self.session: Optional[ClientSession] = None
+        self.entries: "OrderedDict[str, Tuple[float, ImageCheck]]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.trusted = 0
+        self.requests = 0
+        self.failures = 0
+
+    def get_session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(
+                connector=TCPConnector(limit=self.concurrency, ttl_dns_cache=300),
+                timeout=ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def is_trusted(self, url: str) -> bool:
+        try:
+            host = urlsplit(url).hostname
+        except ValueError:
+            return False
+        return host in self.trusted_hosts
+
+    def get(self, url: str) -> Optional[ImageCheck]:
+        if (entry := self.entries.get(url)) is None:
+            return None
+        expires, check = entry
+        if expires <= monotonic():
+            del self.entries[url]
+            return None
+        self.entries.move_to_end(url)
+        return check
+
+    def set(self, url: str, check: ImageCheck):
+        ttl = self.ttl if check.ok else self.negative_ttl
+        self.entries[url] = (monotonic() + ttl, check)
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, url: Optional[str] = None):
+        if url is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(url, None)
+
+    async def request(self, url: str) -> ImageCheck:
+        self.requests += 1
+        try:
+            async with self.get_session().head(url, allow_redirects=True) as response:
+                return ImageCheck(
+                    ok=True,
+                    content_type=response.headers.get("Content-Type"),
+                    content_length=int(response.headers.get("Content-Length", 15000)),
+                )
+        except Exception as e:
+            self.failures += 1
+            logger.debug(f"Failed to check image {url}: {e}")
+            return ImageCheck(ok=False)
+
+    async def check(self, url: str) -> ImageCheck:
+        """
+        Check a url, answering from the cache when possible. Concurrent
+        checks of the same url share a single request.
+
+        Parameters:
+            url (str): The url to check.
+
+        Returns:
+            ImageCheck: The content type and length the url serves.
+        """
+
+        if self.is_trusted(url):
+            self.trusted += 1
+            return ImageCheck(ok=True, trusted=True)
+
+        if (check := self.get(url)) is not None:
+            self.hits += 1
+            return check
+
+        if (future := self.pending.get(url)) is not None:
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = self.pending[url] = asyncio.get_running_loop().create_future()
+        try:
+            check = await self.request(url)
+            self.set(url, check)
+            future.set_result(check)
+            return check
+        except BaseException:
+            # request() handles its own errors, this is the check being cancelled
+            future.cancel()
+            raise
+        finally:
+            self.pending.pop(url, None)
+
+    async def check_many(self, urls: Iterable[str]) -> List[ImageCheck]:
+        return list(await asyncio.gather(*map(self.check, urls)))
+
+    @property
+    def statistics(self) -> ImageStatistics:
+        return ImageStatistics(
+            size=len(self.entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            trusted=self.trusted,
+            requests=self.requests,
+            failures=self.failures,
+        )
+
+
+images = ImageValidator()
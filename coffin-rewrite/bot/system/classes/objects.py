@@ -5,6 +5,37 @@ from xxhash import xxh64_hexdigest as hash_
 
 SET = set()
 
+
+class MockPipeline:
+    """
+    Queues RedisMock commands and runs them in order on ``execute``,
+    enough to stand in for ``redis.pipeline(transaction=False)``.
+    """
+
+    def __init__(self, mock: "RedisMock") -> None:
+        self.mock = mock
+        self.commands = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.mock, name)
+
+        def queue(*args: Any, **kwargs: Any) -> "MockPipeline":
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self) -> "MockPipeline":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.commands.clear()
+
+
 class RedisMock:
     def __init__(self, bot=None) -> None:
         self.bot = bot
@@ -158,6 +189,75 @@ class RedisMock:
             if not self._dict[key]:
                 del self._dict[key]
 
+    def _zset(self, key: Any, create: bool = False) -> dict:
+        if create and key not in self._dict:
+            self._dict[key] = {}
+
+        assert isinstance(
+            self._dict.get(key, {}), dict
+        ), "That key belongs to another type."
+
+        return self._dict.get(key, {})
+
+    async def zadd(self, key: Any, mapping: dict, nx: bool = False) -> int:
+        """
+        Add members with their scores to the sorted set stored at key.
+
+        Parameters:
+            key (Any): The key of the sorted set.
+            mapping (dict): The members mapped to their scores.
+            nx (bool, optional): Only add new members, leaving existing scores alone. Defaults to False.
+
+        Returns:
+            int: The number of members that weren't in the set before.
+        """
+
+        zset = self._zset(key, create=True)
+        added = 0
+
+        for member, score in mapping.items():
+            if member not in zset:
+                added += 1
+            elif nx:
+                continue
+            zset[member] = float(score)
+
+        return added
+
+    async def zmscore(self, key: Any, members: list) -> list:
+        """
+        Return the score of each member, None for the ones not in the sorted set.
+        """
+
+        zset = self._zset(key)
+        return [zset.get(member) for member in members]
+
+    async def zremrangebyscore(self, key: Any, min: Union[float, str], max: Union[float, str]) -> int:
+        """
+        Remove every member whose score is within min and max, inclusive.
+
+        Returns:
+            int: The number of members removed.
+        """
+
+        zset = self._zset(key)
+        low, high = float(min), float(max)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+
+        for member in removed:
+            del zset[member]
+
+        if key in self._dict and not zset:
+            del self._dict[key]
+
+        return len(removed)
+
+    async def zcard(self, key: Any) -> int:
+        return len(self._zset(key))
+
+    def pipeline(self, transaction: bool = False) -> MockPipeline:
+        return MockPipeline(self)
+
     async def delete(self, *keys: Any, pattern: Optional[str] = None) -> int:
         """
         Delete one or more keys from the dictionary.
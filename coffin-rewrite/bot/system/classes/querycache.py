@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+
+TABLE_PATTERN = re.compile(
+    r"""\b(?:FROM|JOIN|INTO|UPDATE|TABLE|TRUNCATE)\s+(?:ONLY\s+)?((?:"?[a-z_][a-z0-9_$]*"?\.)?"?[a-z_][a-z0-9_$]*"?)(?![a-z0-9_$."(])""",
+    re.IGNORECASE,
+)
+WRITE_PATTERN = re.compile(
+    r"""\b(?:INSERT\s+INTO|DELETE\s+FROM|TRUNCATE|MERGE\s+INTO|ALTER\s+TABLE|DROP\s+TABLE|CREATE\s+TABLE)\b|(?<!DO )(?<!FOR )\bUPDATE\s+(?!SET\b)""",
+    re.IGNORECASE,
+)
+RESERVED = frozenset(
+    {
+        "select", "set", "values", "where", "lateral", "unnest", "generate_series",
+        "exists", "if", "not", "only", "of", "nowait", "skip", "cascade",
+    }
+)
+# balances change too often for cached reads to be worth the risk
+UNCACHED_TABLES = ("economy",)
+
+
+@dataclass
+class QueryStatement:
+    tables: FrozenSet[str]
+    write: bool
+
+
+@lru_cache(maxsize=4096)
+def parse_statement(sql: str) -> QueryStatement:
+    """
+    Work out which tables a statement touches and whether it writes to them.
+
+    The queries in this codebase are static strings so the result is memoized
+    per statement, making this a dictionary lookup after the first call.
+
+    Parameters:
+        sql (str): The SQL statement.
+
+    Returns:
+        QueryStatement: The referenced tables and whether the statement is a write.
+    """
+
+    tables = set()
+    for match in TABLE_PATTERN.finditer(sql):
+        name = match.group(1).replace('"', "").lower()
+        if name.split(".")[-1] in RESERVED:
+            continue
+        tables.add(name)
+        # "lastfm.crowns" and "crowns" should invalidate each other
+        if "." in name:
+            tables.add(name.split(".", 1)[1])
+    return QueryStatement(frozenset(tables), bool(WRITE_PATTERN.search(sql)))
+
+
+@dataclass
+class CacheStatistics:
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class QueryCache:
+    """
+    A bounded LRU/TTL cache for query results with a table -> keys reverse index
+    so writes only invalidate the entries that read from the written tables.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, FrozenSet[str]]]" = OrderedDict()
+        self._index: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(method: str, sql: str, args: Tuple[Any, ...]) -> Hashable:
+        key = (method, sql, args)
+        try:
+            hash(key)
+        except TypeError:
+            # array parameters are passed as lists
+            key = (method, sql, repr(args))
+        return key
+
+    def cacheable(self, tables: Iterable[str]) -> bool:
+        return not any(name in table for table in tables for name in UNCACHED_TABLES)
+
+    def snapshot(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """
+        Capture the generation of each table before running a read so a result
+        that raced with a write is not stored.
+        """
+
+        return (self._epoch, *(self._generations.get(table, 0) for table in tables))
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        value, expires_at, _ = entry
+        if expires_at <= monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tables: FrozenSet[str],
+        snapshot: Optional[Tuple[int, ...]] = None,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        if snapshot is not None and snapshot != self.snapshot(tables):
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, monotonic() + (ttl or self.ttl), tables)
+        for table in tables:
+            self._index.setdefault(table, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def invalidate(self, *tables: str) -> int:
+        """
+        Drop every entry that read from any of the given tables.
+
+        Parameters:
+            *tables (str): The table names that were written to.
+
+        Returns:
+            int: The number of entries removed.
+        """
+
+        removed = 0
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in self._index.pop(table, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._index.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tables = self._entries.pop(key)
+        for table in tables:
+            if (keys := self._index.get(table)) is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[table]
+
+    def statistics(self) -> CacheStatistics:
+        return CacheStatistics(
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            invalidations=self.invalidations,
+        )
@@ -1,2 +1,2 @@
-from .client import IPCResponse, IPCData, CoffinLock, CoffinRedis
+from .client import IPCResponse, IPCData, CoffinLock, CoffinRedis, DedupStore
 from .events import Events
\ No newline at end of file
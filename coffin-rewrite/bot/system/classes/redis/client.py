@@ -8,7 +8,7 @@ import itertools
 
 from datetime import timedelta
 from hashlib import sha1
-from typing import Dict, Optional, Union, List, Any, Literal
+from typing import Dict, Iterable, Optional, Union, List, Any, Literal
 from discord import Message, Guild, User, Member, TextChannel
 from discord.ext.commands import Context
 from async_timeout import timeout as Timeout
@@ -202,6 +202,99 @@ class CoffinLock(Lock):
         raise LockError("Unable to acquire lock within the time specified")
 
 
+class DedupStore:
+    """
+    Remembers ids in a sorted set scored by when they were marked, so
+    membership for a whole batch is a single ``ZMSCORE`` and anything older
+    than ``horizon`` seconds is trimmed as new ids come in.
+
+    Works against any client with the sorted set commands and ``pipeline``,
+    including ``RedisMock`` when there's no Redis server around.
+    """
+
+    def __init__(self, redis: Any, key: str, horizon: float = 60 * 60 * 24 * 7):
+        self.redis = redis
+        self.key = key
+        self.horizon = horizon
+
+    def __repr__(self) -> str:
+        return f"<DedupStore key={self.key!r} horizon={self.horizon}>"
+
+    @staticmethod
+    def normalize(ids: Iterable[Any]) -> List[str]:
+        return [str(i) for i in ids]
+
+    async def seen_many(self, ids: Iterable[Any]) -> List[bool]:
+        """
+        Whether each of ``ids`` has been marked within the horizon, in one round trip.
+        """
+
+        ids = self.normalize(ids)
+        if not ids:
+            return []
+
+        cutoff = time.time() - self.horizon
+        scores = await self.redis.zmscore(self.key, ids)
+        return [score is not None and float(score) > cutoff for score in scores]
+
+    async def seen(self, id: Any) -> bool:
+        return (await self.seen_many([id]))[0]
+
+    async def unseen(self, ids: Iterable[Any]) -> List[str]:
+        ids = self.normalize(ids)
+        return [i for i, seen in zip(ids, await self.seen_many(ids)) if not seen]
+
+    async def mark(self, *ids: Any) -> None:
+        """
+        Mark ``ids`` as seen now and trim everything past the horizon.
+        """
+
+        if not ids:
+            return
+
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.key, {i: now for i in self.normalize(ids)})
+            pipe.zremrangebyscore(self.key, "-inf", now - self.horizon)
+            await pipe.execute()
+
+    async def claim(self, *ids: Any) -> List[str]:
+        """
+        Mark ``ids`` and return the ones nobody had marked before, so two
+        workers racing on the same post can't both deliver it.
+        """
+
+        ids = self.normalize(ids)
+        if not ids:
+            return []
+
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.key, "-inf", now - self.horizon)
+            for i in ids:
+                pipe.zadd(self.key, {i: now}, nx=True)
+            results = await pipe.execute()
+
+        return [i for i, added in zip(ids, results[1:]) if added]
+
+    async def migrate(self, legacy_key: str) -> int:
+        """
+        Move the members of a plain set into the store, treating them as seen now.
+        """
+
+        if not (members := await self.redis.smembers(legacy_key)):
+            return 0
+
+        now = time.time()
+        members = [m.decode() if isinstance(m, bytes) else str(m) for m in members]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.key, {m: now for m in members}, nx=True)
+            pipe.delete(legacy_key)
+            await pipe.execute()
+
+        return len(members)
+
+
 class CoffinRedis(Redis):
     def __init__(self, *a, **ka):
         self._locks_created: Dict[Union[str, bytes, memoryview], CoffinLock] = {}
@@ -344,6 +437,9 @@ class CoffinRedis(Redis):
         log.success(f"Connected. 5 pings latency: {fmtseconds(avg)}")
         return cls
 
+    def dedup(self, key: str, horizon: float = 60 * 60 * 24 * 7) -> DedupStore:
+        return DedupStore(self, key, horizon)
+
     def rl_key(self, ident) -> str:
         return f"{self.rl_prefix}{xxh3_64_hexdigest(ident)}"
     
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from discord.utils import format_dt
+
+
+def ordinal(n):
+    n = int(n)
+    return "%d%s" % (n, "tsnrhtdd"[(n // 10 % 10 != 1) * (n % 10 < 4) * n % 10 :: 4])
+
+
+def _lastfm(key: str) -> Callable[["Variables"], Any]:
+    return lambda v: v.lastfm.get(key, "")
+
+
+# every placeholder a script can use, resolved only when the script references it
+RESOLVERS: Dict[str, Callable[["Variables"], Any]] = {
+    # the lastfm entry has always shadowed the member one for {user}
+    "user": _lastfm("user"),
+    "user.mention": lambda v: v.user.mention,
+    "user.name": lambda v: v.user.name,
+    "user.avatar": lambda v: v.user.display_avatar.url,
+    "user.joined_at": lambda v: format_dt(v.user.joined_at, style="R"),
+    "user.created_at": lambda v: format_dt(v.user.created_at, style="R"),
+    "guild.name": lambda v: v.user.guild.name,
+    "guild.count": lambda v: v.user.guild.member_count,
+    "guild.count.format": lambda v: ordinal(len(v.user.guild.members)),
+    "guild.id": lambda v: v.user.guild.id,
+    "guild.created_at": lambda v: format_dt(v.user.guild.created_at, style="R"),
+    "guild.boost_count": lambda v: v.user.guild.premium_subscription_count,
+    "guild.booster_count": lambda v: len(v.user.guild.premium_subscribers),
+    "guild.boost_count.format": lambda v: ordinal(v.user.guild.premium_subscription_count),
+    "guild.booster_count.format": lambda v: ordinal(v.user.guild.premium_subscription_count),
+    "guild.boost_tier": lambda v: v.user.guild.premium_tier,
+    "guild.icon": lambda v: v.user.guild.icon.url if v.user.guild.icon else "",
+    "track": _lastfm("track"),
+    "track.duration": _lastfm("duration"),
+    "artist": _lastfm("artist"),
+    "avatar": _lastfm("avatar"),
+    "track.url": _lastfm("track.url"),
+    "artist.url": _lastfm("artist.url"),
+    "scrobbles": _lastfm("scrobbles"),
+    "track.image": _lastfm("track.image"),
+    "username": _lastfm("username"),
+    "artist.plays": _lastfm("artist.plays"),
+    "track.plays": _lastfm("track.plays"),
+    "track.lower": _lastfm("track.lower"),
+    "artist.lower": _lastfm("artist.lower"),
+    "track.hyperlink": _lastfm("track.hyperlink"),
+    "track.hyperlink_bold": _lastfm("track.hyperlink_bold"),
+    "artist.hyperlink": _lastfm("artist.hyperlink"),
+    "artist.hyperlink_bold": _lastfm("artist.hyperlink_bold"),
+    "track.color": _lastfm("track.color"),
+    "artist.color": _lastfm("artist.color"),
+    "date": _lastfm("date"),
+    "whitespace": lambda v: "\u200e",
+}
+
+VARIABLE_PATTERN = re.compile(
+    "|".join(re.escape("{" + name + "}") for name in sorted(RESOLVERS, key=len, reverse=True))
+)
+BLOCK_PATTERN = re.compile(r"\{([\s\S]*?)\}")
+# stands in for a variable while the blocks are parsed, so values can't change the structure
+SENTINEL = "\ue000"
+
+Segments = Tuple[Union[str, "Variable"], ...]
+
+
+class Variables:
+    """
+    Lazily resolved placeholder values for one render, each computed at most once.
+    """
+
+    __slots__ = ("user", "lastfm", "values")
+
+    def __init__(self, user: Any, lastfm: Optional[dict] = None):
+        self.user = user
+        self.lastfm = lastfm or {}
+        self.values: Dict[str, str] = {}
+
+    def __getitem__(self, name: str) -> str:
+        if (value := self.values.get(name)) is None:
+            value = self.values[name] = str(RESOLVERS[name](self))
+        return value
+
+
+@dataclass(frozen=True)
+class Variable:
+    name: str
+
+
+def render(segments: Segments, variables: Variables) -> str:
+    return "".join(s if isinstance(s, str) else variables[s.name] for s in segments)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    A script split into literal text and variable references, plus the
+    ``{name: value}`` blocks it contains, parsed once.
+    """
+
+    segments: Segments
+    blocks: Tuple[Tuple[Segments, ...], ...]
+    names: frozenset
+
+    def render(self, variables: Variables) -> str:
+        return render(self.segments, variables)
+
+    def render_blocks(self, variables: Variables) -> List[List[str]]:
+        """
+        Every block as the ``match.split(":", 1)`` parts Script.compile works on
+        """
+        return [[render(part, variables) for part in block] for block in self.blocks]
+
+
+def _split(text: str, variables: List[str]) -> Segments:
+    """
+    Turn sentinel-marked text back into literal and variable segments
+    """
+    segments: List[Union[str, Variable]] = []
+    for i, literal in enumerate(text.split(SENTINEL)):
+        if i:
+            segments.append(Variable(variables.pop(0)))
+        if literal:
+            segments.append(literal)
+    return tuple(segments)
+
+
+def preprocess(template: str) -> str:
+    return (
+        template.replace("`​`​`", "```")
+        .replace("{embed}", "")
+        .replace("$v", "")
+        .replace("} {", "}{")
+        .replace(r"\n", "\n")
+    )
+
+
+@lru_cache(maxsize=2048)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Parse a script once. The result is cached by the template text so the
+    welcome/boost/level messages of a guild are only ever parsed once.
+
+    Parameters:
+        template (str): The raw script.
+
+    Returns:
+        CompiledTemplate: The parsed script.
+    """
+
+    template = preprocess(template)
+    names = [match.group(0)[1:-1] for match in VARIABLE_PATTERN.finditer(template)]
+    skeleton = VARIABLE_PATTERN.sub(SENTINEL, template)
+    segments = _split(skeleton, list(names))
+
+    blocks = []
+    remaining = list(names)
+    position = 0
+    for match in BLOCK_PATTERN.finditer(skeleton):
+        # skip the variables between the previous block and this one
+        del remaining[: skeleton.count(SENTINEL, position, match.start(1))]
+        position = match.end(1)
+        body = match.group(1)
+        parts = body.split(":", 1)
+        block = []
+        for part in parts:
+            block.append(_split(part, remaining[: part.count(SENTINEL)]))
+            del remaining[: part.count(SENTINEL)]
+        blocks.append(tuple(block))
+
+    return CompiledTemplate(segments, tuple(blocks), frozenset(names))
+
+
+def legacy_render(template: str, user: Any, lastfm: Optional[dict] = None) -> Tuple[str, List[List[str]]]:
+    """
+    The previous path: every placeholder resolved up front, one ``str.replace``
+    pass per placeholder and the blocks parsed again with a regex.
+    """
+
+    variables = Variables(user, lastfm)
+    replacements = {"{" + name + "}": variables[name] for name in RESOLVERS}
+    template = preprocess(template)
+    for placeholder, value in replacements.items():
+        template = template.replace(placeholder, value)
+    return template, [match.split(":", 1) for match in BLOCK_PATTERN.findall(template)]
+
+
+TEMPLATES = {
+    "welcome": "{embed}$v{title: welcome {user.name}}$v{description: {user.mention} you are our {guild.count.format} member}$v{thumbnail: {user.avatar}}$v{footer: {guild.name} && {guild.icon}}$v{color: #747f8d}",
+    "boost": "{embed}$v{description: thanks for boosting {guild.name} {user.mention}, we now have {guild.boost_count} boosts from {guild.booster_count} boosters}$v{color: #f47fff}",
+    "level": "{embed}$v{content: {user.mention}}$v{description: you have leveled up to 5}",
+    "leave": "{user.name} has left {guild.name}, we are down to {guild.count} members",
+}
+
+
+def benchmark(user: Any, repeat: int = 1000) -> Dict[str, Dict[str, float]]:
+    """
+    Time the legacy path against the compiled one for each representative
+    template, in microseconds per render. Run it from jishaku with a real member,
+    e.g. ``benchmark(ctx.author)`` in a large guild.
+    """
+
+    results = {}
+    for name, template in TEMPLATES.items():
+        compiled = compile_template(template)
+        variables = Variables(user)
+        expected = legacy_render(template, user)
+        actual = (compiled.render(variables), compiled.render_blocks(variables))
+
+        start = perf_counter()
+        for _ in range(repeat):
+            legacy_render(template, user)
+        legacy = (perf_counter() - start) / repeat * 1e6
+
+        start = perf_counter()
+        for _ in range(repeat):
+            variables = Variables(user)
+            compiled = compile_template(template)
+            compiled.render(variables)
+            compiled.render_blocks(variables)
+        current = (perf_counter() - start) / repeat * 1e6
+
+        results[name] = {"legacy": legacy, "compiled": current, "equal": float(expected == actual)}
+    return results
@@ -16,6 +16,9 @@ from data.config import CONFIG
 from .classes.database import Database, Record
 from .classes.redis import CoffinRedis
 from .classes.exceptions import EmbedError
+from .classes.images import images
+from .services.bot.browser import screenshots
+from .services.media.avatar import features
 from pathlib import Path
 from psutil import Process
 from os import getpid
@@ -26,6 +29,9 @@ from datetime import datetime, timedelta
 from .classes import Script
 from asyncio import ensure_future, gather, sleep
 from .services.bot.levels import Level, LevelSettings
+from .services.bot.prefixes import Prefixes
+from .services.bot.logs import LogDispatcher
+from .services.bot.bulk import BulkOperations
 from .worker import start_dask
 from .managers.errors import Errors
 from .managers.watcher import RebootRunner
@@ -80,6 +86,9 @@ class Coffin(AutoShardedBot):
         self.status_filter = dict()
         self.redis = CoffinRedis()
         self.snipes = Snipe(self)
+        self.prefixes = Prefixes(self)
+        self.logs = LogDispatcher(self)
+        self.bulk = BulkOperations(self)
         self.object_cache = RedisMock()
         self.startup_time = datetime.now()
         self.invite_regex = r"(https?://)?(www.|canary.|ptb.)?(discord.gg|discordapp.com/invite|discord.com/invite)[\/\\]?[a-zA-Z0-9]+/?"
@@ -100,7 +109,10 @@ class Coffin(AutoShardedBot):
     async def close(self):
         """Overrides built-in close()"""
         await self.webserver.server.close()
+        await self.bulk.close()
         await self.db.close()
+        await images.close()
+        await screenshots.close()
         try:
             await super().close()
             os._exit(0)
@@ -109,14 +121,7 @@ class Coffin(AutoShardedBot):
         os._exit(0)
 
     async def get_prefix(self: "Coffin", message: Message):
-        server = await self.db.fetchval("""SELECT prefix FROM config WHERE guild_id = $1""", message.guild.id)
-        user = await self.db.fetchval("""SELECT prefix FROM user_config WHERE user_id = $1""", message.author.id)
-        if not server:
-            server = ","
-        if user:
-            if message.content.strip().startswith(user):
-                return when_mentioned_or(user)(self, message)
-        return when_mentioned_or(server)(self, message)
+        return when_mentioned_or(await self.prefixes.resolve(message))(self, message)
     
 
     async def setup_dask(self: "Coffin"):
@@ -202,9 +207,12 @@ class Coffin(AutoShardedBot):
         await self.db.connect()
         await self.redis.from_url()
         self.redis.bot = self
+        features.redis = self.redis
         await self.redis.setup_pubsub(channel = "coffin1")
         await setup(self)
         await self.setup_database()
+        await self.prefixes.load()
+        await self.logs.load()
         self.check(self.command_check)
 
 
@@ -402,6 +410,7 @@ class Coffin(AutoShardedBot):
             self.webserver = self.get_cog("WebServer")
             await self.runner.start()
             self.statistics = await get_statistics(self)
+            ensure_future(self.bulk.resume())
 
     async def on_message(self: "Coffin", message: Message):
         with suppress(AttributeError):
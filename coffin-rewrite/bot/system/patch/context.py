@@ -141,10 +141,8 @@ class Context(DefaultContext):
         view.message = await self.normal(message, view=view)
 
     async def display_prefix(self, only_one: Optional[bool] = True) -> Union[str, tuple]:
-        user_prefix = await self.bot.db.fetchval("""SELECT prefix FROM user_config WHERE user_id = $1""", self.author.id) or None
-        server_prefix = await self.bot.db.fetchval("""SELECT prefix FROM config WHERE guild_id = $1""", self.guild.id)
-        if not server_prefix:
-            server_prefix = ","
+        user_prefix = await self.bot.prefixes.user(self.author.id)
+        server_prefix = await self.bot.prefixes.guild(self.guild.id)
         if not only_one:
             return (server_prefix, user_prefix)
         if user_prefix:
@@ -1,17 +1,25 @@
-from playwright.async_api import async_playwright
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import monotonic
+from typing import AsyncIterator, Dict, Optional, Any, Union, List, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
 from aiohttp import ClientSession
 from io import BytesIO
-from tools import lock
-from typing import Optional, Any, Union, List, Dict
+from loguru import logger
 from .nsfw import ImageModeration
 from discord import File
-from asyncio import BoundedSemaphore, wait_for, sleep, exceptions
 from ...classes.exceptions import NSFWDetection, ConcurrencyLimit
 
-SCREENSHOT_TIMEOUT = 0.2
-CONCURRENCY_LIMIT = 5
-SCREENSHOT_SEMAPHORE = BoundedSemaphore(5)
-CACHE = {}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+VIEWPORT = (1280, 720)
+KEYWORDS = frozenset(
+    ("xx", "xxx", "porn", "sex", "dick", "cock", "pussy", "vagina", "cum", "pornhub", "orgasm", "gore")
+)
 
 
 async def check_image(query: Union[bytes, str]):
@@ -34,75 +42,238 @@ async def check_image(query: Union[bytes, str]):
     return ImageModeration(**data)
 
 
+@dataclass
+class Capture:
+    """
+    A screenshot and what's known about it, ``nsfw`` stays None until a
+    safe request has had the image checked.
+    """
+
+    image: bytes
+    explicit: bool
+    nsfw: Optional[bool] = None
+
+
+class Slot:
+    __slots__ = ("context", "page", "uses")
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+class ScreenshotService:
+    """
+    One Chromium for the lifetime of the bot, with up to ``pages`` contexts
+    kept open and handed out to requests. At most ``queue`` requests wait
+    for a free page, anything past that is turned away.
+
+    Captures are cached by (url, wait, viewport, full page, wait condition)
+    for ``ttl`` seconds, and identical requests in flight share one capture.
+    A context is recycled after ``recycle`` uses so a page can't grow forever.
+
+    Every page in use holds one of ``pages`` permits, whether it was idle or
+    had to be opened, and gives it back once it's returned or discarded so
+    a failed page always frees its place for the next request.
+    """
+
+    def __init__(
+        self,
+        pages: int = 4,
+        queue: int = 16,
+        maxsize: int = 64,
+        ttl: float = 300.0,
+        recycle: int = 50,
+        timeout: float = 30.0,
+    ):
+        self.pages = pages
+        self.queue = queue
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.recycle = recycle
+        self.timeout = timeout
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(pages)
+        self.created = 0
+        self.waiting = 0
+        self.launching = asyncio.Lock()
+        self.entries: "OrderedDict[Tuple, Tuple[float, Capture]]" = OrderedDict()
+        self.pending: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"<ScreenshotService pages={self.created}/{self.pages} waiting={self.waiting} cached={len(self.entries)}>"
+
+    async def launch(self) -> Browser:
+        async with self.launching:
+            if self.browser is None or not self.browser.is_connected():
+                if self.playwright is None:
+                    self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=True)
+                # pages of a crashed browser are useless
+                self.idle = asyncio.Queue()
+                self.created = 0
+                logger.info("Launched the screenshot browser")
+            return self.browser
+
+    async def close(self):
+        while not self.idle.empty():
+            slot = self.idle.get_nowait()
+            await self.discard(slot)
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.browser = self.playwright = None
+
+    async def discard(self, slot: Slot):
+        self.created -= 1
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        if self.waiting >= self.queue:
+            raise ConcurrencyLimit("Too many concurrent screenshot requests, please try again later")
+
+        browser = await self.launch()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise ConcurrencyLimit("Timed out waiting for a screenshot page, please try again later")
+        finally:
+            self.waiting -= 1
+
+        try:
+            if not self.idle.empty():
+                slot = self.idle.get_nowait()
+            else:
+                self.created += 1
+                try:
+                    context = await browser.new_context(user_agent=USER_AGENT)
+                    slot = Slot(context, await context.new_page())
+                except Exception:
+                    self.created -= 1
+                    raise
+        except BaseException:
+            self.slots.release()
+            raise
+
+        healthy = False
+        try:
+            slot.uses += 1
+            yield slot.page
+            healthy = True
+        finally:
+            try:
+                if healthy and slot.uses < self.recycle and browser.is_connected():
+                    try:
+                        # nothing a site left behind carries over to the next request
+                        await slot.page.goto("about:blank")
+                        await slot.context.clear_cookies()
+                        self.idle.put_nowait(slot)
+                    except Exception:
+                        await self.discard(slot)
+                else:
+                    await self.discard(slot)
+            finally:
+                self.slots.release()
+
+    def get(self, key: Tuple) -> Optional[Capture]:
+        if (entry := self.entries.get(key)) is None:
+            return None
+        expires, capture = entry
+        if expires <= monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return capture
+
+    def set(self, key: Tuple, capture: Capture):
+        self.entries[key] = (monotonic() + self.ttl, capture)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    async def capture(self, url: str, **kwargs: Any) -> Capture:
+        wait: int = kwargs.pop("wait", 0) or 0
+        full_page: bool = kwargs.pop("full_page", False)
+        wait_until: str = kwargs.pop("wait_until", "domcontentloaded")
+        viewport: Tuple[int, int] = tuple(kwargs.pop("viewport", VIEWPORT))
+        key = (url, wait, viewport, full_page, wait_until)
+
+        if capture := self.get(key):
+            self.hits += 1
+            return capture
+
+        if not (future := self.pending.get(key)):
+            self.misses += 1
+            future = self.pending[key] = asyncio.ensure_future(
+                self.render(url, wait, viewport, full_page, wait_until, **kwargs)
+            )
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+
+        capture = await asyncio.shield(future)
+        self.set(key, capture)
+        return capture
+
+    async def render(
+        self,
+        url: str,
+        wait: int,
+        viewport: Tuple[int, int],
+        full_page: bool,
+        wait_until: str,
+        **kwargs: Any,
+    ) -> Capture:
+        async with self.page() as page:
+            await page.set_viewport_size({"width": viewport[0], "height": viewport[1]})
+            await page.goto(url, wait_until=wait_until, timeout=self.timeout * 1000, **kwargs)
+            await asyncio.sleep(wait)
+            words = set(str(await page.content()).lower().split(" "))
+            image = await page.screenshot(animations="disabled", full_page=full_page)
+        return Capture(image, explicit=not KEYWORDS.isdisjoint(words))
+
+
+screenshots = ScreenshotService()
+
+
 async def get_screenshot(url: str, safe: Optional[bool] = True, **kwargs: Any) -> bytes:
     if not url.startswith("http"):
         url = f"https://{url}"
-    wait: int = kwargs.pop("wait", 0)
-    full_page: bool = kwargs.pop("full_page", False)
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36")
-        await page.goto(
-            url, wait_until=kwargs.pop("wait_until", "domcontentloaded"), **kwargs
-        )
-        await sleep(wait)
-        to_check = str(await page.content()).lower().split(" ")
-        if safe is True and any(
-            (
-                "xx" in to_check,
-                "xxx" in to_check,
-                "porn" in to_check,
-                "sex" in to_check,
-                "dick" in to_check,
-                "cock" in to_check,
-                "pussy" in to_check,
-                "vagina" in to_check,
-                "cum" in to_check,
-                "pornhub" in to_check,
-                "orgasm" in to_check,
-                "gore" in to_check,
-            )
-        ):
-            raise NSFWDetection(f"NSFW Content Detected on webpage of `{url}`")
-        if cache := CACHE.get(f"{url}-{'-'.join(str(k) for k in kwargs.keys())}"):
-            screenshot = cache
-        screenshot = await page.screenshot(animations='disabled', full_page=full_page)
-        await page.close()
-    await p.stop()
-    return screenshot
-
 
-async def screenshot(url: str, safe: Optional[bool] = True, **kwargs: Any):
-    """_summary_
+    capture = await screenshots.capture(url, **kwargs)
+    if safe is True and capture.explicit:
+        raise NSFWDetection(f"NSFW Content Detected on webpage of `{url}`")
+    return capture.image
 
-        uses a bound semaphore to limit concurrency of 
-        screenshotting whilst retaining speed and efficiency 
-        in the memory namespace
 
-    Args:
-        url (str): _description_
-        safe (Optional[bool], optional): _description_. Defaults to True.
+async def screenshot(url: str, safe: Optional[bool] = True, **kwargs: Any):
+    """
+    Screenshot ``url`` with the shared browser, a safe request also has the
+    image checked once per cached capture.
 
     Raises:
-        ConcurrencyLimit: _description_
-        NSFWDetection: _description_
-
-    Returns:
-        _type_: _description_
+        ConcurrencyLimit: too many requests are already waiting for a page
+        NSFWDetection: the page or its screenshot is explicit
     """
-    try:
-        await wait_for(SCREENSHOT_SEMAPHORE.acquire(), timeout=SCREENSHOT_TIMEOUT)
-    except TimeoutError:
-        raise ConcurrencyLimit(
-            "Too many concurrent screenshot requests, please try again later"
-        )
-    except exceptions.TimeoutError:
-        raise ConcurrencyLimit(
-            "Too many concurrent screenshot requests, please try again later"
-        )
-    screenshot = await get_screenshot(url, safe, **kwargs)
+
+    if not url.startswith("http"):
+        url = f"https://{url}"
+
+    capture = await screenshots.capture(url, **kwargs)
     if safe:
-        check = await check_image(screenshot)
-        if check.nsfw:
+        if capture.explicit:
+            raise NSFWDetection(f"NSFW Content Detected on webpage of `{url}`")
+        if capture.nsfw is None:
+            capture.nsfw = (await check_image(capture.image)).nsfw
+        if capture.nsfw:
             raise NSFWDetection(f"NSFW Content Detected on webpage of `{url}`")
-    return File(fp=BytesIO(screenshot), filename="screenshot.png")
+    return File(fp=BytesIO(capture.image), filename="screenshot.png")
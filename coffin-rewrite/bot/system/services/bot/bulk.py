@@ -0,0 +1,353 @@
+import asyncio
+from dataclasses import dataclass, field
+from time import monotonic, time
+from typing import Any, Dict, List, Optional, Set
+
+from discord import Client, Embed, Forbidden, Guild, HTTPException, Member, NotFound, Object
+from discord.http import Route
+from loguru import logger
+import humanize
+
+# action -> (progress verb, the route each operation goes through)
+ACTIONS = {
+    "role_add": ("Giving {role} to", "PUT", "/guilds/{guild_id}/members/{user_id}/roles/{role_id}"),
+    "role_remove": ("Removing {role} from", "DELETE", "/guilds/{guild_id}/members/{user_id}/roles/{role_id}"),
+    "nick_reset": ("Resetting the nicknames of", "PATCH", "/guilds/{guild_id}/members/{user_id}"),
+    "ban": ("Banning", "PUT", "/guilds/{guild_id}/bans/{user_id}"),
+}
+
+
+@dataclass
+class BulkJob:
+    guild_id: int
+    action: str
+    author_id: int
+    channel_id: int
+    members: List[int]
+    target_id: Optional[int] = None
+    reason: Optional[str] = None
+    message_id: Optional[int] = None
+    position: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    status: str = "running"
+    started: float = field(default_factory=time)
+    # where this run started, so the rate isn't skewed by work done before a restart
+    resumed_at: int = 0
+    cursor: int = 0
+    inflight: Set[int] = field(default_factory=set)
+
+    @property
+    def total(self) -> int:
+        return len(self.members)
+
+    @property
+    def done(self) -> int:
+        return self.cursor - len(self.inflight)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time() - self.started
+        return (self.done - self.resumed_at) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        return (self.total - self.done) / self.rate if self.rate else None
+
+    def checkpoint(self) -> int:
+        """
+        Every member before this index has been handled.
+        """
+
+        return min(self.inflight) if self.inflight else self.cursor
+
+
+class BulkOperations:
+    """
+    Runs role adds and removes, nickname resets and bans over many members
+    as one job per guild.
+
+    Pacing comes from the route's real rate limit bucket, as many requests
+    are kept in flight as the bucket allows and ``reserve`` requests of it
+    are left for everything else the guild is doing. Progress is saved every
+    ``checkpoint`` seconds so a job picks up where it left off after a
+    restart, and the progress message is edited at most every ``interval``
+    seconds.
+    """
+
+    def __init__(
+        self,
+        bot: Client,
+        concurrency: int = 10,
+        reserve: int = 1,
+        interval: float = 5.0,
+        checkpoint: float = 5.0,
+    ):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.reserve = reserve
+        self.interval = interval
+        self.checkpoint = checkpoint
+        self.jobs: Dict[int, BulkJob] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def __repr__(self) -> str:
+        return f"<BulkOperations jobs={len(self.jobs)}>"
+
+    def status(self, guild_id: int) -> Optional[BulkJob]:
+        return self.jobs.get(guild_id)
+
+    def describe(self, job: BulkJob) -> str:
+        verb = ACTIONS[job.action][0].format(role=f"<@&{job.target_id}>")
+        description = f"{verb} `{job.done:,}/{job.total:,}` members..."
+        if job.eta is not None:
+            description += f" about **{humanize.precisedelta(job.eta, format='%0.0f')}** left"
+        return description
+
+    def claim(self, job: BulkJob) -> bool:
+        """
+        Claim the guild for ``job`` without awaiting anything, False when
+        another job already has it.
+        """
+
+        if job.guild_id in self.jobs:
+            return False
+        self.jobs[job.guild_id] = job
+        return True
+
+    def release(self, job: BulkJob):
+        # only a reservation that never got started
+        if self.jobs.get(job.guild_id) is job and job.guild_id not in self.tasks:
+            self.jobs.pop(job.guild_id, None)
+
+    async def start(self, job: BulkJob) -> BulkJob:
+        if not self.claim(job) and self.jobs[job.guild_id] is not job:
+            raise RuntimeError("A job is already running in this guild")
+
+        try:
+            await self.bot.db.execute(
+                """
+                INSERT INTO bulk_jobs (guild_id, action, target_id, reason, author_id, channel_id, message_id, members)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                ON CONFLICT (guild_id) DO UPDATE SET
+                action = EXCLUDED.action, target_id = EXCLUDED.target_id, reason = EXCLUDED.reason,
+                author_id = EXCLUDED.author_id, channel_id = EXCLUDED.channel_id, message_id = EXCLUDED.message_id,
+                members = EXCLUDED.members, position = 0, succeeded = 0, failed = 0
+                """,
+                job.guild_id,
+                job.action,
+                job.target_id,
+                job.reason,
+                job.author_id,
+                job.channel_id,
+                job.message_id,
+                job.members,
+            )
+        except BaseException:
+            self.release(job)
+            raise
+        self.spawn(job)
+        return job
+
+    def spawn(self, job: BulkJob):
+        self.jobs[job.guild_id] = job
+        self.tasks[job.guild_id] = asyncio.ensure_future(self.run(job))
+
+    async def cancel(self, guild_id: int) -> Optional[BulkJob]:
+        """
+        Stop handing out members, the requests already in flight finish first.
+        """
+
+        if not (job := self.jobs.get(guild_id)):
+            return None
+
+        job.status = "cancelled"
+        return job
+
+    async def close(self):
+        # unlike a cancel the jobs are kept, they resume from their last checkpoint
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def resume(self):
+        """
+        Restart the jobs that were running when the bot went down.
+        """
+
+        for row in await self.bot.db.fetch("""SELECT * FROM bulk_jobs""", cached=False):
+            if row.guild_id in self.jobs:
+                continue
+            if not self.bot.get_guild(row.guild_id):
+                await self.bot.db.execute("""DELETE FROM bulk_jobs WHERE guild_id = $1""", row.guild_id)
+                continue
+
+            job = BulkJob(
+                guild_id=row.guild_id,
+                action=row.action,
+                author_id=row.author_id,
+                channel_id=row.channel_id,
+                members=list(row.members),
+                target_id=row.target_id,
+                reason=row.reason,
+                message_id=row.message_id,
+                position=row.position,
+                succeeded=row.succeeded,
+                failed=row.failed,
+            )
+            job.cursor = job.resumed_at = job.position
+            logger.info(f"Resuming {job.action} in {job.guild_id} at {job.position}/{job.total}")
+            self.spawn(job)
+
+    def bucket(self, job: BulkJob) -> Optional[Any]:
+        # the same key discord.py files the route's rate limit under, the user isn't a major parameter
+        _, method, path = ACTIONS[job.action]
+        route = Route(method, path, guild_id=job.guild_id, user_id=0, role_id=job.target_id or 0)
+        http = self.bot.http
+        try:
+            bucket_hash = http._bucket_hashes.get(route.key)
+            key = f"{bucket_hash or route.key}:{route.major_parameters}"
+            return http._buckets.get(key)
+        except AttributeError:
+            return None
+
+    async def pace(self, job: BulkJob):
+        """
+        Wait out the rest of the bucket's window once only the reserve is left.
+        """
+
+        while (bucket := self.bucket(job)) and bucket.remaining <= self.reserve and bucket.expires:
+            delay = bucket.expires - asyncio.get_running_loop().time()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def workers(self, job: BulkJob) -> int:
+        # until the first response there's no bucket, a single request learns its size
+        if not (bucket := self.bucket(job)):
+            return 1
+        return max(1, min(self.concurrency, bucket.limit - self.reserve))
+
+    def pending(self, job: BulkJob, member: Optional[Member]) -> bool:
+        """
+        Whether the operation still has to be done, which also makes a
+        resumed job skip whatever was done before the restart.
+        """
+
+        if job.action == "ban":
+            return True
+        if member is None:
+            return False
+        if job.action == "role_add":
+            return not member.get_role(job.target_id)
+        if job.action == "role_remove":
+            return bool(member.get_role(job.target_id))
+        return member.nick is not None
+
+    async def apply(self, job: BulkJob, guild: Guild, user_id: int) -> bool:
+        member = guild.get_member(user_id)
+        if not self.pending(job, member):
+            return True
+
+        reason = job.reason or f"{job.action.replace('_', ' ')} by {job.author_id}"
+        if job.action == "role_add":
+            await member.add_roles(Object(job.target_id), reason=reason)
+        elif job.action == "role_remove":
+            await member.remove_roles(Object(job.target_id), reason=reason)
+        elif job.action == "nick_reset":
+            await member.edit(nick=None, reason=reason)
+        else:
+            await guild.ban(member or Object(user_id), reason=reason, delete_message_days=0)
+        return True
+
+    async def worker(self, job: BulkJob, guild: Guild):
+        while job.cursor < job.total and job.status == "running":
+            index = job.cursor
+            job.cursor += 1
+            job.inflight.add(index)
+            try:
+                await self.pace(job)
+                await self.apply(job, guild, job.members[index])
+                job.succeeded += 1
+            except (Forbidden, NotFound):
+                job.failed += 1
+            except HTTPException as e:
+                job.failed += 1
+                logger.warning(f"Bulk {job.action} failed for {job.members[index]} in {guild.id}: {e}")
+            # a cancelled request stays in flight, so the checkpoint is kept before it
+            job.inflight.discard(index)
+
+    async def save(self, job: BulkJob):
+        job.position = job.checkpoint()
+        await self.bot.db.execute(
+            """UPDATE bulk_jobs SET position = $2, succeeded = $3, failed = $4 WHERE guild_id = $1""",
+            job.guild_id,
+            job.position,
+            job.succeeded,
+            job.failed,
+        )
+
+    async def edit(self, job: BulkJob, description: str):
+        if not job.message_id or not (channel := self.bot.get_channel(job.channel_id)):
+            return
+        try:
+            await channel.get_partial_message(job.message_id).edit(
+                embed=Embed(color=self.bot.color, description=description)
+            )
+        except HTTPException:
+            job.message_id = None
+
+    async def run(self, job: BulkJob):
+        guild = self.bot.get_guild(job.guild_id)
+        workers: List[asyncio.Task] = []
+        try:
+            last_edit = last_save = monotonic()
+            while job.cursor < job.total and job.status == "running":
+                if job.target_id and not guild.get_role(job.target_id):
+                    job.status = "failed"
+                    break
+
+                workers = [w for w in workers if not w.done()]
+                for _ in range(self.workers(job) - len(workers)):
+                    workers.append(asyncio.ensure_future(self.worker(job, guild)))
+
+                await asyncio.sleep(1)
+                if monotonic() - last_save >= self.checkpoint:
+                    await self.save(job)
+                    last_save = monotonic()
+                if monotonic() - last_edit >= self.interval:
+                    await self.edit(job, self.describe(job))
+                    last_edit = monotonic()
+
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            try:
+                await self.save(job)
+            except Exception as e:
+                logger.warning(f"Failed to save bulk {job.action} in {job.guild_id}: {e}")
+            self.jobs.pop(job.guild_id, None)
+            self.tasks.pop(job.guild_id, None)
+            raise
+        except Exception as e:
+            job.status = "failed"
+            logger.warning(f"Bulk {job.action} in {job.guild_id} failed: {e}")
+
+        if job.status == "running":
+            job.status = "finished"
+        self.jobs.pop(job.guild_id, None)
+        self.tasks.pop(job.guild_id, None)
+        await self.bot.db.execute("""DELETE FROM bulk_jobs WHERE guild_id = $1""", job.guild_id)
+
+        failed = f", **{job.failed:,}** failed" if job.failed else ""
+        if job.status == "finished":
+            elapsed = humanize.precisedelta(time() - job.started, format="%0.0f")
+            await self.edit(job, f"> <@{job.author_id}>: Finished this task in **{elapsed}**{failed}")
+        elif job.status == "cancelled":
+            await self.edit(job, f"> <@{job.author_id}>: Cancelled after `{job.done:,}/{job.total:,}` members{failed}")
+        else:
+            await self.edit(job, f"> <@{job.author_id}>: Stopped after `{job.done:,}/{job.total:,}` members{failed}")
+        logger.info(f"Bulk {job.action} in {job.guild_id} {job.status}: {job.succeeded} done, {job.failed} failed")
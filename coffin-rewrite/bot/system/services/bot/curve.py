@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from time import perf_counter
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+level_data = {
+    1: 0,
+    2: 15,
+    3: 80,
+    4: 255,
+    5: 624,
+    6: 1295,
+    7: 2400,
+    8: 4095
+}
+
+levels = np.array(list(level_data.keys()))
+xp_values = np.array(list(level_data.values()))
+coefficients = np.polyfit(levels, xp_values, deg=len(levels) - 1)
+polynomial = np.poly1d(coefficients)
+
+MAX_LEVEL = 1000
+
+
+class LevelCurve:
+    """
+    Precomputed xp <-> level tables for the level curve.
+
+    ``get_level`` used to interpolate inside the known data points and run
+    ``fsolve`` on the fitted polynomial past them, rounding the root. The
+    thresholds below reproduce that exactly: a member is level ``n`` once
+    their xp reaches ``level_data[n]`` for the known levels, and once it
+    reaches ``polynomial(n - 0.5)`` past them. (``fsolve`` stops converging
+    from its fixed initial guess around level 30 and returned ~8 there.)
+    """
+
+    def __init__(self, max_level: int = MAX_LEVEL):
+        self.max_level = max_level
+        known = [level_data[level] for level in sorted(level_data)]
+        extended = polynomial(np.arange(len(known) + 1, max_level + 1) - 0.5)
+        # thresholds[i] is the xp needed for level i + 1
+        self.thresholds = np.concatenate((np.asarray(known, dtype=np.float64), extended))
+        self._thresholds = self.thresholds.tolist()
+        # xp_table[level] is int(polynomial(level)), index 0 is unused
+        self.xp_table = [0] + [int(v) for v in polynomial(np.arange(1, max_level + 2))]
+
+    def get_level(self, xp: float) -> int:
+        """
+        :param xp : XP(int)
+        :return   : Level(int)
+        """
+        return max(bisect_right(self._thresholds, xp), 1)
+
+    def get_levels(self, xp: Union[Iterable[float], np.ndarray]) -> np.ndarray:
+        """
+        Convert a whole column of xp values (e.g. a leaderboard) at once.
+        """
+        return np.maximum(np.searchsorted(self.thresholds, np.asarray(xp, dtype=np.float64), side="right"), 1)
+
+    def get_xp(self, level: int) -> int:
+        """
+        :param level : Level(int)
+        :return      : Amount of xp(int) needed to reach the level
+        """
+        if 0 <= level <= self.max_level + 1:
+            return self.xp_table[level]
+        return int(polynomial(level))
+
+
+curve = LevelCurve()
+
+
+def benchmark(samples: int = 10000, repeat: int = 3) -> Dict[str, float]:
+    """
+    Compare the lookup table against the previous interp/fsolve path.
+
+    Returns the best time per conversion in microseconds for each path.
+    """
+    from scipy.optimize import fsolve
+
+    def legacy(xp: int) -> int:
+        if xp <= xp_values[-1]:
+            return int(np.interp(xp, xp_values, levels))
+        return int(np.round(fsolve(lambda level: polynomial(level) - xp, x0=len(levels))[0]))
+
+    # stay below level 25, past that fsolve no longer converges to the right root
+    column = np.random.default_rng(0).integers(0, int(polynomial(25)), samples)
+    values = column.tolist()
+    mismatches = sum(legacy(xp) != curve.get_level(xp) for xp in values[:1000])
+
+    def best(fn) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            fn()
+            timings.append(perf_counter() - start)
+        return min(timings) / samples * 1e6
+
+    return {
+        "fsolve": best(lambda: [legacy(xp) for xp in values]),
+        "bisect": best(lambda: [curve.get_level(xp) for xp in values]),
+        "searchsorted": best(lambda: curve.get_levels(column)),
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name:>12}: {value:.3f}{'' if name == 'mismatches' else ' us/op'}")
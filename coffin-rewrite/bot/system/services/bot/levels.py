@@ -26,29 +26,9 @@ from typing_extensions import Self
 from xxhash import xxh64_hexdigest as hash_
 from pydantic import BaseModel
 from cashews import cache
-import numpy as np
-from scipy.optimize import fsolve
-
-level_data = {
-    1: 0,
-    2: 15,
-    3: 80,
-    4: 255,
-    5: 624,
-    6: 1295,
-    7: 2400,
-    8: 4095
-}
-
-# Extract levels and xp values
-levels = np.array(list(level_data.keys()))
-xp_values = np.array(list(level_data.values()))
-
-# Fit a polynomial of degree 7
-coefficients = np.polyfit(levels, xp_values, deg=len(levels)-1)
-
-# Create a polynomial function from the coefficients
-polynomial = np.poly1d(coefficients)
+from .curve import curve
+from .ranking import LevelRanking
+
 DEFAULT_MULTIPLIER = 0.05
 DEFAULT_LEVEL_MESSAGE = "{embed}{content: {user.mention} you have leveled up to {level}}"
 cache.setup("mem://")
@@ -169,10 +149,12 @@ class Level:
         self.cache = {}
         self.messages = []
         self.text_cache = {}
+        self.ranking = LevelRanking(bot)
         self.text_level_loop.start()
 
     async def setup(self, bot: Client) -> Self:
         self.bot = bot
+        self.ranking.bot = bot
         self.logger.info("Starting levelling loop")
         self.bot.loop.create_task(self.do_text_levels())
         self.bot.add_listener(self.do_message_event, "on_message")
@@ -192,34 +174,31 @@ class Level:
 
 
     def xp_for_level(self, level: int):
-        return int(polynomial(level))
+        return curve.get_xp(level)
 
-    def get_xp(self, level: int, settings: LevelSettings) -> int:
+    def get_xp(self, level: int, settings: Optional[LevelSettings] = None) -> int:
         """
         :param level : Level(int)
         :return      : Amount of xp(int) needed to reach the level
         """
-        return int(polynomial(level))
+        return curve.get_xp(level)
         # return math.ceil(math.pow((level - 1) / (settings.multiplier * (1 + math.sqrt(5))), 2))
 
-    def get_level(self, xp: int, settings: LevelSettings) -> int:
+    def get_level(self, xp: int, settings: Optional[LevelSettings] = None) -> int:
         """
         :param xp : XP(int)
         :return   : Level(int)
         """
-        def equation(level):
-            return polynomial(level) - xp
-
-        # Check if xp is within the range of known XP values
-        if xp <= xp_values[-1]:
-            # Use interpolation to find the level within known data points
-            return int(np.interp(xp, xp_values, levels))
-        else:
-            # For XP beyond the known values, estimate level by finding the root
-            estimated_level = fsolve(equation, x0=len(levels))  # Initial guess is the last known level
-            return int(np.round(estimated_level[0]))
+        return curve.get_level(xp)
         # return math.floor(settings.multiplier * (1 + math.sqrt(5)) * math.sqrt(xp)) + 1
 
+    def get_levels(self, xp: List[int], settings: Optional[LevelSettings] = None) -> List[int]:
+        """
+        :param xp : XP(list) of many members
+        :return   : Level(list) for each of them
+        """
+        return curve.get_levels(xp).tolist()
+
     def xp_to_next_level(
         self, current_level: Optional[int] = None, current_xp: Optional[int] = None, settings: Optional[LevelSettings] = None
     ) -> int:
@@ -282,13 +261,14 @@ class Level:
                         message.author,
                         self.get_level(int(after_xp), settings),
                     )
-                    await self.bot.db.execute("""INSERT INTO text_levels (guild_id, user_id, xp, msgs, last_level_up) VALUES($1, $2, $3, $4, $5) ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = text_levels.xp + excluded.xp, msgs = text_levels.msgs + excluded.msgs, last_level_up = excluded.last_level_up RETURNING xp""",
+                    xp = await self.bot.db.execute("""INSERT INTO text_levels (guild_id, user_id, xp, msgs, last_level_up) VALUES($1, $2, $3, $4, $5) ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = text_levels.xp + excluded.xp, msgs = text_levels.msgs + excluded.msgs, last_level_up = excluded.last_level_up RETURNING xp""",
                         message.guild.id,
                         message.author.id,
                         added_xp,
                         self.text_cache[key]["amount"],
                         new_level
                     )
+                    self.ranking.update(message.guild.id, message.author.id, xp)
                     self.text_cache.pop(key)
                     return True
         except Exception as e:
@@ -320,13 +300,14 @@ class Level:
                     )
                     self.text_cache[key]["messages"].clear()
                     if not await self.check_level_up(message):
-                        await self.bot.db.execute(
+                        xp = await self.bot.db.execute(
                             """INSERT INTO text_levels (guild_id, user_id, xp, msgs) VALUES($1, $2, $3, $4) ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = text_levels.xp + excluded.xp, msgs = text_levels.msgs + excluded.msgs RETURNING xp""",
                             message.guild.id,
                             message.author.id,
                             added_xp,
                             amount,
                         )
+                        self.ranking.update(message.guild.id, message.author.id, xp)
                         self.text_cache.pop(key)
                     return True
                 else:
@@ -342,13 +323,14 @@ class Level:
                     )
                     amount = self.text_cache[key]["amount"]
                     if not await self.check_level_up(message):
-                        await self.bot.db.execute(
+                        xp = await self.bot.db.execute(
                             """INSERT INTO text_levels (guild_id,user_id,xp,msgs) VALUES($1,$2,$3,$4) ON CONFLICT(guild_id,user_id) DO UPDATE SET xp = text_levels.xp + excluded.xp, msgs = text_levels.msgs + excluded.msgs RETURNING xp""",
                             message.guild.id,
                             message.author.id,
                             added_xp,
                             amount,
                         )
+                        self.ranking.update(message.guild.id, message.author.id, xp)
                         self.text_cache.pop(key)
                     return True
                 else:
@@ -412,18 +394,25 @@ class Level:
             for t in as_completed(tasks):
                 await t
 
-    async def get_rank(self, guild: Guild, member: Member, as_tuple: Optional[bool] = False) -> dict:
-        data = [d.user_id for d in await self.bot.db.fetch("""SELECT user_id FROM text_levels WHERE guild_id = $1 ORDER BY xp ASC""", guild.id)]
-        d = {m.id: await self.get_statistics(m) for m in guild.members}
-        d = dict(sorted(d.items(), key=lambda x: x[1][0], reverse=True))
+    async def get_rank(self, guild: Guild, member: Member, as_tuple: Optional[bool] = False) -> Union[dict, tuple]:
         if as_tuple:
-            try:
-                keys = list(d.keys())
-                return keys.index(member.id) + 1, len(keys)
-            except Exception:
-                return "N/A", len(keys)
-        else:
-            return d
+            xp, _ = await self.get_statistics(member)
+            rank, total = await self.ranking.rank(guild.id, xp)
+            if not xp:
+                return "N/A", total
+            return rank, total
+        d = {}
+        for row in await self.ranking.leaderboard(guild.id):
+            d[row.user_id] = [int(row.xp), int(row.msgs or 0)]
+        # messages that haven't been written yet still count towards the leaderboard
+        if pending := {k: v for k, v in self.text_cache.items() if k.startswith(f"{guild.id}-")}:
+            settings = await self.get_settings(guild)
+            for key, value in pending.items():
+                user_id = int(key.split("-")[1])
+                d.setdefault(user_id, [0, 0])
+                d[user_id][0] += sum([self.add_xp(m, settings) for m in value["messages"]])
+                d[user_id][1] += len(value["messages"])
+        return dict(sorted(d.items(), key=lambda x: x[1][0], reverse=True))
 
 
     async def get_member_xp(self, ctx: Context, member: Member) -> Embed:
@@ -0,0 +1,69 @@
+from typing import Dict, Optional
+
+from discord import Client, Message
+from loguru import logger
+
+DEFAULT_PREFIX = ","
+
+
+class Prefixes:
+    """
+    Guild and user prefixes kept in memory so resolving the prefix of a
+    message never has to query the database.
+
+    Everything that has a prefix set is loaded once on startup, afterwards
+    the prefix commands update the maps through ``set_guild``/``set_user``.
+    """
+
+    def __init__(self, bot: Client, default: str = DEFAULT_PREFIX):
+        self.bot = bot
+        self.default = default
+        self.guilds: Dict[int, str] = {}
+        self.users: Dict[int, str] = {}
+        self.loaded = False
+
+    async def load(self):
+        guilds = await self.bot.db.fetch(
+            """SELECT guild_id, prefix FROM config WHERE prefix IS NOT NULL""", cached=False
+        )
+        users = await self.bot.db.fetch(
+            """SELECT user_id, prefix FROM user_config WHERE prefix IS NOT NULL""", cached=False
+        )
+        self.guilds = {row.guild_id: row.prefix for row in guilds if row.prefix}
+        self.users = {row.user_id: row.prefix for row in users if row.prefix}
+        self.loaded = True
+        logger.info(f"Loaded {len(self.guilds)} guild prefixes and {len(self.users)} user prefixes")
+
+    async def guild(self, guild_id: int) -> str:
+        if not self.loaded and guild_id not in self.guilds:
+            if prefix := await self.bot.db.fetchval("""SELECT prefix FROM config WHERE guild_id = $1""", guild_id):
+                self.guilds[guild_id] = prefix
+        return self.guilds.get(guild_id, self.default)
+
+    async def user(self, user_id: int) -> Optional[str]:
+        if not self.loaded and user_id not in self.users:
+            if prefix := await self.bot.db.fetchval("""SELECT prefix FROM user_config WHERE user_id = $1""", user_id):
+                self.users[user_id] = prefix
+        return self.users.get(user_id)
+
+    def set_guild(self, guild_id: int, prefix: Optional[str]):
+        if prefix:
+            self.guilds[guild_id] = prefix
+        else:
+            self.guilds.pop(guild_id, None)
+
+    def set_user(self, user_id: int, prefix: Optional[str]):
+        if prefix:
+            self.users[user_id] = prefix
+        else:
+            self.users.pop(user_id, None)
+
+    async def resolve(self, message: Message) -> str:
+        """
+        :return : the user's own prefix when the message starts with it, otherwise the guild's
+        """
+        if (user := await self.user(message.author.id)) and message.content.strip().startswith(user):
+            return user
+        if message.guild is None:
+            return self.default
+        return await self.guild(message.guild.id)
@@ -0,0 +1,142 @@
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Deque, Dict, List, Optional, Tuple
+
+from discord import Client
+from loguru import logger
+from sortedcontainers import SortedList
+
+RANK_QUERY = """SELECT (SELECT COUNT(*) FROM text_levels WHERE guild_id = $1 AND xp > $2) + 1 AS rank, (SELECT COUNT(*) FROM text_levels WHERE guild_id = $1) AS total"""
+LEADERBOARD_QUERY = """SELECT user_id, xp, msgs, RANK() OVER (ORDER BY xp DESC) AS rank FROM text_levels WHERE guild_id = $1 ORDER BY xp DESC LIMIT $2"""
+
+
+class GuildRanking:
+    """
+    Every member of one guild ordered by xp, highest first.
+
+    Entries are stored as ``(-xp, user_id)`` so the number of members ahead of
+    someone is a single bisect.
+    """
+
+    __slots__ = ("entries", "xp", "used")
+
+    def __init__(self, rows: List[Tuple[int, int]]):
+        self.xp: Dict[int, int] = {user_id: int(xp) for user_id, xp in rows}
+        self.entries = SortedList((-xp, user_id) for user_id, xp in self.xp.items())
+        self.used = monotonic()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def set(self, user_id: int, xp: int):
+        if (old := self.xp.get(user_id)) is not None:
+            self.entries.remove((-old, user_id))
+        self.xp[user_id] = xp
+        self.entries.add((-xp, user_id))
+
+    def remove(self, user_id: int):
+        if (old := self.xp.pop(user_id, None)) is not None:
+            self.entries.remove((-old, user_id))
+
+    def rank(self, xp: int) -> int:
+        # user ids are positive so (-xp, 0) sorts before everyone on the same xp
+        return self.entries.bisect_left((-xp, 0)) + 1
+
+
+class LevelRanking:
+    """
+    Rank lookups for text levels.
+
+    Ranks are answered with count queries over the ``(guild_id, xp)`` index
+    instead of reading the whole guild. Guilds that are looked up often are
+    additionally kept in memory as a sorted list, which is kept current by the
+    xp writes in ``Level`` and dropped whenever a command rewrites the table.
+    """
+
+    def __init__(
+        self,
+        bot: Client,
+        hot_after: int = 3,
+        window: float = 300.0,
+        idle: float = 600.0,
+        max_guilds: int = 32,
+    ):
+        self.bot = bot
+        self.hot_after = hot_after
+        self.window = window
+        self.idle = idle
+        self.max_guilds = max_guilds
+        self.guilds: "OrderedDict[int, GuildRanking]" = OrderedDict()
+        self.lookups: Dict[int, Deque[float]] = {}
+        self.generations: Dict[int, int] = {}
+
+    def track(self, guild_id: int) -> bool:
+        """
+        Record a lookup and return whether the guild has become hot
+        """
+        now = monotonic()
+        lookups = self.lookups.setdefault(guild_id, deque(maxlen=self.hot_after))
+        lookups.append(now)
+        return len(lookups) == self.hot_after and now - lookups[0] <= self.window
+
+    async def load(self, guild_id: int) -> Optional[GuildRanking]:
+        generation = self.generations.get(guild_id, 0)
+        rows = await self.bot.db.fetch(
+            """SELECT user_id, xp FROM text_levels WHERE guild_id = $1""",
+            guild_id,
+            cached=False,
+        )
+        # a command rewrote the guild while it was being read
+        if self.generations.get(guild_id, 0) != generation:
+            return None
+        ranking = self.guilds[guild_id] = GuildRanking([(r.user_id, r.xp) for r in rows])
+        self.guilds.move_to_end(guild_id)
+        self.evict()
+        logger.debug(f"Loaded {len(ranking)} text level entries for {guild_id} into memory")
+        return ranking
+
+    async def get(self, guild_id: int) -> Optional[GuildRanking]:
+        if ranking := self.guilds.get(guild_id):
+            self.guilds.move_to_end(guild_id)
+            ranking.used = monotonic()
+            return ranking
+        if self.track(guild_id):
+            return await self.load(guild_id)
+        return None
+
+    def evict(self):
+        cutoff = monotonic() - self.idle
+        for guild_id in [g for g, r in self.guilds.items() if r.used < cutoff]:
+            self.guilds.pop(guild_id, None)
+        while len(self.guilds) > self.max_guilds:
+            self.guilds.popitem(last=False)
+        for guild_id in [g for g, times in self.lookups.items() if times[-1] < monotonic() - self.window]:
+            self.lookups.pop(guild_id, None)
+
+    def update(self, guild_id: int, user_id: int, xp: Optional[int]):
+        """
+        Apply the xp a write returned to the in memory copy, if there is one
+        """
+        if xp is None or (ranking := self.guilds.get(guild_id)) is None:
+            return
+        ranking.set(user_id, int(xp))
+
+    def invalidate(self, guild_id: int):
+        """
+        Drop the in memory copy after a command wrote to the guild's rows directly
+        """
+        self.generations[guild_id] = self.generations.get(guild_id, 0) + 1
+        self.guilds.pop(guild_id, None)
+
+    async def rank(self, guild_id: int, xp: int) -> Tuple[int, int]:
+        """
+        :param xp : XP(int) of the member
+        :return   : (rank, total) where rank counts the members with more xp
+        """
+        if ranking := await self.get(guild_id):
+            return ranking.rank(xp), len(ranking)
+        data = await self.bot.db.fetchrow(RANK_QUERY, guild_id, xp)
+        return data.rank, data.total
+
+    async def leaderboard(self, guild_id: int, limit: int = 1000) -> list:
+        return await self.bot.db.fetch(LEADERBOARD_QUERY, guild_id, limit)
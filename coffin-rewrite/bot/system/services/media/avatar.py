@@ -1,48 +1,261 @@
 from system.worker import offloaded
 from io import BytesIO
 from PIL.Image import Image
-from typing import Union
-from discord import User, Member
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from discord import Asset, User, Member
+from collections import OrderedDict
+from dataclasses import dataclass
+from struct import Struct
+from urllib.parse import urlsplit
+from xxhash import xxh3_64_hexdigest
+from loguru import logger
+import asyncio
+import random
+import re
+import string
 import aiohttp
 
-async def get_dominant_color(u: Union[Member, User, str]) -> str:
-    @offloaded
-    def get(url: str) -> str:
-        from colorgram_rs import get_dominant_color as get_dom
-
-        return get_dom(url)
-
-    if isinstance(
-        u,
-        (
-            Member,
-            User,
-        ),
-    ):
-        _ = await get(await u.display_avatar.read())
-    else:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(u) as resp:
-                _u = await resp.read()
-        _ = await get(_u)
-    return f"#{_}"
+Source = Union[Member, User, Asset, bytes, BytesIO, Image, str]
+
+DISCORD_CDN = frozenset({"cdn.discordapp.com", "media.discordapp.net"})
+# the cdn paths that end in the asset's own hash, so the url alone identifies the image,
+# attachments end in their filename and are keyed by their content instead
+ASSET_PATH = re.compile(
+    r"^/(?:avatars/\d+|guilds/\d+/users/\d+/avatars|banners/\d+|icons/\d+|embed/avatars)/(\w+)(?:\.\w+)?$"
+)
+
+
+@dataclass
+class Features:
+    color: Optional[int] = None
+    hash: Optional[int] = None
+
+    # flags, 0xRRGGBB, 64 bit average hash
+    layout = Struct(">BIQ")
+
+    def pack(self) -> bytes:
+        flags = (self.color is not None) | (self.hash is not None) << 1
+        return self.layout.pack(flags, self.color or 0, self.hash or 0)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Features":
+        flags, color, hash = cls.layout.unpack(data)
+        return cls(color if flags & 1 else None, hash if flags & 2 else None)
+
+    def merge(self, other: "Features") -> "Features":
+        return Features(
+            self.color if self.color is not None else other.color,
+            self.hash if self.hash is not None else other.hash,
+        )
+
+    def has(self, color: bool, hash: bool) -> bool:
+        return (not color or self.color is not None) and (not hash or self.hash is not None)
+
 
 @offloaded
-def get_hash(image: Union[bytes, Image, BytesIO]):
-    import random
-    import string
+def compute(images: List[bytes], color: bool, hash: bool) -> List[Tuple[Optional[int], Optional[int]]]:
+    from colorgram_rs import get_dominant_color as get_dom
     from PIL import Image
-    from io import BytesIO
     import imagehash
 
-    def unique_id(lenght: int = 6):
-        return "".join(random.choices(string.ascii_letters + string.digits, k=lenght))
+    results = []
+    for image in images:
+        dominant = average = None
+        try:
+            if color:
+                dominant = int(str(get_dom(image)).lstrip("#"), 16)
+            if hash:
+                average = int(str(imagehash.average_hash(image=Image.open(BytesIO(image)), hash_size=8)), 16)
+        except Exception:
+            pass
+        results.append((dominant, average))
+    return results
+
+
+class ImageFeatures:
+    """
+    Dominant colours and average hashes of images, remembered by the Discord
+    asset key or a hash of the image itself so a popular avatar is only
+    downloaded and processed once.
+
+    Lookups go through an in-memory LRU of ``maxsize`` entries, then Redis
+    (``redis`` is set once the bot has connected) with a single ``MGET`` per
+    batch, and whatever is still missing is downloaded concurrently and
+    computed in one offloaded call. Redis holds 13 packed bytes per image
+    for ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int = 8192, ttl: int = 60 * 60 * 24 * 30, prefix: str = "imgf:", concurrency: int = 8):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prefix = prefix
+        self.redis: Optional[Any] = None
+        self.entries: "OrderedDict[str, Features]" = OrderedDict()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.hits = 0
+        self.misses = 0
+        self.computed = 0
+
+    def __repr__(self) -> str:
+        return f"<ImageFeatures size={len(self.entries)} hits={self.hits} misses={self.misses}>"
+
+    @staticmethod
+    def identify(source: Source) -> Optional[str]:
+        """
+        The cache key for ``source`` when it can be known without downloading it.
+        """
+
+        if isinstance(source, (Member, User)):
+            source = source.display_avatar
+        if isinstance(source, Asset):
+            return f"asset:{source.key}"
+        if isinstance(source, str):
+            url = urlsplit(source)
+            if url.hostname in DISCORD_CDN and (match := ASSET_PATH.match(url.path)):
+                return f"asset:{match.group(1)}"
+            return None
+        return f"content:{xxh3_64_hexdigest(ImageFeatures.content(source))}"
+
+    @staticmethod
+    def content(source: Union[bytes, BytesIO, Image]) -> bytes:
+        if isinstance(source, BytesIO):
+            return source.getvalue()
+        if isinstance(source, Image):
+            buffer = BytesIO()
+            source.save(buffer, format="PNG")
+            return buffer.getvalue()
+        return source
+
+    async def read(self, source: Source, session: aiohttp.ClientSession) -> bytes:
+        async with self.semaphore:
+            if isinstance(source, (Member, User)):
+                return await source.display_avatar.read()
+            if isinstance(source, Asset):
+                return await source.read()
+            if isinstance(source, str):
+                async with session.get(source) as response:
+                    return await response.read()
+            return self.content(source)
+
+    def get(self, key: str) -> Optional[Features]:
+        if (features := self.entries.get(key)) is not None:
+            self.entries.move_to_end(key)
+        return features
+
+    def set(self, key: str, features: Features):
+        self.entries[key] = features
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    async def load(self, keys: List[str]) -> Dict[str, Features]:
+        if not keys or self.redis is None:
+            return {}
+        try:
+            values = await self.redis.mget([f"{self.prefix}{key}" for key in keys])
+        except Exception as e:
+            logger.debug(f"Image features unavailable from redis: {e}")
+            return {}
+
+        found = {}
+        for key, value in zip(keys, values):
+            if value and len(value) == Features.layout.size:
+                found[key] = Features.unpack(value)
+                self.set(key, found[key])
+        return found
+
+    async def store(self, entries: Dict[str, Features]):
+        for key, features in entries.items():
+            self.set(key, features)
+        if not entries or self.redis is None:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, features in entries.items():
+                    pipe.set(f"{self.prefix}{key}", features.pack(), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to store image features: {e}")
+
+    async def lookup(self, keys: List[Optional[str]], color: bool, hash: bool) -> List[Optional[Features]]:
+        found: List[Optional[Features]] = [self.get(key) if key else None for key in keys]
+        missing = list({key for key, features in zip(keys, found) if key and not (features and features.has(color, hash))})
+        if loaded := await self.load(missing):
+            found = [
+                loaded[key].merge(features) if key in loaded and features else loaded.get(key, features)
+                for key, features in zip(keys, found)
+            ]
+        return found
+
+    async def get_many(self, sources: Sequence[Source], color: bool = True, hash: bool = True) -> List[Features]:
+        """
+        The features of every source, only the images no tier knows about
+        are downloaded and they're all computed in a single batch.
+        """
+
+        keys = [self.identify(source) for source in sources]
+        found = await self.lookup(keys, color, hash)
+        wanted = [i for i, features in enumerate(found) if not (features and features.has(color, hash))]
+        self.hits += len(sources) - len(wanted)
+        self.misses += len(wanted)
+        if not wanted:
+            return found
+
+        async with aiohttp.ClientSession() as session:
+            images = await asyncio.gather(
+                *(self.read(sources[i], session) for i in wanted), return_exceptions=True
+            )
+
+        # urls off the cdn are only known by their content once downloaded
+        for i, image in zip(wanted, images):
+            if keys[i] is None and isinstance(image, bytes):
+                keys[i] = f"content:{xxh3_64_hexdigest(image)}"
+        known = await self.lookup([keys[i] for i in wanted], color, hash)
+
+        pending: Dict[str, bytes] = {}
+        for i, image, features in zip(wanted, images, known):
+            if features and features.has(color, hash):
+                found[i] = features
+            elif isinstance(image, bytes) and keys[i]:
+                pending.setdefault(keys[i], image)
+
+        computed: Dict[str, Features] = {}
+        if pending:
+            results = await compute(list(pending.values()), color, hash)
+            self.computed += len(results)
+            for key, (dominant, average) in zip(pending, results):
+                computed[key] = Features(dominant, average).merge(self.get(key) or Features())
+            await self.store({key: features for key, features in computed.items() if features.has(color, hash)})
+
+        for i in wanted:
+            if keys[i] in computed:
+                found[i] = computed[keys[i]]
+        return [features or Features() for features in found]
+
+    async def color(self, source: Source) -> Optional[int]:
+        return (await self.get_many([source], hash=False))[0].color
+
+    async def hash(self, source: Source) -> Optional[int]:
+        return (await self.get_many([source], color=False))[0].hash
+
+
+features = ImageFeatures()
+
+
+def unique_id(lenght: int = 6):
+    return "".join(random.choices(string.ascii_letters + string.digits, k=lenght))
+
+
+async def get_dominant_color(u: Union[Member, User, str]) -> str:
+    if (color := await features.color(u)) is None:
+        raise ValueError("Unable to get the dominant color of this image")
+    return f"#{color:06x}"
 
-    if isinstance(image, bytes):
-        image = BytesIO(image)
 
-    result = str(imagehash.average_hash(image=Image.open(image), hash_size=8))
-    if result == "0000000000000000":
+async def get_hash(image: Union[bytes, Image, BytesIO]) -> str:
+    if (result := await features.hash(image)) is None:
+        raise ValueError("Unable to hash this image")
+    # blank images would all collide, each one gets its own id instead
+    if result == 0:
         return unique_id(16)
-    else:
-        return result
\ No newline at end of file
+    return f"{result:016x}"
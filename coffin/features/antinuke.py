@@ -7,6 +7,7 @@ from collections import defaultdict
 from discord.ext import commands
 
 from typing import (
+  Coroutine,
   List,
   Literal,
   Optional,
@@ -16,6 +17,29 @@ from structure import (
   Coffin,
   Context
 )
+from structure.managers import getLogger
+
+logger = getLogger(__name__)
+
+ACTIONS = frozenset(
+  [
+    "ban",
+    "kick",
+    "role_delete",
+    "role_create",
+    "channel_delete",
+    "channel_create",
+    "webhook_create",
+    "webhook_delete",
+    "sticker_create",
+    "sticker_delete",
+    "emoji_create",
+    "emoji_delete",
+    "member_role_update",
+    "role_update",
+    "member_prune",
+  ]
+)
 
 class Antinuke(commands.Cog):
   """
@@ -61,23 +85,48 @@ class Antinuke(commands.Cog):
       case "kick":
         await entry.user.kick(reason=reason)
       case "strip":
-        await self.bot.db.execute(
-          """
-          INSERT INTO role_restore VALUES ($1,$2,$3)
-          ON CONFLICT (guild_id, user_id) DO UPDATE SET
-          roles = $3
-          """,
-          entry.guild.id,
-          entry.user.id,
-          list(map(lambda r: r.id, entry.user.roles)),
-        )
-        await entry.user.edit(
-          roles=[r for r in entry.user.roles if not r.is_assignable()],
-          reason=reason,
+        await asyncio.gather(
+          self.bot.db.execute(
+            """
+            INSERT INTO role_restore VALUES ($1,$2,$3)
+            ON CONFLICT (guild_id, user_id) DO UPDATE SET
+            roles = $3
+            """,
+            entry.guild.id,
+            entry.user.id,
+            list(map(lambda r: r.id, entry.user.roles)),
+          ),
+          entry.user.edit(
+            roles=[r for r in entry.user.roles if not r.is_assignable()],
+            reason=reason,
+          )
         )
       case _:
           pass
 
+  async def respond(self, entry: discord.AuditLogEntry, *remediations: Coroutine) -> bool:
+    """
+    Undo the action and punish the user at the same time, then record how long it took
+    """
+    results = await asyncio.gather(
+      self.punish(entry=entry), *remediations, return_exceptions=True
+    )
+    entry.punished_at = discord.utils.utcnow() - entry.created_at
+    self.bot.antinuke.record(entry.punished_at.total_seconds())
+
+    for result in results:
+      if isinstance(result, Exception):
+        logger.warning(f"Antinuke {entry.action.name} in {entry.guild.id} failed: {result}")
+
+    return not isinstance(results[0], Exception)
+
+  async def remediate(self, entry: discord.AuditLogEntry):
+    if getattr(entry.target, "delete", None):
+      await entry.target.delete()
+    elif entry.action.name == "webhook_create":
+      # the webhook id is all that's needed, no reason to list every webhook in the guild
+      await self.bot.http.delete_webhook(entry.target.id, reason="Antinuke: Webhook Create")
+
   async def send_report(self: "Antinuke", entry: discord.AuditLogEntry, reason: str):
     embed = (
       discord.Embed(
@@ -91,7 +140,7 @@ class Antinuke(commands.Cog):
       )
       .add_field(name="Reason", value=reason, inline=False)
       .set_footer(
-        text=f"User was punished in {humanize.precisedelta(entry.punished_at)}"
+        text=f"User was punished in {humanize.precisedelta(entry.punished_at, minimum_unit='milliseconds')}"
       )
     )
     if channel := entry.logs:
@@ -104,26 +153,8 @@ class Antinuke(commands.Cog):
 
   @commands.Cog.listener()
   async def on_audit_log_entry_create(self, entry: discord.AuditLogEntry):
-    actions = [
-      "ban",
-      "kick",
-      "role_delete",
-      "role_create",
-      "channel_delete",
-      "channel_create",
-      "webhook_create",
-      "webhook_delete",
-      "sticker_create",
-      "sticker_delete",
-      "emoji_create",
-      "emoji_delete",
-      "member_role_update",
-      "role_update",
-      "member_prune",
-    ]
-
     if (
-      entry.action.name not in actions
+      entry.action.name not in ACTIONS
       or not isinstance(entry.user, discord.Member)
       or entry.user_id == self.bot.user.id
       or not entry.user.is_punishable()
@@ -131,46 +162,43 @@ class Antinuke(commands.Cog):
     ):
       return
 
-    result = await self.bot.db.fetchrow(
-      "SELECT * FROM antinuke WHERE guild_id = $1", entry.guild.id
-    )
-    if not result or not (
-      modules := json.loads(result["modules"]).get(entry.action.name)
+    if not (policy := self.bot.antinuke.policy(entry.guild.id)) or not (
+      module := policy.module(entry.action.name)
     ):
       return
 
-    owners, whitelist = result["owners"], result["whitelisted"]
-    if entry.user.id in owners or entry.user.id in whitelist:
+    if entry.user.id in policy.trusted:
       return
 
-    if entry.action.name.endswith("create"):
-      if getattr(entry.target, "delete", None):
-        await entry.target.delete()
-      else:
-        match entry.action.name:
-          case "webhook_create":
-            if webhook := next(
-              iter([w for w in await entry.guild.webhooks() if w.id == entry.target.id]),
-              None 
-            ):
-              await webhook.delete()
-          case _:
-            ...
+    # start undoing the action straight away, it doesn't have to wait for the lock
+    remediation = (
+      asyncio.ensure_future(self.remediate(entry))
+      if entry.action.name.endswith("create")
+      else None
+    )
 
     async with self.locks[f"{entry.guild.id}-{entry.user.id}"]:
       member = entry.guild.get_member(entry.user.id)
-      if not member or not member.is_dangerous():
+      if (
+        not member
+        or not member.is_dangerous()
+        or not self.bot.antinuke.exceeded(
+          entry.guild.id, entry.user.id, entry.action.name, module.get("threshold", 1)
+        )
+      ):
+        if remediation:
+          await asyncio.gather(remediation, return_exceptions=True)
         return
 
-      entry.punishment = modules["punishment"]
-      entry.logs = entry.guild.get_channel(result["logs"])
-      entry.punished_at = discord.utils.utcnow() - entry.created_at
+      entry.punishment = module["punishment"]
+      entry.logs = entry.guild.get_channel(policy.logs)
 
       if not entry.action.name.endswith("update"):
-        await self.punish(entry=entry)
-        return await self.send_report(
-          entry=entry, reason=entry.action.name.replace("_", " ").title()
-        )
+        if await self.respond(entry, *filter(None, [remediation])):
+          return await self.send_report(
+            entry=entry, reason=entry.action.name.replace("_", " ").title()
+          )
+        return
 
       self.bot.dispatch(entry.action.name, entry=entry)
 
@@ -183,29 +211,35 @@ class Antinuke(commands.Cog):
         if self.dangerous_role(r) and r.is_assignable()
       ]
       if roles:
-        await self.punish(entry=entry)
-        await entry.target.remove_roles(*roles, reason="Restoring given roles")
+        await self.respond(
+          entry, entry.target.remove_roles(*roles, reason="Restoring given roles")
+        )
         return await self.send_report(
           entry=entry, reason="Gave malicious roles to a member"
         )
 
   @commands.Cog.listener()
   async def on_role_update(self, entry: discord.AuditLogEntry):
+    remediations = []
     if not self.dangerous_role(entry.changes.before) and self.dangerous_role(
       entry.changes.after
     ):
-      await entry.target.edit(
-        permissions=entry.changes.before.permissions, reason="Restoring role"
+      remediations.append(
+        entry.target.edit(
+          permissions=entry.changes.before.permissions, reason="Restoring role"
+        )
       )
 
     elif hasattr(entry.changes.after, "mentionable"):
       if not entry.changes.before.mentionable and entry.changes.after.mentionable:
-        await entry.target.edit(
-          mentionable=entry.changes.before.mentionable,
-          reason="Restoring role",
+        remediations.append(
+          entry.target.edit(
+            mentionable=entry.changes.before.mentionable,
+            reason="Restoring role",
+          )
         )
 
-    await self.punish(entry)
+    await self.respond(entry, *remediations)
     return await self.send_report(entry=entry, reason="Maliciously edited a role")
 
   @commands.group(aliases=["an", "aw", "antiwizz", "anti"], invoke_without_command=True)
@@ -401,6 +435,7 @@ class Antinuke(commands.Cog):
       description="\n".join(
         [
           f"<:check:1334239511269605437> {a.replace('_', ' ').title()} - {p.get('punishment')}"
+          + (f" ({p['threshold']} in {int(self.bot.antinuke.counter.window)}s)" if p.get("threshold", 1) > 1 else "")
           for a, p in modules.items()
         ]
       ),
@@ -413,6 +448,61 @@ class Antinuke(commands.Cog):
 
     return await ctx.send(embed=embed)
 
+  @antinuke.command(name="threshold")
+  @commands.antinuke_owner()
+  async def antinuke_threshold(
+    self, ctx: Context, module: str, threshold: commands.Range[int, 1, 50]
+  ):
+    """
+    Only punish after a module is triggered this many times in a short window
+    """
+    modules = await self.bot.db.fetchval("SELECT modules FROM antinuke WHERE guild_id = $1", ctx.guild.id)
+    if modules is None:
+      return await ctx.alert(
+        "Antinuke has **not** been configured. Please use the `antinuke setup` command"
+      )
+
+    modules = json.loads(modules)
+    module = module.lower().replace(" ", "_")
+    if module not in modules:
+      return await ctx.alert(f"Antinuke **{module.replace('_', ' ')}** is not enabled")
+
+    modules[module]["threshold"] = threshold
+    await self.bot.db.execute(
+      "UPDATE antinuke SET modules = $1 WHERE guild_id = $2",
+      json.dumps(modules),
+      ctx.guild.id,
+    )
+
+    return await ctx.confirm(
+      f"Antinuke **{module.replace('_', ' ')}** now punishes after `{threshold}` actions"
+    )
+
+  @antinuke.command(name="latency")
+  @commands.antinuke_owner()
+  async def antinuke_latency(self, ctx: Context):
+    """
+    How fast the antinuke has been reacting
+    """
+    metrics = self.bot.antinuke.metrics
+    if not metrics.reactions:
+      return await ctx.alert("The antinuke hasn't had to react yet")
+
+    return await ctx.send(
+      embed=discord.Embed(
+        color=self.bot.color,
+        title="Antinuke Latency",
+        description="\n".join(
+          [
+            f"**p50:** `{metrics.p50:.0f}ms`",
+            f"**p95:** `{metrics.p95:.0f}ms`",
+            f"**p99:** `{metrics.p99:.0f}ms`",
+            f"**Slowest:** `{metrics.max:.0f}ms`",
+          ]
+        ),
+      ).set_footer(text=f"Across the last {len(self.bot.antinuke.latency.samples):,} reactions")
+    )
+
   @antinuke.group(name="botadd", invoke_without_command=True)
   async def antinuke_botadd(self, ctx: Context):
     """
@@ -435,7 +525,7 @@ class Antinuke(commands.Cog):
       )
 
     modules = json.loads(modules)
-    modules[ctx.command.parent.name] = {"punishment": punishment}
+    modules.setdefault(ctx.command.parent.name, {})["punishment"] = punishment
 
     await self.bot.db.execute(
       "UPDATE antinuke SET modules = $1 WHERE guild_id = $2",
@@ -496,7 +586,7 @@ class Antinuke(commands.Cog):
       )
 
     modules = json.loads(modules)
-    modules[ctx.command.parent.name] = {"punishment": punishment}
+    modules.setdefault(ctx.command.parent.name, {})["punishment"] = punishment
 
     await self.bot.db.execute(
       "UPDATE antinuke SET modules = $1 WHERE guild_id = $2",
@@ -557,7 +647,7 @@ class Antinuke(commands.Cog):
       )
 
     modules = json.loads(modules)
-    modules[ctx.command.parent.name] = {"punishment": punishment}
+    modules.setdefault(ctx.command.parent.name, {})["punishment"] = punishment
 
     await self.bot.db.execute(
       "UPDATE antinuke SET modules = $1 WHERE guild_id = $2",
@@ -618,7 +708,7 @@ class Antinuke(commands.Cog):
       )
 
     modules = json.loads(modules)
-    modules[ctx.command.parent.name] = {"punishment": punishment}
+    modules.setdefault(ctx.command.parent.name, {})["punishment"] = punishment
 
     await self.bot.db.execute(
       "UPDATE antinuke SET modules = $1 WHERE guild_id = $2",
@@ -686,7 +776,7 @@ class Antinuke(commands.Cog):
       modules.pop("channel_delete", None)
       await ctx.confirm("Antinuke **channel delete** is now disabled")
     else:
-      modules["channel_delete"] = {"punishment": punishment}
+      modules.setdefault("channel_delete", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **channel delete** is now enabled - `{punishment}`"
       )
@@ -717,7 +807,7 @@ class Antinuke(commands.Cog):
       modules.pop("channel_create", None)
       await ctx.confirm("Antinuke **channel create** is now disabled")
     else:
-      modules["channel_create"] = {"punishment": punishment}
+      modules.setdefault("channel_create", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **channel create** is now enabled - `{punishment}`"
       )
@@ -751,7 +841,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["member_role_update"] = {"punishment": punishment}
+      modules.setdefault("member_role_update", {})["punishment"] = punishment
       await ctx.confirm(f"Antinuke **role give** is now enabled - `{punishment}`")
     else:
       if modules.get("member_role_update"):
@@ -782,7 +872,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["role_update"] = {"punishment": punishment}
+      modules.setdefault("role_update", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **role update** is now enabled - `{punishment}`"
       )
@@ -815,7 +905,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["role_create"] = {"punishment": punishment}
+      modules.setdefault("role_create", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **role create** is now enabled - `{punishment}`"
       )
@@ -848,7 +938,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["role_delete"] = {"punishment": punishment}
+      modules.setdefault("role_delete", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **role delete** is now enabled - `{punishment}`"
       )
@@ -888,7 +978,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["webhook_delete"] = {"punishment": punishment}
+      modules.setdefault("webhook_delete", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **webhook delete** is now enabled - `{punishment}`"
       )
@@ -923,7 +1013,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["webhook_create"] = {"punishment": punishment}
+      modules.setdefault("webhook_create", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **webhook create** is now enabled - `{punishment}`"
       )
@@ -965,7 +1055,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["emoji_create"] = {"punishment": punishment}
+      modules.setdefault("emoji_create", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **emoji create** is now enabled - `{punishment}`"
       )
@@ -998,7 +1088,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["emoji_delete"] = {"punishment": punishment}
+      modules.setdefault("emoji_delete", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **emoji delete** is now enabled - `{punishment}`"
       )
@@ -1038,7 +1128,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["sticker_create"] = {"punishment": punishment}
+      modules.setdefault("sticker_create", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **sticker create** is now enabled - `{punishment}`"
       )
@@ -1073,7 +1163,7 @@ class Antinuke(commands.Cog):
 
     modules = json.loads(modules)
     if punishment != "none":
-      modules["sticker_delete"] = {"punishment": punishment}
+      modules.setdefault("sticker_delete", {})["punishment"] = punishment
       await ctx.confirm(
         f"Antinuke **sticker delete** is now enabled - `{punishment}`"
       )
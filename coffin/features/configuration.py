@@ -106,10 +106,7 @@ class Configuration(Cog):
   @Cog.listener()
   async def on_message(self, message: discord.Message):
     if message.guild:
-      if result := await self.bot.db.fetchrow(
-        "SELECT * FROM bumpreminder WHERE guild_id = $1",
-        message.guild.id
-      ):
+      if result := self.bot.settings.get("bumpreminder", message.guild.id):
         if (
           message.author.id == 302050872383242240
           and len(message.embeds) == 1
@@ -142,14 +139,7 @@ class Configuration(Cog):
   async def on_image_only(self, message: discord.Message):
     if message.guild:
       if not message.attachments: 
-        if await self.bot.db.fetchrow(
-          """
-          SELECT * FROM imgonly 
-          WHERE guild_id = $1 
-          AND channel_id = $2
-          """,
-          message.guild.id, message.channel.id
-        ):
+        if self.bot.settings.has("imgonly", message.guild.id, message.channel.id):
           delay = 5 if ratelimiter(bucket="imgonly", key=f"{message.channel.id}", rate=2, per=5) else None
           await message.delete(delay=delay)
 
@@ -203,10 +193,7 @@ class Configuration(Cog):
   async def on_settings(self, message: Message):
     if not message.author.bot:
       if message.guild:
-        if settings := await self.bot.db.fetchrow(
-          "SELECT * FROM server_settings WHERE guild_id = $1",
-          message.guild.id,
-        ):
+        if settings := self.bot.settings.get("server_settings", message.guild.id):
           if settings.heximage:
             if match := re.search(self.hex_regex, message.content):
               if not ratelimiter(
@@ -274,9 +261,7 @@ class Configuration(Cog):
           not message.author.guild_permissions.administrator
           and not message.author.bot
         ):
-          if result := await self.bot.db.fetchrow(
-            "SELECT * FROM antispam WHERE guild_id = $1", message.guild.id
-          ):
+          if result := self.bot.settings.get("antispam", message.guild.id):
             if message.author.id not in result.whitelisted:
               async with self.locks[message.guild.id]:
                 if not message.author.is_timed_out():
@@ -476,10 +461,10 @@ class Configuration(Cog):
       """
       End a giveaway
       """
-      if not (task := self.bot.giveaways.get(message_id)):
+      if not self.bot.giveaways.get(message_id):
         return await ctx.alert("Could not find giveaway")
 
-      task.cancel()
+      self.bot.scheduler.cancel(("giveaway", message_id))
       del self.bot.giveaways[message_id]
       gw = await self.bot.db.fetchrow(
         "SELECT * FROM giveaway WHERE message_id = $1", message_id
@@ -599,10 +584,9 @@ class Configuration(Cog):
       False,
     )
 
-    self.bot.giveaways[message.id] = asyncio.ensure_future(
-      self.bot.giveaway_task(
-        message.id, channel.id, end_at.replace(tzinfo=datetime.timezone.utc)
-      )
+    self.bot.giveaways[message.id] = end_at
+    self.bot.scheduler.schedule(
+      ("giveaway", message.id), end_at, self.bot.giveaway_task, message.id, channel.id
     )
     return await ctx.confirm(f"Started giveaway -> {message.jump_url}")
   
@@ -742,6 +726,10 @@ class Configuration(Cog):
       ending,
       message.id
     )
+    self.bot.giveaways[message.id] = ending
+    self.bot.scheduler.schedule(
+      ("giveaway", message.id), ending, self.bot.giveaway_task, message.id, gw.channel_id
+    )
     return await ctx.confirm(f"Giveaway duration edited to `{humanfriendly.format_timespan(duration)}`")
 
   @group(aliases=["br"], invoke_without_command=True)
@@ -51,10 +51,8 @@ class LastFM(Cog):
 
   @Cog.listener()
   async def on_message(self, message: Message):
-    if cmd := await self.bot.db.fetchval(
-      "SELECT command FROM lastfm.user WHERE user_id = $1", message.author.id
-    ):
-      if message.content == cmd:
+    if result := self.bot.settings.get("lastfm.user", message.author.id):
+      if result.command and message.content == result.command:
         if not ratelimiter(
           bucket=f"lf-{message.channel.id}", key="lf", rate=2, per=3
         ):
@@ -9,7 +9,8 @@ from collections import defaultdict
 from structure import (
   Coffin,
   Context,
-  AssignableRole
+  AssignableRole,
+  XPAccumulator
 )
 from typing import (
   List,
@@ -25,6 +26,13 @@ class Leveling(commands.Cog):
     self.bot = bot 
     self.locks = defaultdict(asyncio.Lock)
     self.cache = {}
+    self.xp = XPAccumulator(bot.db)
+
+  async def cog_load(self):
+    self.xp.start()
+
+  async def cog_unload(self):
+    await self.xp.close()
   
   async def remove_item(self, message: discord.Message):
     await asyncio.sleep(1.9)
@@ -52,71 +60,31 @@ class Leveling(commands.Cog):
     if message.guild and not message.author.bot: 
       cache: List[discord.Message] = self.cache.get(message.author.id, [])
       if len(cache) < 5:
-        async with self.locks[message.channel.id]:
-          if config := await self.bot.db.fetchrow("SELECT * FROM leveling.config WHERE guild_id = $1", message.guild.id):
-            cache.append(message)
-            self.cache[message.author.id] = cache 
-            asyncio.ensure_future(self.remove_item(message))
-            xp = secrets.choice(range(1, 10))
-            
-            multiplier = await self.bot.db.fetchrow(
-              """
-              SELECT * FROM leveling.multiplier
-              WHERE guild_id = $1""",
-              message.guild.id
-            )
-            
-            donator = await self.bot.db.fetchval(
-              "SELECT user_id FROM donator WHERE user_id = $1",
-              message.author.id
-            )
-            if donator:
-              xp += 4
+        if config := self.bot.settings.get("leveling.config", message.guild.id):
+          cache.append(message)
+          self.cache[message.author.id] = cache 
+          asyncio.ensure_future(self.remove_item(message))
+          xp = secrets.choice(range(1, 10))
 
-            result = await self.bot.db.fetchrow(
-              """
-              INSERT INTO leveling.members (guild_id, user_id, xp)
-              VALUES ($1,$2,$3) ON CONFLICT 
-              (guild_id, user_id) DO UPDATE SET
-              xp = leveling.members.xp + $3
-              RETURNING lvl, xp, target_xp 
-              """,
-              message.guild.id, message.author.id,
-              xp
-            ) 
+          if self.bot.settings.has("donator", message.author.id):
+            xp += 4
 
-            level: int = result.lvl
-            if result.xp >= result.target_xp:
-              level += 1
-              target_xp: int = 500*level/2
-              xp = 0
+          level = await self.xp.add(message.guild.id, message.author.id, xp)
+          if level:
+            script = await self.bot.embed.convert(
+              message.author, 
+              config.level_message, 
+              {'level': level}
+            )
+            script.pop('delete_after', None)
 
-              await self.bot.db.execute(
-                """
-                UPDATE leveling.members SET
-                target_xp = $1, xp = $2, 
-                lvl = $3 WHERE user_id = $4
-                AND guild_id = $5 
-                """,
-                target_xp, xp, level, 
-                message.author.id,
-                message.guild.id
-              )
-                
-              script = await self.bot.embed.convert(
-                message.author, 
-                config.level_message, 
-                {'level': level}
-              )
-              script.pop('delete_after', None)
+            if channel := message.guild.get_channel(config.channel_id):
+              await channel.send(**script)
+            else:
+              await message.channel.send(**script) 
 
-              if channel := message.guild.get_channel(config.channel_id):
-                await channel.send(**script)
-              else:
-                await message.channel.send(**script) 
-            
             await self.update_roles(message.author, level)
-  
+
   @commands.hybrid_command()
   async def rank(
     self, 
@@ -127,7 +95,7 @@ class Leveling(commands.Cog):
     """
     Check someone's level
     """
-    result = await self.bot.db.fetchrow(
+    result = self.xp.cached(ctx.guild.id, member.id) or await self.bot.db.fetchrow(
       """
       SELECT * FROM leveling.members
       WHERE guild_id = $1
@@ -208,6 +176,7 @@ class Leveling(commands.Cog):
     Disable the leveling system in this server
     """
     async def yes(interaction: discord.Interaction):
+      await self.xp.discard(interaction.guild.id)
       await self.bot.db.execute(
         """
         DELETE FROM leveling.config WHERE guild_id = $1;
@@ -458,6 +427,7 @@ class Leveling(commands.Cog):
     """
     Get top 10 members with the highest level
     """
+    await self.xp.flush()
     results = await self.bot.db.fetch(
       """
       SELECT * FROM leveling.members
@@ -30,18 +30,14 @@ class Logs(commands.Cog):
     self.bot = bot
     self.bot.add_view(LogsView())
 
+  def log_channel(self, guild_id: int, log_type: str) -> Optional[int]:
+    if row := self.bot.settings.get("logs", guild_id, log_type):
+      return row["channel_id"]
+
   @commands.Cog.listener("on_audit_log_entry_create")
   async def automod_events(self, entry: discord.AuditLogEntry):
     if entry.action.name in ["automod_rule_create", "automod_rule_delete"]:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "automod",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "automod"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -55,17 +51,9 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"Rule id: {entry.target.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "automod_rule_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "automod",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "automod"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -91,7 +79,7 @@ class Logs(commands.Cog):
                 value=entry.changes.after.name,
                 inline=False,
               )
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
           elif getattr(entry.changes.before, "enabled", None):
             if entry.changes.before.enabled != entry.changes.after.enabled:
               embed.title = (
@@ -99,20 +87,12 @@ class Logs(commands.Cog):
                 if entry.changes.before.enabled
                 else "Automod Rule enabled"
               )
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_audit_log_entry_create")
   async def role_events(self, entry: discord.AuditLogEntry):
     if entry.action.name in ["role_create", "role_delete"]:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "roles",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "roles"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -126,17 +106,9 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"Role id: {entry.target.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "role_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "roles",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "roles"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(color=self.bot.color, timestamp=entry.created_at)
@@ -177,15 +149,7 @@ class Logs(commands.Cog):
   @commands.Cog.listener("on_audit_log_entry_create")
   async def thread_events(self, entry: discord.AuditLogEntry):
     if entry.action.name in ["thread_create", "thread_delete"]:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "channels",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "channels"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -199,17 +163,9 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"Thread id: {entry.target.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "thread_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "channels",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "channels"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -234,7 +190,7 @@ class Logs(commands.Cog):
                 value=entry.changes.after.name,
                 inline=False,
               )
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
           elif hasattr(entry.changes.before, "locked"):
             if (
               entry.changes.before.locked
@@ -250,20 +206,12 @@ class Logs(commands.Cog):
                 value=entry.changes.after.locked,
                 inline=False,
               )
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_audit_log_entry_create")
   async def channel_events(self, entry: discord.AuditLogEntry):
     if entry.action.name in ["channel_create", "channel_delete"]:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "channels",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "channels"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -277,17 +225,9 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"Channel id: {entry.target.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "channel_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "channels",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "channels"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(color=self.bot.color, timestamp=entry.created_at)
@@ -309,20 +249,12 @@ class Logs(commands.Cog):
                 value=entry.changes.after.name,
                 inline=False,
               )
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_audit_log_entry_create")
   async def member_events(self, entry: discord.AuditLogEntry):
     if entry.action.name == "member_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "members",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "members"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -349,7 +281,7 @@ class Logs(commands.Cog):
                   entry.changes.after.timed_out_until
                 ),
               )
-            return await channel.send(silent=True, embed=embed, view=LogsView())
+            return self.bot.logs.send(channel, embed, view=LogsView())
           elif getattr(entry.changes.before, "nick", None) != getattr(
             entry.changes.after, "nick", None
           ):
@@ -378,17 +310,9 @@ class Logs(commands.Cog):
                 value=entry.changes.after.nick,
                 inline=False,
               )
-            return await channel.send(silent=True, embed=embed, view=LogsView())
+            return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "member_role_update":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "members",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "members"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -443,20 +367,12 @@ class Logs(commands.Cog):
               + add,
               inline=False,
             )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_audit_log_entry_create")
   async def ban_kick(self, entry: discord.AuditLogEntry):
     if entry.action.name in ["ban", "kick", "unban"]:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "members",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "members"):
         if channel := entry.guild.get_channel(channel_id):
             embed = (
               discord.Embed(
@@ -485,17 +401,9 @@ class Logs(commands.Cog):
               )
               .set_footer(text=f"User id: {entry.target.id}")
             )
-            return await channel.send(silent=True, embed=embed, view=LogsView())
+            return self.bot.logs.send(channel, embed, view=LogsView())
     elif entry.action.name == "bot_add":
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        entry.guild.id,
-        "members",
-      ):
+      if channel_id := self.log_channel(entry.guild.id, "members"):
         if channel := entry.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -508,19 +416,11 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"Bot id: {entry.target.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_member_remove")
   async def member_left(self, member: discord.Member):
-    if channel_id := await self.bot.db.fetchval(
-      """
-      SELECT channel_id FROM logs
-      WHERE guild_id = $1 
-      AND log_type = $2
-      """,
-      member.guild.id,
-      "member_left",
-    ):
+    if channel_id := self.log_channel(member.guild.id, "member_left"):
       if channel := member.guild.get_channel(channel_id):
         embed = (
           discord.Embed(
@@ -542,19 +442,11 @@ class Logs(commands.Cog):
             inline=False,
           )
         )
-        return await channel.send(silent=True, embed=embed, view=LogsView())
+        return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener("on_member_join")
   async def member_joined(self, member: discord.Member):
-    if channel_id := await self.bot.db.fetchval(
-      """
-      SELECT channel_id FROM logs
-      WHERE guild_id = $1 
-      AND log_type = $2
-      """,
-      member.guild.id,
-      "member_join",
-    ):
+    if channel_id := self.log_channel(member.guild.id, "member_join"):
       if channel := member.guild.get_channel(channel_id):
         age = (
           discord.utils.utcnow().replace(tzinfo=None) - member.created_at.replace(tzinfo=None)
@@ -573,22 +465,14 @@ class Logs(commands.Cog):
             value=discord.utils.format_dt(member.created_at),
           )
         )
-        return await channel.send(silent=True, embed=embed, view=LogsView())
+        return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener()
   async def on_message_edit(self, before: discord.Message, after: discord.Message):
     if after.guild and not before.author.id == self.bot.user.id:
       if before != after:
         if before.content != "" and after.content != "":
-          if channel_id := await self.bot.db.fetchval(
-            """
-            SELECT channel_id FROM logs
-            WHERE guild_id = $1 
-            AND log_type = $2
-            """,
-            after.guild.id,
-            "messages",
-          ):
+          if channel_id := self.log_channel(after.guild.id, "messages"):
             if channel := after.guild.get_channel(channel_id):
               embed = (
                 discord.Embed(
@@ -609,20 +493,12 @@ class Logs(commands.Cog):
                 )
               )
 
-              return await channel.send(silent=True, embed=embed, view=LogsView())
+              return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener()
   async def on_message_delete(self, message: discord.Message):
     if message.guild and not message.author.id == self.bot.user.id:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        message.guild.id,
-        "messages",
-      ):
+      if channel_id := self.log_channel(message.guild.id, "messages"):
         if channel := message.guild.get_channel(channel_id):
           embed = (
             discord.Embed(
@@ -641,21 +517,13 @@ class Logs(commands.Cog):
             )
             .set_footer(text=f"User id: {message.author.id}")
           )
-          return await channel.send(silent=True, embed=embed, view=LogsView())
+          return self.bot.logs.send(channel, embed, view=LogsView())
 
   @commands.Cog.listener()
   async def on_bulk_message_delete(self, messages: List[discord.Message]):
     message = messages[0]
     if message.guild and not message.author.id == self.bot.user.id:
-      if channel_id := await self.bot.db.fetchval(
-        """
-        SELECT channel_id FROM logs
-        WHERE guild_id = $1 
-        AND log_type = $2
-        """,
-        message.guild.id,
-        "messages",
-      ):
+      if channel_id := self.log_channel(message.guild.id, "messages"):
         if channel := message.guild.get_channel(channel_id):
           embed = discord.Embed(
             color=self.bot.color,
@@ -671,10 +539,10 @@ class Logs(commands.Cog):
               "utf-8",
             )
           )
-          return await channel.send(
-              silent=True,
-              embed=embed,
-              file=discord.File(buffer, filename=f"{message.channel}.txt"),
+          return self.bot.logs.send(
+            channel,
+            embed,
+            file=discord.File(buffer, filename=f"{message.channel}.txt"),
           )
 
   @commands.hybrid_group(invoke_without_command=True)
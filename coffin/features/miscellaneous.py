@@ -282,19 +282,9 @@ class Miscellaneous(Cog):
       return await ctx.alert(f"You do not have `{number}` reminders")
 
     async with self.locks[ctx.author.id]:
-      task: asyncio.Task = self.bot.reminder_tasks[str(ctx.author.id)][
-        str(number)
-      ]
-      del self.bot.reminder_tasks[str(ctx.author.id)][str(number)]
-      task.cancel()
-      custom = {}
-
-      for idx, v in enumerate(
-        self.bot.reminder_tasks[str(ctx.author.id)].values(), start=1
-      ):
-        custom[str(idx)] = v
-
-      self.bot.reminder_tasks[str(ctx.author.id)] = custom
+      self.bot.scheduler.cancel(
+        self.bot.reminder_key(ctx.author.id, reminder.remind_at, reminder.invoked_at)
+      )
 
       await self.bot.db.execute(
         "DELETE FROM reminders WHERE user_id = $1 AND remind_at = $2",
@@ -364,13 +354,8 @@ class Miscellaneous(Cog):
         "INSERT INTO reminders VALUES ($1,$2,$3,$4)", *args
       )
 
-      if not self.bot.reminder_tasks.get(str(ctx.author.id)):
-        self.bot.reminder_tasks[str(ctx.author.id)] = {}
-
-      idx = str(len(list(self.bot.reminder_tasks[str(ctx.author.id)].keys())) + 1)
-      args.append(idx)
-      self.bot.reminder_tasks[str(ctx.author.id)][idx] = asyncio.ensure_future(
-        self.bot.reminder_task(*args)
+      self.bot.scheduler.schedule(
+        self.bot.reminder_key(ctx.author.id, date, now), date, self.bot.reminder_task, *args
       )
       return await ctx.confirm(
         f"I'll remind you about **{reason}** on {date.strftime('%A %d %B %Y, %I:%M %p')} UTC"
@@ -18,7 +18,6 @@ from io import BytesIO
 from os import environ
 from pathlib import Path
 from aiohttp.client_exceptions import ClientConnectorError, ClientResponseError
-from nudenet import NudeDetector
 from pomice import Node
 from pyppeteer import launch
 from pytz import timezone
@@ -69,6 +68,7 @@ from structure.managers import (
   Cache,
   ClientSession,
   Context,
+  GuildSettings,
   Help,
   Workers,
   database,
@@ -79,14 +79,20 @@ from structure.patcher import cmds, inter, member, server  # noqa: F401
 from structure.utilities import (
   Embed as ScriptedEmbed,
   Afk,
+  AntinukeEngine,
   ApplicationInfo,
   ApplicationLegal,
   Error,
   Giveaway,
+  LogDispatcher,
+  NudityDetector,
   Proxy,
+  Scheduler,
   TicketClose,
   TicketView,
+  TwitchPoller,
   VoiceMasterView,
+  timestamp
 )
 from typing import (
   List,
@@ -144,6 +150,9 @@ class Coffin(AutoShardedBot):
     )
     self.uptime: datetime = utcnow()
     self.browser = None
+    self.detector = NudityDetector()
+    self.screenshots = asyncio.Semaphore(4)
+    self.screenshots_waiting = 0
     self.dbname = dbname
     self.isinstance = instance
     self.logger = logger
@@ -161,7 +170,6 @@ class Coffin(AutoShardedBot):
     self.shard_connected = {}
     self.toggled = False
     self.afk = {}
-    self.reminder_tasks = defaultdict(dict)
     self.giveaways = {}
     self.prefixes = {}
     self.bots = {}
@@ -176,9 +184,17 @@ class Coffin(AutoShardedBot):
     if self.browser:
       await self.browser.close()
 
+    self.detector.close()
+
     if getattr(self, "session"):
       await self.session.close()
 
+    if getattr(self, "settings", None):
+      await self.settings.close()
+
+    if getattr(self, "scheduler", None):
+      await self.scheduler.close()
+
     screenshots_path = Path("./screenshots")
     if screenshots_path.exists():
       for s in screenshots_path.iterdir():
@@ -193,6 +209,13 @@ class Coffin(AutoShardedBot):
   async def setup_hook(self: "Coffin"):
     self.session = ClientSession()
     self.db = await database.connect(self.dbname)
+    self.settings = GuildSettings(self.db)
+    await self.settings.start()
+    self.scheduler = Scheduler(self.db)
+    self.twitch = TwitchPoller(self, self.db, self.session)
+    self.antinuke = AntinukeEngine(self.settings)
+    self.logs = LogDispatcher(self)
+    self.detector.start()
     self.add_check(self.check_command)
 
     blacklisted, afk = await asyncio.gather(
@@ -225,19 +248,30 @@ class Coffin(AutoShardedBot):
     return f"{dated} ago" if date.timestamp() < datetime.now().timestamp() else f"in {dated}"
 
   async def bump_cycle(self, guild_id: int):
+    """
+    Schedule the next bump reminder for a guild
+    """
     if result := await self.db.fetchrow(
       "SELECT * FROM bumpreminder WHERE guild_id = $1", guild_id
     ):
-      time = (result.bump_next - utcnow()).total_seconds()
-      await asyncio.sleep(time)
+      if result.bump_next:
+        self.scheduler.schedule(("bump", guild_id), result.bump_next, self.bump_remind, result)
 
-      if guild := self.get_guild(guild_id):
-        member = guild.get_member(result.bumper_id) or guild.owner
-        code = await self.embed.convert(member, result.remind)
-        code.pop("delete_after", None)
+  async def bump_remind(self, result):
+    # cleared first so a restart doesn't send the same reminder again
+    await self.db.execute(
+      "UPDATE bumpreminder SET bump_next = NULL WHERE guild_id = $1 AND bump_next = $2",
+      result.guild_id,
+      result.bump_next
+    )
+
+    if guild := self.get_guild(result.guild_id):
+      member = guild.get_member(result.bumper_id) or guild.owner
+      code = await self.embed.convert(member, result.remind)
+      code.pop("delete_after", None)
 
-        if channel := guild.get_channel(result.channel_id):
-          await channel.send(**code)
+      if channel := guild.get_channel(result.channel_id):
+        await channel.send(**code)
 
   def replace_hex_chars(self, text: str):
     def hex_to_char(match):
@@ -252,20 +286,8 @@ class Coffin(AutoShardedBot):
     values = ["username", "password", "host", "port"]
     return Proxy(**dict(zip(values, args)))
 
-  async def screenshot(self: "Coffin", url: str, wait: int) -> File:
-    urlhash = md5(url.encode()).hexdigest()
-    path = f"./screenshots/{urlhash}.{wait}.png"
-
-    async with self.locks[path]:
-      if os.path.exists(path):
-        return File(path)
-
-      if not re.match(r"^https?://", url):
-        url = f"https://{url}"
-
-      viewport = {"width": 1980, "height": 1080}
-      proxy = self.get_proxy()
-
+  async def launch_browser(self: "Coffin", proxy: Proxy, viewport: dict):
+    async with self.locks["browser"]:
       if not self.browser:
         self.browser = await launch(
           headless=True,
@@ -276,31 +298,82 @@ class Coffin(AutoShardedBot):
           defaultViewport=viewport,
         )
 
-      page = await self.browser.newPage()
-      keywords = re.compile(r"\b(?:pussy|tits|porn|cock|dick)\b", re.IGNORECASE)
+    return self.browser
+
+  async def screenshot(
+    self: "Coffin",
+    url: str,
+    wait: int,
+    viewport: tuple = (1980, 1080)
+  ) -> File:
+    """
+    Screenshot a page with the shared browser, 4 at a time with up to 16
+    waiting. Results are kept on disk per (url, wait, viewport) and pages
+    flagged as explicit are remembered for 5 minutes
+    """
+    urlhash = md5(url.encode()).hexdigest()
+    path = f"./screenshots/{urlhash}.{wait}.{viewport[0]}x{viewport[1]}.png"
+
+    async with self.locks[path]:
+      if os.path.exists(path):
+        return File(path)
+
+      if self.cache.get(f"explicit:{path}"):
+        raise BadArgument(
+          "This websites is most likely to contain explicit content"
+        )
+
+      if self.screenshots_waiting >= 16:
+        raise BadArgument("Too many screenshots are being taken, try again later")
+
+      self.screenshots_waiting += 1
+      try:
+        await self.screenshots.acquire()
+      finally:
+        self.screenshots_waiting -= 1
+
+      try:
+        return await self.render_screenshot(url, wait, viewport, path)
+      finally:
+        self.screenshots.release()
+
+  async def render_screenshot(
+    self: "Coffin",
+    url: str,
+    wait: int,
+    viewport: tuple,
+    path: str
+  ) -> File:
+    if not re.match(r"^https?://", url):
+      url = f"https://{url}"
+
+    proxy = self.get_proxy()
+    browser = await self.launch_browser(proxy, {"width": 1980, "height": 1080})
+
+    page = await browser.newPage()
+    keywords = re.compile(r"\b(?:pussy|tits|porn|cock|dick)\b", re.IGNORECASE)
+    try:
+      await page.setViewport({"width": viewport[0], "height": viewport[1]})
       try:
         await page.authenticate(
           {"username": proxy.username, "password": proxy.password}
         )
         r = await page.goto(url, load=True, timeout=10000)
       except Exception:
-        await page.close()
         raise BadArgument("Unable to screenshot page")
 
       if not r:
-        await page.close()
         raise BadArgument("This page returned no response")
 
       if content_type := r.headers.get("content-type"):
         if not any(
           (i in content_type for i in ("text/html", "application/json"))
         ):
-          await page.close()
           raise BadArgument("This kind of page cannot be screenshotted")
 
         content = await page.content()
         if keywords.search(content):
-          await page.close()
+          await self.cache.add(f"explicit:{path}", True, 300)
           raise BadArgument(
             "This websites is most likely to contain explicit content"
           )
@@ -315,19 +388,20 @@ class Coffin(AutoShardedBot):
           "FEMALE_GENITALIA_EXPOSED",
           "MALE_GENITALIA_EXPOSED",
         ]
-        detections = await asyncio.to_thread(NudeDetector().detect, path)
+        detections = await self.detector.detect(path)
 
         if any(
           [prediction["class"] in bad_filters for prediction in detections]
         ):
           os.remove(path)
-          await page.close()
+          await self.cache.add(f"explicit:{path}", True, 300)
           raise BadArgument(
             "This websites is most likely to contain explicit content"
           )
 
-        await page.close()
         return File(path)
+    finally:
+      await page.close()
 
   async def has_cooldown(self, interaction: Interaction) -> bool:
     ratelimit = ratelimiter(
@@ -380,14 +454,10 @@ class Coffin(AutoShardedBot):
     return cal.parseDT(date, datetime.now())[0]
 
   async def giveaway_task(
-    self: "Coffin", message_id: int, channel_id: int, end_at: datetime
+    self: "Coffin", message_id: int, channel_id: int
   ):
     now = datetime.now(tz=date_timezone.utc)
-    if end_at > now:
-      wait = (end_at - now).total_seconds()
-      await asyncio.sleep(wait)
-
-    del self.giveaways[message_id]
+    self.giveaways.pop(message_id, None)
     gw = await self.db.fetchrow(
       "SELECT * FROM giveaway WHERE message_id = $1", message_id
     )
@@ -423,40 +493,35 @@ class Coffin(AutoShardedBot):
           await message.edit(embed=embed, view=None)
           await message.reply(f"{', '.join(list(map(lambda m: f'<@{m}>', winners)))} has won the prize for **{gw.reward}**")
 
+  def reminder_key(
+    self: "Coffin", user_id: int, remind_at: datetime, invoked_at: datetime
+  ) -> tuple:
+    return ("reminder", user_id, timestamp(remind_at), timestamp(invoked_at))
+
   async def reminder_task(
     self: "Coffin",
     user_id: int,
     reminder: str,
     remind_at: datetime,
     invoked_at: datetime,
-    task_number: int,
   ):
     remind_at = remind_at.replace(tzinfo=date_timezone.utc)
     invoked_at = invoked_at.replace(tzinfo=date_timezone.utc)
 
-    async def send_reminder():
-      del self.reminder_tasks[str(user_id)][str(task_number)]
-      if user := self.get_user(user_id):
-        embed = Embed(
-          color=self.color, description=f"â° {reminder}"
-        ).set_footer(
-          text=f"You told me to remind you that {humanize.naturaltime(invoked_at)}"
+    if user := self.get_user(user_id):
+      embed = Embed(
+        color=self.color, description=f"â° {reminder}"
+      ).set_footer(
+        text=f"You told me to remind you that {humanize.naturaltime(invoked_at)}"
+      )
+      with suppress(Exception):
+        await user.send(embed=embed)
+        await self.db.execute(
+          "DELETE FROM reminders WHERE user_id = $1 AND remind_at = $2 AND invoked_at = $3",
+          user_id,
+          remind_at,
+          invoked_at,
         )
-        with suppress(Exception):
-          await user.send(embed=embed)
-          await self.db.execute(
-            "DELETE FROM reminders WHERE user_id = $1 AND remind_at = $2 AND invoked_at = $3",
-            user_id,
-            remind_at,
-            invoked_at,
-          )
-
-    if remind_at.timestamp() < datetime.now().timestamp():
-      return await send_reminder()
-
-    wait_for = (remind_at - datetime.now(date_timezone.utc)).total_seconds()
-    await asyncio.sleep(wait_for)
-    return await send_reminder()
 
   @cached_property
   def files(self) -> List[str]:
@@ -671,40 +736,50 @@ class Coffin(AutoShardedBot):
 
   async def build_cache(self):
     self.build_methods()
-    reminders, giveaways, bumpreminder_guilds = await asyncio.gather(
-      self.db.fetch("SELECT * FROM reminders ORDER BY remind_at ASC"),
-      self.db.fetch("SELECT * FROM giveaway WHERE NOT ended"),
-      self.db.fetch("SELECT guild_id FROM bumpreminder WHERE bump_next IS NOT NULL")
-    )
-    sorted_reminders = defaultdict(list)
-
-    for result in bumpreminder_guilds:
-      asyncio.ensure_future(self.bump_cycle(result["guild_id"]))
-
-    for reminder in reminders:
-      sorted_reminders[reminder.user_id].append(reminder)
-
-    for giveaway in giveaways:
-      self.giveaways[giveaway.message_id] = asyncio.ensure_future(
-        self.giveaway_task(
-          **dict(giveaway)
-        )
-      )
-
-    for k, v in sorted_reminders.items():
-      for idx, reminder in enumerate(v, start=1):
-        await asyncio.sleep(0.1)
+    giveaways = await self.db.fetch("SELECT message_id, ending FROM giveaway WHERE NOT ended")
+    self.giveaways = {g.message_id: g.ending for g in giveaways}
 
-        if not self.reminder_tasks.get(k):
-          self.reminder_tasks[k] = {}
-
-        r = dict(reminder)
-        r["task_number"] = idx
-        self.reminder_tasks[k][str(idx)] = asyncio.ensure_future(
-          self.reminder_task(**r)
-        )
-
-    sorted_reminders.clear()
+    # the scheduler pages these in as they come within its horizon
+    self.scheduler.source(
+      "reminders",
+      """
+      SELECT * FROM reminders
+      WHERE remind_at >= $1 AND remind_at < $2
+      AND ($4::TIMESTAMPTZ IS NULL OR (remind_at, user_id, invoked_at) > ($4, $5::BIGINT, $6::TIMESTAMPTZ))
+      ORDER BY remind_at ASC, user_id ASC, invoked_at ASC LIMIT $3
+      """,
+      due=lambda r: r.remind_at,
+      key=lambda r: self.reminder_key(r.user_id, r.remind_at, r.invoked_at),
+      callback=lambda r: self.reminder_task(r.user_id, r.reminder, r.remind_at, r.invoked_at),
+      cursor=("remind_at", "user_id", "invoked_at")
+    )
+    self.scheduler.source(
+      "giveaway",
+      """
+      SELECT message_id, channel_id, ending FROM giveaway
+      WHERE NOT ended AND ending >= $1 AND ending < $2
+      AND ($4::TIMESTAMPTZ IS NULL OR (ending, message_id) > ($4, $5::BIGINT))
+      ORDER BY ending ASC, message_id ASC LIMIT $3
+      """,
+      due=lambda r: r.ending,
+      key=lambda r: ("giveaway", r.message_id),
+      callback=lambda r: self.giveaway_task(r.message_id, r.channel_id),
+      cursor=("ending", "message_id")
+    )
+    self.scheduler.source(
+      "bumpreminder",
+      """
+      SELECT * FROM bumpreminder
+      WHERE bump_next >= $1 AND bump_next < $2
+      AND ($4::TIMESTAMPTZ IS NULL OR (bump_next, guild_id) > ($4, $5::BIGINT))
+      ORDER BY bump_next ASC, guild_id ASC LIMIT $3
+      """,
+      due=lambda r: r.bump_next,
+      key=lambda r: ("bump", r.guild_id),
+      callback=self.bump_remind,
+      cursor=("bump_next", "guild_id")
+    )
+    self.scheduler.start()
 
   async def process_commands(self: "Coffin", message: Message):
     if message.guild:
@@ -891,116 +966,7 @@ async def bot_prefix(bot: Coffin, message: Message):
 
 @tasks.loop(minutes=3)
 async def twitch_notifications(bot: Coffin):
-  results = await bot.db.fetch(
-    """
-    SELECT
-      streamer, 
-      ARRAY_AGG(ARRAY[channel_id::TEXT, stream_id, content]) as twitch_pairs
-    FROM notifications.twitch
-    GROUP BY streamer
-    """
-  )
-  
-  headers = {
-    "client-id": "kimne78kx3ncx6brgo4mv6wki5h1ko",
-    "client-session-id": "bc9cdea175eb84bf",
-    "client-version": "cf0f573f-6d51-4d85-9c59-0a9ce7301b38", 
-    "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Mobile Safari/537.36"
-  }
-  for result in results: 
-    payload = [
-      {
-        "operationName":"MwebChannelHomePage_Query",
-        "variables":{
-          "login": result.streamer
-        },
-        "extensions":{
-          "persistedQuery":{
-            "version":1,
-            "sha256Hash":"9795cac5a29b76b1800d5472f92a5a9c68d192820f9a52b7fdaddd2438584ce6"
-          }
-        }
-      },
-      {
-        "operationName":"HomeTrackQuery",
-        "variables":{
-          "channelLogin":result.streamer
-        },
-        "extensions":{
-          "persistedQuery":{
-              "version":1,
-              "sha256Hash":"129cbf14117ce8e95f01bd2043154089058146664df866d0314e84355ffb4e05"
-          }
-        }
-      },
-      {
-        "operationName":"ChannelLayout",
-        "variables":{
-          "channelLogin":result.streamer,
-          "includeIsDJ":True
-        },
-        "extensions":{
-          "persistedQuery":{
-            "version":1,
-            "sha256Hash":"243697c79ec36b21d8b00ba962120cfecab171af15882ddcefd39266f35d3e0a"
-          }
-        }
-      }
-    ]
-    res = await bot.session.post(
-      "https://gql.twitch.tv/gql",
-      headers=headers,
-      json=payload
-    )
-    ch = res[0].data.channel
-    username = ch.login
-    display_name = ch.displayName
-    if ch.stream:
-      kwargs = {
-        'width': "1980",
-        'height': "1080"
-      }
-      preview_image = ch.stream.previewImageURL.format(**kwargs)
-      game = ch.stream.game.displayName
-      title = ch.stream.broadcaster.broadcastSettings.title
-      stream_id = ch.stream.id
-      for pair in result.twitch_pairs:
-        last_id = pair[1] or ""
-        if last_id != stream_id:
-          await bot.db.execute(
-            """
-            UPDATE notifications.twitch
-            SET stream_id = $1
-            WHERE channel_id = $2
-            AND streamer = $3 
-            """,
-            stream_id, int(pair[0]),
-            result.streamer
-          ) 
-          
-          if channel := bot.get_channel(int(pair[0])):
-            embed = (
-              Embed(
-                title=title,
-                color=0x6441a4,
-                url=f"https://twitch.tv/{username}",
-                timestamp=utcnow()
-              )
-              .set_author(name=f"{display_name} | {game}")
-              .set_image(url=preview_image)
-              .set_footer(text="Twitch")
-            )
-            
-            content = pair[2].replace('{streamer}', username)
-
-            with suppress(Exception):
-              await channel.send(
-                content=content,
-                embed=embed,
-                allowed_mentions=AllowedMentions.all()
-              )
-            
-            await asyncio.sleep(0.5)
+  await bot.twitch.poll()
 
 @tasks.loop(minutes=3)
 async def youtube_notifications(bot: Coffin):
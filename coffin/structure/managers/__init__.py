@@ -5,4 +5,5 @@ from .logger import *
 from .paginator import *
 from .ratelimit import *
 from .session import *
-from .workers import *
\ No newline at end of file
+from .settings import *
+from .workers import *
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+
+from asyncpg import Connection, Pool
+from contextlib import suppress
+from pydantic import BaseModel
+from . import logger as logging
+
+from typing import (
+  Any,
+  Dict,
+  Iterable,
+  Optional,
+  Tuple
+)
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "settings"
+
+# table -> (key columns, selected columns)
+TABLES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+  "bumpreminder": (("guild_id",), "*"),
+  "imgonly": (("guild_id", "channel_id"), "*"),
+  "server_settings": (("guild_id",), "*"),
+  "antispam": (("guild_id",), "*"),
+  "antinuke": (("guild_id",), "*"),
+  "logs": (("guild_id", "log_type"), "guild_id, log_type, channel_id"),
+  "leveling.config": (("guild_id",), "*"),
+  "leveling.multiplier": (("guild_id",), "*"),
+  "lastfm.user": (("user_id",), "user_id, command"),
+  "donator": (("user_id",), "user_id"),
+}
+
+class SettingsMetrics(BaseModel):
+  rows: Dict[str, int]
+  size: int
+  loaded_at: Optional[float]
+  refreshes: int
+  last_lag: float
+  max_lag: float
+  average_lag: float
+
+class GuildSettings:
+  """
+  In memory snapshot of the config tables read on every message,
+  kept current through the settings_notify trigger in schema.sql
+  """
+  def __init__(self, pool: Pool):
+    self.pool = pool
+    self.connection: Optional[Connection] = None
+    self.snapshot: Dict[str, Dict[Any, Any]] = {table: {} for table in TABLES}
+    self.versions: Dict[Tuple[str, Any], int] = {}
+    self.pending: Optional[list] = None
+    self.loaded_at: Optional[float] = None
+    self.refreshes = 0
+    self.last_lag = 0.0
+    self.max_lag = 0.0
+    self.total_lag = 0.0
+
+  @staticmethod
+  def make_key(values: Iterable[Any]) -> Any:
+    values = tuple(values)
+    return values[0] if len(values) == 1 else values
+
+  def get(self: "GuildSettings", table: str, *key: Any) -> Optional[Any]:
+    """
+    Get a cached row by its primary key
+    """
+    return self.snapshot[table].get(self.make_key(key))
+
+  def has(self: "GuildSettings", table: str, *key: Any) -> bool:
+    return self.make_key(key) in self.snapshot[table]
+
+  async def load(self: "GuildSettings"):
+    self.pending = []
+    snapshot = {}
+    try:
+      for table, (keys, columns) in TABLES.items():
+        rows = await self.pool.fetch(f"SELECT {columns} FROM {table}")
+        snapshot[table] = {
+          self.make_key(row[k] for k in keys): row
+          for row in rows
+        }
+    finally:
+      pending, self.pending = self.pending, None
+
+    self.snapshot = snapshot
+    self.loaded_at = time.time()
+    # anything that changed while the tables were being read is fetched again
+    for table, keys, sent_at in pending:
+      await self.refresh(table, keys, sent_at)
+
+    logger.info(f"Loaded {self.size:,} settings rows from {len(TABLES)} tables")
+
+  async def start(self: "GuildSettings"):
+    """
+    Subscribe to changes first so nothing written during the initial load is missed
+    """
+    self.connection = await self.pool.acquire()
+    await self.connection.add_listener(CHANNEL, self.on_notify)
+    self.connection.add_termination_listener(self.on_terminate)
+    await self.load()
+
+  async def close(self: "GuildSettings"):
+    if self.connection:
+      await self.connection.remove_listener(CHANNEL, self.on_notify)
+      await self.pool.release(self.connection)
+      self.connection = None
+
+  def on_terminate(self, connection: Connection):
+    logger.warning("Settings listener connection was lost, reloading the snapshot")
+    self.connection = None
+    asyncio.ensure_future(self.restart(connection))
+
+  async def release(self: "GuildSettings", connection: Connection):
+    # a dead connection keeps its pool slot until it's handed back
+    with suppress(Exception):
+      await self.pool.release(connection)
+
+  async def restart(self: "GuildSettings", dead: Connection):
+    await self.release(dead)
+    while not self.connection:
+      try:
+        await self.start()
+      except Exception as e:
+        logger.warning(f"Failed to restart the settings listener: {e}")
+        if self.connection:
+          await self.release(self.connection)
+          self.connection = None
+
+        await asyncio.sleep(5)
+
+  def on_notify(self, connection: Connection, pid: int, channel: str, payload: str):
+    data = json.loads(payload)
+    if data["table"] not in TABLES:
+      return
+
+    if self.pending is not None:
+      return self.pending.append((data["table"], data["keys"], data["at"]))
+
+    asyncio.ensure_future(self.refresh(data["table"], data["keys"], data["at"]))
+
+  async def refresh(self, table: str, keys: list, sent_at: float):
+    key_columns, columns = TABLES[table]
+    where = " AND ".join(f"{k} = ${i}" for i, k in enumerate(key_columns, start=1))
+
+    for key in keys:
+      if not key:
+        continue
+
+      values = [key[k] for k in key_columns]
+      version = self.versions.get((table, self.make_key(values)), 0) + 1
+      self.versions[(table, self.make_key(values))] = version
+      row = await self.pool.fetchrow(
+        f"SELECT {columns} FROM {table} WHERE {where}", *values
+      )
+
+      # a newer notification for this row is already being fetched
+      if self.versions.get((table, self.make_key(values))) != version:
+        continue
+
+      del self.versions[(table, self.make_key(values))]
+      if row:
+        self.snapshot[table][self.make_key(values)] = row
+      else:
+        self.snapshot[table].pop(self.make_key(values), None)
+
+    lag = max(time.time() - sent_at, 0.0)
+    self.refreshes += 1
+    self.last_lag = lag
+    self.max_lag = max(self.max_lag, lag)
+    self.total_lag += lag
+
+  @property
+  def size(self) -> int:
+    return sum(len(rows) for rows in self.snapshot.values())
+
+  @property
+  def metrics(self) -> SettingsMetrics:
+    return SettingsMetrics(
+      rows={table: len(rows) for table, rows in self.snapshot.items()},
+      size=self.size,
+      loaded_at=self.loaded_at,
+      refreshes=self.refreshes,
+      last_lag=self.last_lag,
+      max_lag=self.max_lag,
+      average_lag=self.total_lag / self.refreshes if self.refreshes else 0.0,
+    )
@@ -286,6 +286,8 @@ CREATE TABLE IF NOT EXISTS bumpreminder (
   PRIMARY KEY (guild_id)
 );
 
+CREATE INDEX IF NOT EXISTS bumpreminder_due ON bumpreminder (bump_next, guild_id);
+
 CREATE TABLE IF NOT EXISTS voicemaster (
   guild_id BIGINT NOT NULL, 
   channel_id BIGINT NOT NULL, 
@@ -343,6 +345,8 @@ CREATE TABLE IF NOT EXISTS reminders (
   invoked_at TIMESTAMPTZ NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS reminders_due ON reminders (remind_at, user_id, invoked_at);
+
 CREATE TABLE IF NOT EXISTS birthday (
   user_id BIGINT NOT NULL,
   birthdate TIMESTAMPTZ NOT NULL,
@@ -439,6 +443,8 @@ CREATE TABLE IF NOT EXISTS giveaway (
   ended BOOLEAN
 );
 
+CREATE INDEX IF NOT EXISTS giveaway_due ON giveaway (ending, message_id) WHERE NOT ended;
+
 CREATE TABLE IF NOT EXISTS role_restore (
   guild_id BIGINT NOT NULL, 
   user_id BIGINT NOT NULL, 
@@ -518,4 +524,74 @@ CREATE TABLE IF NOT EXISTS imgonly (
 CREATE TABLE IF NOT EXISTS uwulock (
   guild_id BIGINT,
   user_id BIGINT
-);
\ No newline at end of file
+);
+
+CREATE OR REPLACE FUNCTION settings_notify() RETURNS TRIGGER AS $$
+DECLARE
+  new_keys JSONB := '{}'::JSONB;
+  old_keys JSONB := '{}'::JSONB;
+  col TEXT;
+BEGIN
+  FOREACH col IN ARRAY TG_ARGV LOOP
+    IF TG_OP <> 'DELETE' THEN
+      new_keys := new_keys || jsonb_build_object(col, to_jsonb(NEW) -> col);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+      old_keys := old_keys || jsonb_build_object(col, to_jsonb(OLD) -> col);
+    END IF;
+  END LOOP;
+
+  PERFORM pg_notify(
+    'settings',
+    jsonb_build_object(
+      'table', CASE WHEN TG_TABLE_SCHEMA = 'public' THEN TG_TABLE_NAME ELSE TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME END,
+      'keys', jsonb_build_array(
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE new_keys END,
+        CASE WHEN TG_OP = 'INSERT' OR old_keys = new_keys THEN NULL ELSE old_keys END
+      ),
+      'at', extract(epoch FROM clock_timestamp())
+    )::TEXT
+  );
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS settings_notify ON bumpreminder;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON bumpreminder
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON imgonly;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON imgonly
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id', 'channel_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON server_settings;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON server_settings
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON antispam;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON antispam
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON antinuke;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON antinuke
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON logs;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON logs
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id', 'log_type');
+
+DROP TRIGGER IF EXISTS settings_notify ON leveling.config;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON leveling.config
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON leveling.multiplier;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON leveling.multiplier
+FOR EACH ROW EXECUTE FUNCTION settings_notify('guild_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON lastfm.user;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON lastfm.user
+FOR EACH ROW EXECUTE FUNCTION settings_notify('user_id');
+
+DROP TRIGGER IF EXISTS settings_notify ON donator;
+CREATE TRIGGER settings_notify AFTER INSERT OR UPDATE OR DELETE ON donator
+FOR EACH ROW EXECUTE FUNCTION settings_notify('user_id');
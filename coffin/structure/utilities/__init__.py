@@ -1,6 +1,12 @@
+from .antinuke import *
 from .converter import *
+from .detector import *
 from .embed import *
 from .image import *
 from .lastfm import *
+from .leveling import *
+from .logs import *
 from .models import *
+from .scheduler import *
+from .twitch import *
 from .views import *
@@ -0,0 +1,137 @@
+import json
+import time
+
+from collections import defaultdict, deque
+from pydantic import BaseModel
+from structure.managers import getLogger
+
+from typing import (
+  Any,
+  Deque,
+  Dict,
+  FrozenSet,
+  Hashable,
+  Optional
+)
+
+logger = getLogger(__name__)
+
+class Policy:
+  """
+  A guild's antinuke row, parsed once
+  """
+  __slots__ = ("row", "modules", "trusted", "logs")
+
+  def __init__(self, row: Any):
+    self.row = row
+    modules = row["modules"]
+    self.modules: Dict[str, dict] = json.loads(modules) if isinstance(modules, str) else dict(modules or {})
+    self.trusted: FrozenSet[int] = frozenset(row["owners"] or []) | frozenset(row["whitelisted"] or [])
+    self.logs: Optional[int] = row["logs"]
+
+  def module(self, action: str) -> Optional[dict]:
+    return self.modules.get(action)
+
+class SlidingWindow:
+  """
+  Counts events per key over the last `window` seconds
+  """
+  def __init__(self, window: float = 10.0):
+    self.window = window
+    self.events: Dict[Hashable, Deque[float]] = defaultdict(deque)
+    self.calls = 0
+
+  def hit(self: "SlidingWindow", key: Hashable, now: Optional[float] = None) -> int:
+    now = now or time.monotonic()
+    events = self.events[key]
+    events.append(now)
+    while events[0] <= now - self.window:
+      events.popleft()
+
+    self.calls += 1
+    if self.calls % 1000 == 0:
+      self.prune(now)
+
+    return len(events)
+
+  def prune(self: "SlidingWindow", now: Optional[float] = None):
+    now = now or time.monotonic()
+    for key in [k for k, events in self.events.items() if events[-1] <= now - self.window]:
+      del self.events[key]
+
+class LatencyHistogram:
+  """
+  The most recent reaction times, enough for stable percentiles without growing forever
+  """
+  def __init__(self, size: int = 2048):
+    self.samples: Deque[float] = deque(maxlen=size)
+    self.count = 0
+
+  def add(self, seconds: float):
+    self.samples.append(seconds * 1000)
+    self.count += 1
+
+  def percentile(self, q: float) -> float:
+    if not self.samples:
+      return 0.0
+
+    ordered = sorted(self.samples)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+class AntinukeMetrics(BaseModel):
+  reactions: int
+  throttled: int
+  p50: float
+  p95: float
+  p99: float
+  max: float
+
+class AntinukeEngine:
+  """
+  Antinuke policies kept parsed in memory. Rows come from the settings snapshot,
+  which the settings_notify trigger keeps current, so a policy is only parsed
+  again after its row changed
+  """
+  def __init__(self, settings: Any, window: float = 10.0):
+    self.settings = settings
+    self.policies: Dict[int, Policy] = {}
+    self.counter = SlidingWindow(window)
+    self.latency = LatencyHistogram()
+    self.throttled = 0
+
+  def policy(self: "AntinukeEngine", guild_id: int) -> Optional[Policy]:
+    if not (row := self.settings.get("antinuke", guild_id)):
+      self.policies.pop(guild_id, None)
+      return None
+
+    policy = self.policies.get(guild_id)
+    if policy is None or policy.row is not row:
+      policy = self.policies[guild_id] = Policy(row)
+
+    return policy
+
+  def exceeded(self: "AntinukeEngine", guild_id: int, user_id: int, action: str, threshold: int = 1) -> bool:
+    """
+    Whether this action pushed the user to the module's threshold within the window
+    """
+    if self.counter.hit((guild_id, user_id, action)) >= max(threshold, 1):
+      return True
+
+    self.throttled += 1
+    return False
+
+  def record(self: "AntinukeEngine", seconds: float):
+    self.latency.add(seconds)
+    if seconds > 1:
+      logger.warning(f"Antinuke took {seconds * 1000:.0f}ms to react")
+
+  @property
+  def metrics(self) -> AntinukeMetrics:
+    return AntinukeMetrics(
+      reactions=self.latency.count,
+      throttled=self.throttled,
+      p50=self.latency.percentile(50),
+      p95=self.latency.percentile(95),
+      p99=self.latency.percentile(99),
+      max=max(self.latency.samples, default=0.0),
+    )
@@ -0,0 +1,56 @@
+import asyncio
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from structure.managers import getLogger
+
+from typing import (
+  Dict,
+  List,
+  Optional
+)
+
+logger = getLogger(__name__)
+
+# only ever set inside the worker process
+_detector = None
+
+def _load():
+  global _detector
+  from nudenet import NudeDetector
+
+  _detector = NudeDetector()
+
+def _detect(path: str) -> List[Dict]:
+  return _detector.detect(path)
+
+class NudityDetector:
+  """
+  Keeps one NudeDetector loaded in a worker process of its own, so the
+  ONNX model is read once instead of on every screenshot and inference
+  never blocks the event loop. A crashed worker is replaced on the next call
+  """
+  def __init__(self):
+    self.executor: Optional[ProcessPoolExecutor] = None
+
+  def start(self) -> ProcessPoolExecutor:
+    if not self.executor:
+      self.executor = ProcessPoolExecutor(max_workers=1, initializer=_load)
+      # the model loads in the background instead of on the first screenshot
+      self.executor.submit(int)
+
+    return self.executor
+
+  async def detect(self, path: str) -> List[Dict]:
+    loop = asyncio.get_running_loop()
+    try:
+      return await loop.run_in_executor(self.start(), _detect, path)
+    except BrokenProcessPool:
+      logger.warning("The nudity detector worker died, starting a new one")
+      self.close()
+      return await loop.run_in_executor(self.start(), _detect, path)
+
+  def close(self):
+    if self.executor:
+      self.executor.shutdown(wait=False, cancel_futures=True)
+      self.executor = None
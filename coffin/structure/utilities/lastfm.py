@@ -1,7 +1,16 @@
 import asyncio
 
+from cachetools import TTLCache
 from io import BytesIO
-from typing import List
+from typing import (
+  Any,
+  Awaitable,
+  Callable,
+  Dict,
+  Hashable,
+  List,
+  Optional
+)
 from aiohttp import ClientSession as Session
 from munch import Munch
 from .models import *
@@ -17,9 +26,48 @@ from structure.managers import (
   Record
 )
 
+def text(value: Any, default: str) -> str:
+  if isinstance(value, dict) and "#text" in value:
+    return value["#text"]
+  return default
+
+def image(data: Any) -> Optional[str]:
+  if data and data.get("image"):
+    return data["image"][-1]["#text"]
+  return None
+
 class FMHandler(ClientSession):
+  """
+  Artist metadata is cached for everyone, album and track lookups carry the
+  user's play count so they and profiles are only cached for a short while
+  per user, and identical lookups that are already in flight are awaited
+  instead of requested again
+  """
   def __init__(self: "FMHandler"):
     super().__init__(base_url="https://ws.audioscrobbler.com/2.0/")
+    self.metadata = TTLCache(maxsize=4096, ttl=6 * 3600)
+    self.counts = TTLCache(maxsize=4096, ttl=30)
+    self.profiles = TTLCache(maxsize=1024, ttl=300)
+    self.pending: Dict[Hashable, asyncio.Future] = {}
+
+  async def cached(
+    self: "FMHandler",
+    cache: Optional[TTLCache],
+    key: Hashable,
+    fetch: Callable[[], Awaitable[Any]]
+  ) -> Any:
+    if cache is not None and key in cache:
+      return cache[key]
+
+    if not (future := self.pending.get(key)):
+      future = self.pending[key] = asyncio.ensure_future(fetch())
+      future.add_done_callback(lambda _: self.pending.pop(key, None))
+
+    # shielded so one caller giving up doesn't cancel it for the others
+    value = await asyncio.shield(future)
+    if cache is not None:
+      cache[key] = value
+    return value
 
   async def request(self: "FMHandler", **p) -> Munch:
     slug = p.pop("slug", None)
@@ -39,6 +87,16 @@ class FMHandler(ClientSession):
   async def profile(
     self: "FMHandler",
     username: str,
+  ) -> Profile:
+    return await self.cached(
+      self.profiles,
+      ("profile", username.lower()),
+      lambda: self.fetch_profile(username)
+    )
+
+  async def fetch_profile(
+    self: "FMHandler",
+    username: str,
   ) -> Profile:
     data = await self.request(
       slug="user",
@@ -63,11 +121,72 @@ class FMHandler(ClientSession):
     )
 
   async def playing(self: "FMHandler", username: str, json: bool = False) -> Playing:
-    tracks = await self.request(
-      method="user.getrecenttracks",
-      username=username,
-      slug="recenttracks.track",
-      limit=1,
+    # several custom commands firing for the same user share one lookup
+    data = await self.cached(None, ("playing", username.lower()), lambda: self.now_playing(username))
+    if isinstance(data, Error):
+      return data
+
+    if json == True:
+      return {
+        "track": data.track.dict(),
+        "artist": data.artist.dict(),
+        "album": data.album.dict() if data.album else None,
+        "user": data.user,
+      }
+
+    return data
+
+  async def artist_info(self: "FMHandler", artist: str) -> Munch:
+    return await self.cached(
+      self.metadata,
+      ("artist", artist.lower()),
+      lambda: self.request(method="artist.getinfo", artist=artist, slug="artist")
+    )
+
+  async def album_info(self: "FMHandler", artist: str, album: str, username: str) -> Optional[Dict]:
+    data = await self.cached(
+      self.counts,
+      (username.lower(), "album", artist.lower(), album.lower()),
+      lambda: self.request(
+        method="album.getinfo",
+        artist=artist,
+        album=album,
+        username=username,
+        slug="album",
+      )
+    )
+    if not data:
+      return None
+
+    return {
+      "url": data["url"],
+      "name": data["name"],
+      "image": image(data),
+      "plays": int(data["userplaycount"]) if "userplaycount" in data else 0,
+    }
+
+  async def track_info(self: "FMHandler", artist: str, track: str, username: str) -> Munch:
+    return await self.cached(
+      self.counts,
+      (username.lower(), "track", artist.lower(), track.lower()),
+      lambda: self.request(
+        method="track.getinfo",
+        track=track,
+        artist=artist,
+        username=username,
+        slug="track",
+      )
+    )
+
+  async def now_playing(self: "FMHandler", username: str) -> Playing:
+    tracks, profile = await asyncio.gather(
+      self.request(
+        method="user.getrecenttracks",
+        username=username,
+        slug="recenttracks.track",
+        limit=1,
+      ),
+      self.profile(username),
     )
     if not tracks:
       return Error(
@@ -75,59 +194,28 @@ class FMHandler(ClientSession):
       )
 
     track = tracks[0]
-    # Check if 'artist' is a dictionary and has the key "#text"
-    if isinstance(track.artist, dict) and "#text" in track.artist:
-      artist_info = await self.request(
-        method="artist.getinfo",
-        artist=track.artist["#text"],
-        slug="artist",
-      )
-    else:
-      # Handle the case where it's not a dictionary or doesn't have "#text"
-      artist_info = {
+    artist_name = text(track.artist, "Unknown Artist")
+
+    async def unknown_artist() -> Dict:
+      return {
         "url": None,
         "name": "Unknown Artist",
         "image": None,
         "plays": 0,
       }
 
-    album_info = await self.request(
-      method="album.getinfo",
-      artist=(
-        track.artist["#text"]
-        if isinstance(track.artist, dict) and "#text" in track.artist
-        else "Unknown Artist"
-      ),
-      album=(
-        track.album["#text"]
-        if isinstance(track.album, dict) and "#text" in track.album
-        else "Unknown Album"
-      ),
-      username=username,
-      slug="album",
-    )
-
-    track_info = (
-      await self.request(
-        method="track.getinfo",
-        track=track.name,
-        artist=(
-          track.artist["#text"]
-          if isinstance(track.artist, dict) and "#text" in track.artist
-          else "Unknown Artist"
-        ),
-        username=username,
-        slug="track",
-      )
-      or track
+    # everything past the recent track only depends on it, so it's all fetched at once
+    artist_info, album_info, track_info = await asyncio.gather(
+      self.artist_info(artist_name) if artist_name != "Unknown Artist" else unknown_artist(),
+      self.album_info(artist_name, text(track.album, "Unknown Album"), username),
+      self.track_info(artist_name, track.name, username),
     )
+    track_info = track_info or track
 
     artist = {
       "url": artist_info["url"],
       "name": artist_info["name"],
-      "image": (
-        artist_info["image"][-1]["#text"] if artist_info["image"] else None
-      ),
+      "image": image(artist_info),
       "plays": (
         int(artist_info["stats"]["userplaycount"])
         if "stats" in artist_info and "userplaycount" in artist_info["stats"]
@@ -137,37 +225,17 @@ class FMHandler(ClientSession):
     track = {
       "url": track_info["url"],
       "name": track_info["name"],
-      "image": track["image"][-1]["#text"] if track["image"] else None,
+      "image": image(track),
       "plays": (
         int(track_info["userplaycount"]) if "userplaycount" in track_info else 0
       ),
     }
-    if album_info:
-      album = {
-        "url": album_info["url"],
-        "name": album_info["name"],
-        "image": (
-          album_info["image"][-1]["#text"] if album_info["image"] else None
-        ),
-        "plays": (
-          int(album_info["userplaycount"])
-          if "userplaycount" in album_info
-          else 0
-        ),
-      }
-    if json == True:
-      return {
-        "track": track,
-        "artist": artist,
-        "album": album,
-        "user": await self.profile(username),
-      }
 
     return Playing(
       track=track,
       artist=artist,
-      album=album if album else None,
-      user=await self.profile(username),
+      album=album_info,
+      user=profile,
     )
 
   async def read_image(
@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+from asyncpg import Pool
+from contextlib import suppress
+from structure.managers import getLogger
+
+from typing import (
+  Dict,
+  Optional,
+  Set,
+  Tuple
+)
+
+logger = getLogger(__name__)
+
+Key = Tuple[int, int]
+
+class Progress:
+  __slots__ = ("xp", "target_xp", "lvl", "seen")
+
+  def __init__(self, xp: int = 0, target_xp: int = 250, lvl: int = 1):
+    self.xp = xp
+    self.target_xp = target_xp
+    self.lvl = lvl
+    self.seen = time.monotonic()
+
+class XPAccumulator:
+  """
+  Keeps leveling.members progress in memory and writes the
+  changed rows back in one statement every few seconds
+  """
+  def __init__(self, pool: Pool, interval: float = 5.0, idle: float = 600.0):
+    self.pool = pool
+    self.interval = interval
+    self.idle = idle
+    self.members: Dict[Key, Progress] = {}
+    self.dirty: Set[Key] = set()
+    self.loading: Dict[Key, asyncio.Task] = {}
+    self.task: Optional[asyncio.Task] = None
+    self.lock = asyncio.Lock()
+    self.flushed = 0
+    self.last_flush = 0.0
+
+  def start(self: "XPAccumulator"):
+    if not self.task:
+      self.task = asyncio.ensure_future(self.run())
+
+  async def close(self: "XPAccumulator"):
+    if self.task:
+      self.task.cancel()
+      self.task = None
+
+    await self.flush()
+
+  async def run(self: "XPAccumulator"):
+    while True:
+      await asyncio.sleep(self.interval)
+      try:
+        await self.flush()
+        self.evict()
+      except Exception as e:
+        logger.warning(f"Failed to flush {len(self.dirty)} leveling rows: {e}")
+
+  async def load(self: "XPAccumulator", key: Key) -> Progress:
+    result = await self.pool.fetchrow(
+      """
+      SELECT xp, target_xp, lvl FROM leveling.members
+      WHERE guild_id = $1 AND user_id = $2
+      """,
+      *key
+    )
+    progress = Progress(result.xp, result.target_xp, result.lvl) if result else Progress()
+    return self.members.setdefault(key, progress)
+
+  async def get(self: "XPAccumulator", guild_id: int, user_id: int) -> Progress:
+    """
+    Get a member's progress, reading it from the database the first time only
+    """
+    key = (guild_id, user_id)
+    if progress := self.members.get(key):
+      return progress
+
+    if not (task := self.loading.get(key)):
+      task = self.loading[key] = asyncio.ensure_future(self.load(key))
+      task.add_done_callback(lambda _: self.loading.pop(key, None))
+
+    return await asyncio.shield(task)
+
+  def cached(self: "XPAccumulator", guild_id: int, user_id: int) -> Optional[Progress]:
+    return self.members.get((guild_id, user_id))
+
+  async def add(self: "XPAccumulator", guild_id: int, user_id: int, xp: int) -> Optional[int]:
+    """
+    Add xp to a member and return their new level if they leveled up
+    """
+    progress = await self.get(guild_id, user_id)
+    progress.xp += xp
+    progress.seen = time.monotonic()
+    self.dirty.add((guild_id, user_id))
+
+    if progress.xp >= progress.target_xp:
+      progress.lvl += 1
+      progress.target_xp = 250 * progress.lvl
+      progress.xp = 0
+      return progress.lvl
+
+  async def discard(self: "XPAccumulator", guild_id: int, user_id: Optional[int] = None):
+    """
+    Forget pending progress, used before rows are deleted or reset by a command.
+    Waits for a running flush so it can't write the rows back afterwards
+    """
+    async with self.lock:
+      for key in [k for k in self.members if k[0] == guild_id and user_id in (None, k[1])]:
+        self.members.pop(key, None)
+        self.dirty.discard(key)
+
+  async def flush(self: "XPAccumulator") -> int:
+    async with self.lock:
+      return await self._flush()
+
+  async def _flush(self: "XPAccumulator") -> int:
+    if not self.dirty:
+      return 0
+
+    dirty, self.dirty = self.dirty, set()
+    rows = [(key, self.members[key]) for key in dirty if key in self.members]
+    try:
+      await self.pool.execute(
+        """
+        INSERT INTO leveling.members (guild_id, user_id, xp, target_xp, lvl)
+        SELECT * FROM unnest($1::BIGINT[], $2::BIGINT[], $3::INTEGER[], $4::INTEGER[], $5::INTEGER[])
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET
+        xp = excluded.xp, target_xp = excluded.target_xp, lvl = excluded.lvl
+        """,
+        [key[0] for key, _ in rows],
+        [key[1] for key, _ in rows],
+        [p.xp for _, p in rows],
+        [p.target_xp for _, p in rows],
+        [p.lvl for _, p in rows],
+      )
+    except BaseException:
+      self.dirty |= dirty
+      raise
+
+    self.flushed += len(rows)
+    self.last_flush = time.time()
+    return len(rows)
+
+  def evict(self: "XPAccumulator"):
+    cutoff = time.monotonic() - self.idle
+    for key in [k for k, p in self.members.items() if p.seen < cutoff and k not in self.dirty]:
+      with suppress(KeyError):
+        del self.members[key]
@@ -0,0 +1,180 @@
+import asyncio
+
+from collections import Counter, deque
+from discord import Client, Embed, File, Webhook
+from discord.abc import Messageable
+from discord.ui import View
+from discord.utils import utcnow
+from structure.managers import getLogger
+
+from typing import (
+  Deque,
+  Dict,
+  List,
+  Optional
+)
+
+logger = getLogger(__name__)
+
+# the most embeds a single message can carry, and the most characters across them
+MAX_EMBEDS = 10
+MAX_CHARACTERS = 6000
+
+class LogItem:
+  __slots__ = ("embed", "view", "file")
+
+  def __init__(self, embed: Embed, view: Optional[View] = None, file: Optional[File] = None):
+    self.embed = embed
+    self.view = view
+    self.file = file
+
+class Destination:
+  __slots__ = ("channel", "queue", "overflow", "task")
+
+  def __init__(self, channel: Messageable):
+    self.channel = channel
+    self.queue: Deque[LogItem] = deque()
+    self.overflow: Counter = Counter()
+    self.task: Optional[asyncio.Task] = None
+
+class LogDispatcher:
+  """
+  Queues log embeds per channel and sends whatever arrived within `delay`
+  seconds as messages of up to 10 embeds, so a raid or a purge turns into
+  a handful of messages instead of one send per event.
+
+  Each channel keeps at most `budget` embeds waiting, anything past that
+  is counted and reported as a single "+N more" summary instead.
+  Bulk delete transcripts are never dropped
+  """
+  def __init__(
+    self,
+    bot: Client,
+    delay: float = 2.0,
+    budget: int = 50,
+    webhooks: bool = False
+  ):
+    self.bot = bot
+    self.delay = delay
+    self.budget = budget
+    self.webhooks = webhooks
+    self.destinations: Dict[int, Destination] = {}
+    self.hooks: Dict[int, Optional[Webhook]] = {}
+    self.messages = 0
+    self.embeds = 0
+    self.dropped = 0
+
+  def send(
+    self: "LogDispatcher",
+    channel: Messageable,
+    embed: Embed,
+    *,
+    view: Optional[View] = None,
+    file: Optional[File] = None
+  ):
+    if not (destination := self.destinations.get(channel.id)):
+      destination = self.destinations[channel.id] = Destination(channel)
+
+    if len(destination.queue) >= self.budget and not file:
+      destination.overflow[embed.title or "Event"] += 1
+      self.dropped += 1
+    else:
+      destination.queue.append(LogItem(embed, view, file))
+
+    if not destination.task:
+      destination.task = asyncio.ensure_future(self.flush(destination))
+
+  def take(self, destination: Destination) -> List[LogItem]:
+    """
+    The next message worth of items, files are always sent on their own
+    and a batch stops before its embeds pass 6000 characters
+    """
+    if destination.queue[0].file:
+      return [destination.queue.popleft()]
+
+    batch = []
+    size = 0
+    while destination.queue and len(batch) < MAX_EMBEDS and not destination.queue[0].file:
+      if batch and size + len(destination.queue[0].embed) > MAX_CHARACTERS:
+        break
+
+      size += len(destination.queue[0].embed)
+      batch.append(destination.queue.popleft())
+
+    return batch
+
+  async def flush(self: "LogDispatcher", destination: Destination):
+    try:
+      while destination.queue or destination.overflow:
+        await asyncio.sleep(self.delay)
+        while destination.queue:
+          await self.deliver(destination.channel, self.take(destination))
+
+        if destination.overflow:
+          overflow, destination.overflow = destination.overflow, Counter()
+          embed = Embed(
+            color=self.bot.color,
+            title="Logs overflow",
+            description="\n".join(
+              f"+{count:,} more **{title}**" for title, count in overflow.most_common(20)
+            ),
+            timestamp=utcnow(),
+          )
+          await self.deliver(destination.channel, [LogItem(embed)])
+    finally:
+      destination.task = None
+      if not destination.queue and not destination.overflow:
+        self.destinations.pop(destination.channel.id, None)
+
+  async def webhook(self: "LogDispatcher", channel: Messageable) -> Optional[Webhook]:
+    if channel.id in self.hooks:
+      return self.hooks[channel.id]
+
+    hook = None
+    try:
+      hook = next(
+        (w for w in await channel.webhooks() if w.user and w.user.id == self.bot.user.id and w.token),
+        None
+      ) or await channel.create_webhook(name=self.bot.user.name)
+    except Exception as e:
+      # no permissions, the channel itself is used from now on
+      logger.debug(f"Can't use a webhook for logs in {channel.id}: {e}")
+
+    self.hooks[channel.id] = hook
+    return hook
+
+  async def deliver(self: "LogDispatcher", channel: Messageable, items: List[LogItem]):
+    embeds = [item.embed for item in items]
+    kwargs = {"embeds": embeds, "silent": True}
+    if items[0].file:
+      kwargs["file"] = items[0].file
+
+    # the copy id button only makes sense with a single embed
+    if len(items) == 1 and items[0].view:
+      kwargs["view"] = items[0].view
+
+    try:
+      if self.webhooks and (hook := await self.webhook(channel)):
+        kwargs.pop("view", None)
+        await hook.send(
+          username=self.bot.user.name,
+          avatar_url=self.bot.user.display_avatar.url,
+          **kwargs
+        )
+      else:
+        await channel.send(**kwargs)
+    except Exception as e:
+      logger.warning(f"Failed to send {len(embeds)} logs to {channel.id}: {e}")
+      self.hooks.pop(channel.id, None)
+      # one bad embed shouldn't take the rest of the batch down with it
+      if len(items) > 1:
+        for item in items:
+          await self.deliver(channel, [item])
+      return
+
+    self.messages += 1
+    self.embeds += len(embeds)
+
+  @property
+  def pending(self) -> int:
+    return sum(len(d.queue) for d in self.destinations.values())
@@ -0,0 +1,218 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from asyncpg import Pool
+from contextlib import suppress
+from datetime import datetime, timezone
+from structure.managers import getLogger
+
+from typing import (
+  Any,
+  Callable,
+  Coroutine,
+  Dict,
+  Hashable,
+  List,
+  Optional,
+  Set,
+  Tuple
+)
+
+logger = getLogger(__name__)
+
+Callback = Callable[..., Coroutine[Any, Any, Any]]
+
+def timestamp(date: datetime) -> float:
+  """
+  Naive datetimes are stored as utc by asyncpg, so treat them the same way here
+  """
+  if date.tzinfo is None:
+    date = date.replace(tzinfo=timezone.utc)
+
+  return date.timestamp()
+
+class Job:
+  __slots__ = ("key", "due", "callback", "args", "cancelled")
+
+  def __init__(self, key: Hashable, due: float, callback: Callback, args: tuple):
+    self.key = key
+    self.due = due
+    self.callback = callback
+    self.args = args
+    self.cancelled = False
+
+class Source:
+  """
+  A table the scheduler reads due jobs from.
+  The query gets ($1 from, $2 until, $3 limit, $4... the `cursor` columns of the last row read,
+  NULL on the first page) and has to order by those columns, the due column first
+  """
+  __slots__ = ("name", "query", "due", "key", "callback", "cursor")
+
+  def __init__(
+    self,
+    name: str,
+    query: str,
+    due: Callable[[Any], datetime],
+    key: Callable[[Any], Hashable],
+    callback: Callable[[Any], Coroutine[Any, Any, Any]],
+    cursor: Tuple[str, ...]
+  ):
+    self.name = name
+    self.query = query
+    self.due = due
+    self.key = key
+    self.callback = callback
+    self.cursor = cursor
+
+class Scheduler:
+  """
+  One dispatcher for every timed job (reminders, giveaways, bump reminders).
+  Postgres stays the source of truth, only the jobs due within
+  the next `horizon` seconds are kept in a heap in memory
+  """
+  def __init__(self, pool: Pool, horizon: float = 600.0, page: int = 1000):
+    self.pool = pool
+    self.horizon = horizon
+    self.page = page
+    self.sources: Dict[str, Source] = {}
+    self.heap: List[Tuple[float, int, Job]] = []
+    self.jobs: Dict[Hashable, Job] = {}
+    self.running: Set[asyncio.Task] = set()
+    self.counter = itertools.count()
+    self.loaded_until = 0.0
+    self.wake = asyncio.Event()
+    self.task: Optional[asyncio.Task] = None
+    self.dispatched = 0
+    self.failed = 0
+
+  def source(self: "Scheduler", *args, **kwargs):
+    source = Source(*args, **kwargs)
+    self.sources[source.name] = source
+
+  def start(self: "Scheduler"):
+    if not self.task:
+      self.task = asyncio.ensure_future(self.run())
+
+  async def close(self: "Scheduler"):
+    if self.task:
+      self.task.cancel()
+      self.task = None
+
+    for task in list(self.running):
+      task.cancel()
+
+  def schedule(self: "Scheduler", key: Hashable, due: datetime, callback: Callback, *args) -> bool:
+    """
+    Schedule a job whose row was just written.
+    Jobs past the loaded window are left to the next page load
+    """
+    self.cancel(key)
+    due = timestamp(due)
+    if due >= self.loaded_until:
+      return False
+
+    job = self.jobs[key] = Job(key, due, callback, args)
+    heapq.heappush(self.heap, (due, next(self.counter), job))
+    if self.heap[0][2] is job:
+      self.wake.set()
+
+    return True
+
+  def reschedule(self: "Scheduler", key: Hashable, due: datetime) -> bool:
+    if not (job := self.jobs.get(key)):
+      return False
+
+    return self.schedule(key, due, job.callback, *job.args)
+
+  def cancel(self: "Scheduler", key: Hashable) -> bool:
+    if job := self.jobs.pop(key, None):
+      job.cancelled = True
+      return True
+
+    return False
+
+  def __contains__(self, key: Hashable) -> bool:
+    return key in self.jobs
+
+  async def load(self: "Scheduler", until: float):
+    """
+    Read the jobs due before `until` from every source, one page at a time
+    """
+    start = datetime.fromtimestamp(self.loaded_until, tz=timezone.utc)
+    end = datetime.fromtimestamp(until, tz=timezone.utc)
+    # anything scheduled from now on and due before `until` goes straight into the heap,
+    # a job found by both is deduplicated by its key
+    previous, self.loaded_until = self.loaded_until, until
+    loaded = 0
+
+    try:
+      for source in self.sources.values():
+        # keyset pagination, jobs dispatched while paging delete or end their rows
+        # which would shift an offset past the ones that haven't been read yet
+        cursor = (None,) * len(source.cursor)
+        while True:
+          rows = await self.pool.fetch(source.query, start, end, self.page, *cursor)
+          for row in rows:
+            key = source.key(row)
+            if key not in self.jobs:
+              self.schedule(key, source.due(row), source.callback, row)
+              loaded += 1
+
+          if len(rows) < self.page:
+            break
+
+          cursor = tuple(rows[-1][column] for column in source.cursor)
+    except BaseException:
+      # read the whole window again next time, jobs that made it in are skipped by key
+      self.loaded_until = previous
+      raise
+
+    if loaded:
+      logger.info(f"Scheduled {loaded:,} jobs due before {end:%H:%M:%S}")
+
+  def dispatch(self: "Scheduler", job: Job):
+    async def runner():
+      try:
+        await job.callback(*job.args)
+        self.dispatched += 1
+      except Exception as e:
+        self.failed += 1
+        logger.warning(f"Scheduled job {job.key} failed: {e}")
+
+    task = asyncio.ensure_future(runner())
+    self.running.add(task)
+    task.add_done_callback(self.running.discard)
+
+  async def run(self: "Scheduler"):
+    while True:
+      now = time.time()
+      if now >= self.loaded_until - self.horizon / 2:
+        try:
+          await self.load(now + self.horizon)
+        except Exception as e:
+          logger.warning(f"Failed to load scheduled jobs: {e}")
+          await asyncio.sleep(5)
+          continue
+
+      while self.heap and self.heap[0][0] <= now:
+        _, _, job = heapq.heappop(self.heap)
+        if job.cancelled:
+          continue
+
+        self.jobs.pop(job.key, None)
+        self.dispatch(job)
+
+      wake_at = self.loaded_until - self.horizon / 2
+      if self.heap:
+        wake_at = min(wake_at, self.heap[0][0])
+
+      self.wake.clear()
+      with suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(self.wake.wait(), max(wake_at - time.time(), 0))
+
+  @property
+  def pending(self) -> int:
+    return len(self.jobs)
@@ -0,0 +1,208 @@
+import asyncio
+import time
+
+from asyncpg import Pool
+from collections import defaultdict
+from contextlib import suppress
+from discord import AllowedMentions, Client, Embed
+from discord.utils import utcnow
+from pydantic import BaseModel
+from structure.managers import ClientSession, getLogger
+
+from typing import (
+  Any,
+  Dict,
+  List,
+  Optional,
+  Tuple
+)
+
+logger = getLogger(__name__)
+
+GQL_URL = "https://gql.twitch.tv/gql"
+GQL_HEADERS = {
+  "client-id": "kimne78kx3ncx6brgo4mv6wki5h1ko",
+  "client-session-id": "bc9cdea175eb84bf",
+  "client-version": "cf0f573f-6d51-4d85-9c59-0a9ce7301b38",
+  "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Mobile Safari/537.36"
+}
+CHANNEL_QUERY = "9795cac5a29b76b1800d5472f92a5a9c68d192820f9a52b7fdaddd2438584ce6"
+
+class TwitchMetrics(BaseModel):
+  streamers: int
+  batches: int
+  failed_batches: int
+  live: int
+  notified: int
+  fetch_time: float
+  write_time: float
+  send_time: float
+  total_time: float
+  finished_at: float
+
+class TwitchPoller:
+  """
+  Checks every tracked streamer with a handful of batched GQL requests
+  and only writes the subscriptions whose stream changed
+  """
+  def __init__(
+    self,
+    bot: Client,
+    pool: Pool,
+    session: ClientSession,
+    batch_size: int = 30,
+    concurrency: int = 4,
+    send_concurrency: int = 5
+  ):
+    self.bot = bot
+    self.pool = pool
+    self.session = session
+    self.batch_size = batch_size
+    self.semaphore = asyncio.Semaphore(concurrency)
+    self.send_semaphore = asyncio.Semaphore(send_concurrency)
+    self.last: Dict[Tuple[int, str], Optional[str]] = {}
+    self.metrics: Optional[TwitchMetrics] = None
+
+  @staticmethod
+  def payload(login: str) -> Dict[str, Any]:
+    return {
+      "operationName": "MwebChannelHomePage_Query",
+      "variables": {
+        "login": login
+      },
+      "extensions": {
+        "persistedQuery": {
+          "version": 1,
+          "sha256Hash": CHANNEL_QUERY
+        }
+      }
+    }
+
+  async def fetch_batch(self: "TwitchPoller", logins: List[str]) -> Dict[str, Any]:
+    async with self.semaphore:
+      res = await self.session.post(
+        GQL_URL,
+        headers=GQL_HEADERS,
+        json=[self.payload(login) for login in logins]
+      )
+
+    # results come back in the same order as the operations
+    return {
+      login: (r.data.channel if r and r.data else None)
+      for login, r in zip(logins, res)
+    }
+
+  async def fetch(self: "TwitchPoller", logins: List[str]) -> Tuple[Dict[str, Any], int]:
+    batches = [
+      logins[i:i + self.batch_size]
+      for i in range(0, len(logins), self.batch_size)
+    ]
+    channels, failed = {}, 0
+    for batch, result in zip(
+      batches,
+      await asyncio.gather(*map(self.fetch_batch, batches), return_exceptions=True)
+    ):
+      if isinstance(result, BaseException):
+        failed += 1
+        logger.warning(f"Twitch batch of {len(batch)} streamers failed: {result}")
+        continue
+
+      channels.update(result)
+
+    return channels, failed
+
+  async def send(self: "TwitchPoller", channel_id: int, content: str, embed: Embed):
+    if not (channel := self.bot.get_channel(channel_id)):
+      return
+
+    async with self.send_semaphore:
+      with suppress(Exception):
+        await channel.send(
+          content=content,
+          embed=embed,
+          allowed_mentions=AllowedMentions.all()
+        )
+
+  async def poll(self: "TwitchPoller") -> TwitchMetrics:
+    start = time.perf_counter()
+    rows = await self.pool.fetch(
+      """
+      SELECT guild_id, channel_id, streamer, stream_id, content
+      FROM notifications.twitch
+      """
+    )
+    subscriptions = defaultdict(list)
+    for row in rows:
+      subscriptions[row.streamer].append(row)
+
+    channels, failed = await self.fetch(list(subscriptions))
+    fetched = time.perf_counter()
+
+    changes, sends, live = [], [], 0
+    for streamer, ch in channels.items():
+      if not ch or not ch.stream:
+        continue
+
+      live += 1
+      stream_id = ch.stream.id
+      embed = (
+        Embed(
+          title=ch.stream.broadcaster.broadcastSettings.title,
+          color=0x6441a4,
+          url=f"https://twitch.tv/{ch.login}",
+          timestamp=utcnow()
+        )
+        .set_author(name=f"{ch.displayName} | {ch.stream.game.displayName if ch.stream.game else 'Twitch'}")
+        .set_image(url=ch.stream.previewImageURL.format(width="1980", height="1080"))
+        .set_footer(text="Twitch")
+      )
+      for row in subscriptions[streamer]:
+        key = (row.guild_id, streamer)
+        if (self.last.get(key, row.stream_id) or "") == stream_id:
+          continue
+
+        changes.append((row.guild_id, streamer, stream_id))
+        sends.append(self.send(row.channel_id, row.content.replace("{streamer}", ch.login), embed))
+
+    if changes:
+      await self.pool.execute(
+        """
+        UPDATE notifications.twitch AS t
+        SET stream_id = u.stream_id
+        FROM unnest($1::BIGINT[], $2::TEXT[], $3::TEXT[]) AS u(guild_id, streamer, stream_id)
+        WHERE t.guild_id = u.guild_id AND t.streamer = u.streamer
+        """,
+        [c[0] for c in changes],
+        [c[1] for c in changes],
+        [c[2] for c in changes],
+      )
+      for guild_id, streamer, stream_id in changes:
+        self.last[(guild_id, streamer)] = stream_id
+
+    written = time.perf_counter()
+    await asyncio.gather(*sends)
+    finished = time.perf_counter()
+
+    # forget subscriptions that were removed
+    keys = {(row.guild_id, row.streamer) for row in rows}
+    for key in [k for k in self.last if k not in keys]:
+      del self.last[key]
+
+    self.metrics = TwitchMetrics(
+      streamers=len(subscriptions),
+      batches=-(-len(subscriptions) // self.batch_size),
+      failed_batches=failed,
+      live=live,
+      notified=len(changes),
+      fetch_time=fetched - start,
+      write_time=written - fetched,
+      send_time=finished - written,
+      total_time=finished - start,
+      finished_at=time.time(),
+    )
+    logger.info(
+      f"Twitch pass checked {len(subscriptions)} streamers ({live} live, {len(changes)} notified) "
+      f"in {self.metrics.total_time:.2f}s (fetch {self.metrics.fetch_time:.2f}s, "
+      f"write {self.metrics.write_time:.2f}s, send {self.metrics.send_time:.2f}s)"
+    )
+    return self.metrics